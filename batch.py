@@ -0,0 +1,205 @@
+"""
+Headless batch driver.
+
+Compiles every source file named on the command line (directories are
+searched recursively) on a process pool and writes, for each input, a
+``.tac`` file with the intermediate code and an ``.asm`` file with the
+generated assembly, plus one JSON summary of the errors per file.
+With --cache-dir, unchanged sources are served from the compile cache;
+with --binary, the IC and the assembled program are also written in the
+binary format of binary_format.py (.icb and .vmb).  With --profile,
+every file is compiled under profiling.Profile (bypassing the cache) and
+the per-phase reports go to one JSON file.
+
+    python batch.py programs/ extra.mc -o build/ --summary build/summary.json
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor
+
+from session import CompilerSession
+from compile_cache import CompileCache
+from optimizer import LEVELS, PASSES
+from binary_format import save_ic, save_program
+from vm import assemble
+
+# One session per worker process, built by the pool initializer so the
+# lexer and LALR tables are constructed once per process, not per file.
+_session = None
+
+
+def _init_worker(cache_dir=None, opt_level=0, disabled=()):
+    global _session
+    cache = CompileCache(cache_dir=cache_dir) if cache_dir else None
+    _session = CompilerSession(cache=cache, opt_level=opt_level, disabled_passes=disabled)
+
+
+def collect_sources(paths, pattern):
+    """Expand directories into the matching files below them, sorted."""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if fnmatch(name, pattern):
+                        full = os.path.join(dirpath, name)
+                        jobs.append((full, os.path.relpath(full, path)))
+        else:
+            jobs.append((path, os.path.basename(path)))
+    return jobs
+
+
+def output_clashes(jobs):
+    """[(output base, [sources])] for the outputs more than one source would write."""
+    sources = {}
+    for src, rel in jobs:
+        base = os.path.normcase(os.path.splitext(rel)[0])
+        sources.setdefault(base, []).append(src)
+    return [(base, srcs) for base, srcs in sources.items() if len(srcs) > 1]
+
+
+def compile_file(job):
+    """Compile one file inside a worker; returns its summary entry."""
+    src_path, rel_path, out_dir, options, binary, profile = job
+    if _session is None:
+        _init_worker(*options)
+
+    entry = {'path': src_path, 'errors': []}
+    try:
+        with open(src_path, encoding='utf-8') as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        entry['errors'].append(f"Cannot read file: {e}")
+        entry['ok'] = False
+        return entry
+
+    cache = _session.cache
+    served = cache.hits + cache.disk_hits if cache else 0
+    if profile is not None:
+        result, prof = _session.profile(code, *profile)
+        entry['profile'] = prof.to_record()
+    else:
+        result = _session.compile(code)
+    entry['errors'] = result.errors
+    entry['ok'] = not result.errors
+    entry['cached'] = bool(cache) and cache.hits + cache.disk_hits > served
+    if result.opt_report:
+        entry['optimizer'] = [{'pass': name, 'before': before, 'after': after}
+                              for name, before, after in result.opt_report]
+    if result.peephole:
+        entry['peephole'] = result.peephole
+
+    base = os.path.join(out_dir, os.path.splitext(rel_path)[0])
+    os.makedirs(os.path.dirname(base) or '.', exist_ok=True)
+    with open(base + '.tac', 'w', encoding='utf-8') as f:
+        f.write(result.ic.display() + "\n")
+    with open(base + '.asm', 'w', encoding='utf-8') as f:
+        f.write(result.asm + "\n")
+    if binary and entry['ok']:
+        save_ic(result.ic, base + '.icb')
+        save_program(assemble(result.asm), base + '.vmb')
+    return entry
+
+
+def run(jobs, out_dir, workers, options=(), binary=False, profile=None):
+    """
+    options are the _init_worker arguments: (cache_dir, opt_level, disabled
+    passes); profile, if given, is (cprofile, memory) for Session.profile().
+    """
+    tasks = [(src, rel, out_dir, options, binary, profile) for src, rel in jobs]
+    if workers <= 1:
+        return [compile_file(t) for t in tasks]
+
+    # Large chunks keep the per-task IPC cost small next to the compile itself.
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=options) as pool:
+        return list(pool.map(compile_file, tasks, chunksize=chunksize))
+
+
+def write_profile(path, entries):
+    """One JSON file with every file's profile and the time per phase over all of them."""
+    files, totals = [], Counter()
+    for e in entries:
+        prof = e.pop('profile', None)
+        if prof is None:
+            continue
+        files.append({'path': e['path'], **prof})
+        for p in prof['phases']:
+            totals[p['phase']] += p['seconds']
+    report = {'phases': dict(totals.most_common()),
+              'total_seconds': sum(totals.values()), 'files': files}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compile Mini-Compiler sources without the GUI.")
+    ap.add_argument('paths', nargs='+', help="source files or directories")
+    ap.add_argument('-o', '--out-dir', default='build', help="where .tac/.asm files go (default: build)")
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 1 compiles in-process)")
+    ap.add_argument('--pattern', default='*.mc', help="file pattern inside directories (default: *.mc)")
+    ap.add_argument('--cache-dir', help="reuse results for unchanged sources from this directory")
+    ap.add_argument('-O', dest='opt_level', type=int, choices=sorted(LEVELS), default=0,
+                    help="optimization level (default: 0)")
+    ap.add_argument('--disable-pass', action='append', default=[],
+                    choices=sorted(PASSES) + ['peephole'],
+                    help="skip one optimization pass (repeatable)")
+    ap.add_argument('--binary', action='store_true',
+                    help="also write .icb/.vmb binary files for error-free sources")
+    ap.add_argument('--summary', help="JSON summary path (default: <out-dir>/summary.json)")
+    ap.add_argument('--profile', metavar='PATH', help="write per-phase timings and counters to PATH")
+    ap.add_argument('--profile-memory', action='store_true',
+                    help="with --profile, trace peak memory per phase")
+    ap.add_argument('--cprofile', action='store_true',
+                    help="with --profile, keep the top functions from cProfile")
+    args = ap.parse_args(argv)
+
+    jobs = collect_sources(args.paths, args.pattern)
+    if not jobs:
+        print("No source files found.", file=sys.stderr)
+        return 2
+    clashes = output_clashes(jobs)
+    if clashes:
+        for base, sources in clashes:
+            print(f"{', '.join(sources)} would all be written as {base}.*", file=sys.stderr)
+        print("Rename the files or pass their common parent directory instead.", file=sys.stderr)
+        return 2
+
+    options = (args.cache_dir, args.opt_level, tuple(args.disable_pass))
+    profile = (args.cprofile, args.profile_memory) if args.profile else None
+    entries = run(jobs, args.out_dir, args.jobs, options, args.binary, profile)
+    if args.profile:
+        write_profile(args.profile, entries)
+    failed = sum(1 for e in entries if not e['ok'])
+    cached = sum(1 for e in entries if e.get('cached'))
+    summary = {'total': len(entries), 'failed': failed, 'cached': cached, 'files': entries}
+    rules = Counter()
+    saved = 0
+    for e in entries:
+        rules.update(e.get('peephole', {}))
+        for p in e.get('optimizer', ()):
+            if p['pass'] == 'peephole':
+                saved += p['before'] - p['after']
+    if rules:
+        summary['peephole'] = {'instructions_saved': saved, 'rules': dict(rules.most_common())}
+
+    summary_path = args.summary or os.path.join(args.out_dir, 'summary.json')
+    os.makedirs(os.path.dirname(summary_path) or '.', exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"Compiled {len(entries)} file(s) ({cached} from cache), {failed} with errors. "
+          f"Summary: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+"""Timing scripts for the Mini-Compiler, and the typed_fuzz differential check;
+run each one with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,61 @@
+"""
+Time the execution engines on a counting loop.
+
+    python -m benchmarks.engines [--iterations N]
+
+The loop is compiled from source at -O0:
+
+    int i; int s; i = 0; s = 0;
+    while (i < N) { s = s + i; i = i + 1; }
+    print(s);
+"""
+import argparse
+import time
+
+from session import CompilerSession
+from ic_interpreter import ClosureInterpreter, NaiveInterpreter
+from vm import VM, assemble
+from python_generator import run_program
+
+SOURCE = """int i; int s; i = 0; s = 0;
+while (i < {n}) {{ s = s + i; i = i + 1; }}
+print(s);
+"""
+
+
+def counting_loop(n):
+    return CompilerSession().compile(SOURCE.format(n=n))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare execution engines on a counting loop.")
+    ap.add_argument('--iterations', type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    result = counting_loop(args.iterations)
+    ic = result.ic
+    expected = args.iterations * (args.iterations - 1) // 2
+
+    engines = [
+        ('naive IC interpreter', lambda: NaiveInterpreter(ic).run().output),
+        ('closure IC interpreter', lambda: ClosureInterpreter(ic).run().output),
+        ('Python backend', lambda: run_program(ic).output),
+        ('assembly VM', lambda: VM(assemble(result.asm)).run().output),
+    ]
+    baseline = None
+    for name, fn in engines:
+        output, secs = timed(fn)
+        status = "ok" if output == [expected] else f"WRONG {output}"
+        baseline = baseline or secs
+        print(f"{name:<24} {secs:8.3f} s  {args.iterations / secs / 1e6:7.2f} M iter/s  "
+              f"x{baseline / secs:5.1f}  {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+What error recovery costs the front end.
+
+Straight-line programs with one statement in every K broken (see
+programs.with_errors) go through lexing, parsing and the declaration
+checks, next to the same program unbroken.  Each row gives the errors
+reported against the statements broken, the statements the tree kept,
+and the front-end time per statement; the slowdown column is against
+the unbroken program.
+
+    python -m benchmarks.error_recovery [--size N] [--every K ...] [--repeat R]
+"""
+import argparse
+import gc
+import time
+
+from benchmarks.programs import straight_line, with_errors
+from lexer import TokenStream
+from semantics import check
+from session import CompilerSession
+from symbol_table import SymbolTable
+
+
+def front_end(session, source):
+    """(seconds, errors, statements kept) for lexing, parsing and checking source."""
+    gc.collect()
+    start = time.perf_counter()
+    session.reset()
+    stream = TokenStream(session.lexer.stream(source))
+    tree, errors = session.parser.parse(None, lexer=stream, source=source)
+    errors = session.lexer.errors + errors
+    kept = 0
+    if tree is not None:
+        errors = errors + check(tree, SymbolTable())
+        kept = len(tree.body)
+    return time.perf_counter() - start, len(errors), kept
+
+
+def best(repeat, session, source):
+    runs = [front_end(session, source) for _ in range(repeat)]
+    return min(runs)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--size', type=int, default=20000, help="statements per program")
+    ap.add_argument('--every', type=int, action='append',
+                    help="break one statement in this many (repeatable; default: 1000 100 10 3)")
+    ap.add_argument('--repeat', type=int, default=3, help="timed runs per program; the best counts")
+    args = ap.parse_args()
+
+    session = CompilerSession()
+    clean, _, kept = best(args.repeat, session, straight_line(args.size))
+    print(f"{'broken':>14}{'errors':>8}{'kept':>8}{'front end':>12}{'us/stmt':>9}{'slowdown':>10}")
+    print(f"{'none':>14}{0:>8}{kept:>8}{clean * 1000:>10.1f}ms{clean / args.size * 1e6:>9.1f}"
+          f"{'':>10}")
+    for every in args.every or (1000, 100, 10, 3):
+        source, broken = with_errors(args.size, every)
+        secs, errors, kept = best(args.repeat, session, source)
+        print(f"{f'1 in {every}':>14}{errors:>8}{kept:>8}{secs * 1000:>10.1f}ms"
+              f"{secs / args.size * 1e6:>9.1f}{(secs / clean - 1) * 100:>+9.1f}%")
+        if errors < broken:
+            print(f"{'':>14}only {errors} of {broken} broken statements reported")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Memory and walk time of the intermediate code for a large generated program.
+
+Compares IntermediateCode's array storage against the list of four-key
+dicts it replaced, for the same quads.
+
+    python -m benchmarks.ic_size [--quads N]
+"""
+import argparse
+import time
+import tracemalloc
+
+from intermediate_code import IntermediateCode
+
+
+def build(n):
+    """About n quads of straight-line arithmetic over a few variables."""
+    ic = IntermediateCode()
+    names = ['a', 'b', 'c', 'd']
+    for i in range(n // 2):
+        t = ic.new_temp()
+        ic.emit('+*-'[i % 3], arg1=names[i % 4], arg2=i % 100, res=t)
+        ic.emit('=', arg1=t, res=names[(i + 1) % 4])
+    return ic
+
+
+def measured(fn):
+    tracemalloc.start()
+    value = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--quads', type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    ic, ic_bytes = measured(lambda: build(args.quads))
+    dicts, dict_bytes = measured(ic.as_dicts)
+
+    start = time.perf_counter()
+    for row in ic.rows():
+        pass
+    rows_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in ic.code:
+        q.get('op')
+    view_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for q in dicts:
+        q.get('op')
+    dict_time = time.perf_counter() - start
+
+    n = len(ic)
+    print(f"{n} quads")
+    print(f"arrays             {ic_bytes / 2**20:8.1f} MiB  {ic_bytes / n:6.1f} B/quad")
+    print(f"list of dicts      {dict_bytes / 2**20:8.1f} MiB  {dict_bytes / n:6.1f} B/quad")
+    print(f"walk rows()        {rows_time * 1e3:8.1f} ms")
+    print(f"walk code (Quads)  {view_time * 1e3:8.1f} ms")
+    print(f"walk dicts         {dict_time * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
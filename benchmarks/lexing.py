@@ -0,0 +1,59 @@
+"""
+Lexing throughput on a large generated source.
+
+Times MiniLexer.stream() over the whole text in memory, and
+stream_file() reading the same text from disk in chunks, with and
+without mmap.
+
+    python -m benchmarks.lexing [--mb N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from lexer import MiniLexer
+
+BLOCK = """\
+int a;
+float b;
+a = 12 + 3 * (a - 4) % 7;
+b = 2.5 / 0.5;  // comment
+/* a block
+   comment */
+if (a <= 10) { print(a); } else { a = a != 3; }
+while (a > 0) { a = a - 1; }
+print("done");
+"""
+
+
+def timed(tokens):
+    start = time.perf_counter()
+    n = sum(1 for _ in tokens)
+    return n, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--mb', type=float, default=8, help="size of the generated source")
+    args = ap.parse_args()
+
+    text = BLOCK * max(1, int(args.mb * 2**20 / len(BLOCK)))
+    with tempfile.NamedTemporaryFile('w', suffix='.mc', delete=False, encoding='utf-8') as f:
+        f.write(text)
+    try:
+        runs = [
+            ('stream (in memory)', lambda: MiniLexer().stream(text)),
+            ('stream_file', lambda: MiniLexer().stream_file(f.name)),
+            ('stream_file mmap', lambda: MiniLexer().stream_file(f.name, use_mmap=True)),
+        ]
+        print(f"{len(text) / 2**20:.1f} MiB source")
+        for name, make in runs:
+            n, secs = timed(make())
+            print(f"{name:<20} {n:9} tokens  {secs:7.3f} s  {n / secs / 1e6:6.2f} M tokens/s")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compile time against program length, from 1k to 1M statements.
+
+Each stage (lexing, parsing, declaration checks, lowering to IC with
+the int/float conversions, code generation) is timed separately on generated straight-line programs with
+the occasional if and while; the per-statement cost of every stage
+should stay flat as the programs grow.
+
+    python -m benchmarks.parse_scaling [--max N]
+"""
+import argparse
+import time
+
+from benchmarks.programs import straight_line
+from code_generator import CodeGenerator
+from ic_types import convert
+from lexer import TokenStream
+from lowering import lower
+from semantics import check
+from session import CompilerSession
+from symbol_table import SymbolTable
+
+
+def measure(session, source):
+    times = {}
+    start = time.perf_counter()
+    for _ in session.lexer.stream(source):
+        pass
+    times['lex'] = time.perf_counter() - start
+
+    # the parser pulls from a fresh stream, so the tokens of a 1M-statement
+    # program never all exist at once; the lexing time is taken back out
+    session.reset()
+    start = time.perf_counter()
+    tree, errors = session.parser.parse(None, lexer=TokenStream(session.lexer.stream(source)),
+                                        source=source)
+    times['parse'] = time.perf_counter() - start - times['lex']
+    if errors:
+        raise SystemExit(f"generated program does not parse: {errors[0]}")
+
+    start = time.perf_counter()
+    symtab = SymbolTable()
+    check(tree, symtab)
+    times['symbols'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ic = lower(tree, symtab=symtab)
+    convert(ic, symtab)
+    times['lower'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    CodeGenerator(ic, symtab).generate()
+    times['codegen'] = time.perf_counter() - start
+    return times
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--max', type=int, default=1_000_000, help="largest program, in statements")
+    args = ap.parse_args()
+
+    session = CompilerSession()
+    stages = ('lex', 'parse', 'symbols', 'lower', 'codegen')
+    print(f"{'statements':>10}" + ''.join(f"{s:>12}" for s in stages)
+          + f"{'total':>10}{'us/stmt':>10}")
+    n = 1000
+    while n <= args.max:
+        times = measure(session, straight_line(n))
+        total = sum(times.values())
+        print(f"{n:>10}" + ''.join(f"{times[s]:>11.3f}s" for s in stages)
+              + f"{total:>9.2f}s{total / n * 1e6:>10.1f}")
+        n *= 10
+
+
+if __name__ == '__main__':
+    main()
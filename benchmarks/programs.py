@@ -0,0 +1,192 @@
+"""
+Synthetic source programs for the benchmarks, one generator per shape
+that stresses a different part of the compiler.  Every program declares
+what it uses and runs to completion, so each can also go through the
+execution engines.  Comparisons bind tighter than arithmetic in this
+grammar, so their operands are parenthesised.
+
+    straight_line(n)       n mixed statements, the occasional if and while
+    nested_blocks(depth)   blocks, ifs and whiles nested depth levels deep
+    expression_chain(n)    assignments whose right-hand sides have n operators
+    wide_declarations(n)   n distinct variables, each declared, set and read
+    long_loop(n)           a while loop that runs n times over a small body
+    element_wise(n)        loops over arrays of n elements, a[i] = b[i] * c[i] + k
+
+with_errors(n, every) is the odd one out: straight_line(n) with one
+statement in every `every` broken, for timing error recovery, and so is
+mixed_types(n, seed), a random program mixing int and float values that
+benchmarks.typed_fuzz runs on every engine.
+"""
+import random
+
+NAMES = ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def straight_line(n):
+    """Source with n statements over a handful of variables."""
+    lines = [f"int {v};" for v in NAMES]
+    i = len(lines)
+    while i < n:
+        x, y, z = NAMES[i % 6], NAMES[(i + 1) % 6], NAMES[(i + 3) % 6]
+        if i % 50 == 0:
+            lines.append(f"if ({x} < {i % 97}) {{ {y} = {y} + 1; }} else {{ {y} = {z}; }}")
+        elif i % 75 == 0:
+            lines.append(f"{x} = 3;")
+            lines.append(f"while ({x} > 0) {{ {x} = {x} - 1; }}")
+            i += 1
+        elif i % 10 == 0:
+            lines.append(f"print({x});")
+        else:
+            lines.append(f"{x} = {y} * {i % 13} + ({z} - {x}) % 7;")
+        i += 1
+    return "\n".join(lines) + "\n"
+
+
+def nested_blocks(depth):
+    """
+    Blocks depth levels deep, cycling through plain blocks, if/else and
+    while loops that run once; each level declares its own variable.
+    The syntax-tree passes recurse per level, so keep depth in the hundreds.
+    """
+    opening, closing = [], []
+    for level in range(depth):
+        v = f"v{level}"
+        kind = level % 3
+        if kind == 0:
+            opening.append(f"{{ int {v}; {v} = {level};")
+            closing.append("}")
+        elif kind == 1:
+            opening.append(f"if ({level} < {level + 1}) {{ int {v}; {v} = {level} + 1;")
+            closing.append(f"}} else {{ print({level}); }}")
+        else:
+            opening.append(f"int {v}; {v} = 1; while ({v} > 0) {{ {v} = {v} - 1;")
+            closing.append("}")
+    return "\n".join(opening) + "\nprint(0);\n" + "\n".join(reversed(closing)) + "\n"
+
+
+def expression_chain(n, statements=4):
+    """statements assignments of an n-operator expression over a few variables."""
+    ops = ['+', '-', '*', '+', '%']
+    lines = [f"int {v};" for v in NAMES] + [f"{v} = {i + 2};" for i, v in enumerate(NAMES)]
+    for s in range(statements):
+        parts = [NAMES[s % 6]]
+        for i in range(n):
+            op = ops[(i + s) % len(ops)]
+            # keep the values small: every multiply and remainder is by a constant
+            operand = str(i % 7 + 1) if op in '*%' else NAMES[(i + s) % 6]
+            parts.append(f"{op} {operand}")
+        lines.append(f"{NAMES[(s + 1) % 6]} = {' '.join(parts)};")
+    lines.append(f"print({NAMES[1]});")
+    return "\n".join(lines) + "\n"
+
+
+def wide_declarations(n):
+    """n variables, each declared, assigned from the one before and printed at the end."""
+    lines = [f"int w{i};" for i in range(n)]
+    lines.append("w0 = 1;")
+    lines.extend(f"w{i} = w{i - 1} + {i % 5};" for i in range(1, n))
+    lines.append(f"print(w{n - 1});")
+    return "\n".join(lines) + "\n"
+
+
+def long_loop(n):
+    """A loop of n iterations with some arithmetic, a branch and a nested update per turn."""
+    return f"""int i; int s; int t;
+i = 0; s = 0; t = 0;
+while (i < {n}) {{
+    t = i * 3 + 7;
+    if ((t % 2) == 0) {{ s = s + t; }} else {{ s = s - 1; }}
+    i = i + 1;
+}}
+print(s);
+"""
+
+
+def element_wise(n):
+    """Arrays of n elements filled and combined by loops that vectorize.py can run whole."""
+    return f"""int n; int i; float k;
+n = {n}; k = 0.5;
+float a[n]; float b[n]; int c[n];
+i = 0;
+while (i < n) {{ b[i] = i * 0.25; c[i] = (i % 7) - 3; i = i + 1; }}
+i = 0;
+while (i < n) {{ a[i] = b[i] * c[i] + k; i = i + 1; }}
+i = 0;
+while (i < n) {{ c[i] = c[i] * 2 + a[i] / 4; i = i + 1; }}
+print(a[n - 1]); print(c[n / 2]);
+"""
+
+
+def with_errors(n, every=10):
+    """
+    straight_line(n) with every every-th statement after the declarations
+    broken, in turn by a missing ';', a doubled operator, a stray character
+    and wrapping it in an if whose condition is cut short.  Returns the source and the number of
+    statements broken.
+    """
+    lines = straight_line(n).splitlines()
+    broken = 0
+    for i in range(len(NAMES), len(lines), every):
+        line = lines[i]
+        kind = broken % 4
+        if kind == 3:
+            line = f"if ({NAMES[i % 6]} < ) {{ {line} }}"
+        elif kind == 2:
+            line = line.replace(' ', ' @ ', 1)
+        elif kind == 1 and ' = ' in line:
+            line = line.replace(' = ', ' = * ', 1)
+        else:
+            line = line[:-1] if line.endswith(';') else line + ' +'
+        lines[i] = line
+        broken += 1
+    return "\n".join(lines) + "\n", broken
+
+
+INTS, FLOATS = ['i', 'j', 'm'], ['f', 'g', 'h']
+
+
+def mixed_types(n, seed=0):
+    """
+    n random statements over int and float scalars and arrays: arithmetic
+    mixing the two, assignments across them, ifs and short loops.  A
+    divisor can reach zero at run time, so some programs fail on purpose.
+    """
+    rng = random.Random(seed)
+
+    def expr(depth):
+        if depth > 2 or rng.random() < 0.3:
+            return rng.choice(INTS + FLOATS + [str(rng.randint(1, 9)), '2.5', '0.5',
+                                               'a[1]', 'b[2]'])
+        op = rng.choice(['+', '-', '*', '/', '%', '<', '==', '+', '*'])
+        right = (rng.choice(['3', '2.5', '7', 'm', 'f', '0.75']) if op in '/%'
+                 else expr(depth + 1))
+        return f"({expr(depth + 1)} {op} {right})"
+
+    def stmt(depth):
+        k = rng.random()
+        if k < 0.5 or depth > 1:
+            target = rng.choice(INTS + FLOATS + ['a[1]', 'b[(0 < 1)]', 'a[3]', 'b[2]'])
+            return f"{target} = {expr(0)};"
+        if k < 0.65:
+            return f"print({expr(0)});"
+        if k < 0.8:
+            return f"if ({expr(0)}) {{ {stmt(depth + 1)} }} else {{ {stmt(depth + 1)} }}"
+        v = rng.choice(INTS + FLOATS)
+        return (f"{v} = 0; while ({v} < {rng.randint(1, 4)}) "
+                f"{{ {stmt(depth + 1)} {v} = {v} + 1; }}")
+
+    lines = ["int i; int j; int m; float f; float g; float h; int a[4]; float b[4];",
+             "i = 3; j = 0 - 5; m = 7; f = 1.5; g = 0 - 2.25; h = 10;"]
+    lines.extend(stmt(0) for _ in range(n))
+    lines.append(" ".join(f"print({v});" for v in INTS + FLOATS + ['a[1]', 'b[3]']))
+    return "\n".join(lines) + "\n"
+
+
+SHAPES = {
+    'straight-line': straight_line,
+    'nested-blocks': nested_blocks,
+    'expression-chain': expression_chain,
+    'wide-declarations': wide_declarations,
+    'long-loop': long_loop,
+    'element-wise': element_wise,
+}
@@ -0,0 +1,45 @@
+"""
+Compare the first compile in a process against the ones that follow.
+
+The first compile pays for building the lexer and the LALR tables; every
+later compile should only pay for lexing, parsing and code generation.
+
+    python -m benchmarks.startup [--runs N]
+"""
+import argparse
+import time
+
+from session import CompilerSession
+
+SAMPLE = "int x;\nint y;\nx=5;\ny=3;\nint z;\nz=x+y*2;\nprint(z);\n"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--runs', type=int, default=200, help="compiles after the first one")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    session = CompilerSession()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session.compile(SAMPLE)
+    first = time.perf_counter() - start
+
+    times = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        session.compile(SAMPLE)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    median = times[len(times) // 2]
+
+    print(f"table build          {build * 1e3:9.3f} ms")
+    print(f"first compile        {(build + first) * 1e3:9.3f} ms  (build + compile)")
+    print(f"later compiles       {median * 1e3:9.3f} ms  (median of {args.runs})")
+    print(f"speed-up             {(build + first) / median:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+"""
+Benchmark suite with a stored history and a regression gate.
+
+Every case is one program from benchmarks.programs, sized by --scale.
+Each case goes through the compiler a stage at a time:
+
+    lex         MiniLexer.tokenize
+    parse       MiniParser.parse over those tokens
+    symbols     semantics.check
+    lower       lowering.lower
+    types       ic_types.convert on the lowered code
+    display     IntermediateCode.display
+    optimize    the -O2 passes
+    codegen     CodeGenerator.generate on the optimized code
+    closure, python, vm
+                the optimized program run by the closure interpreter, the
+                Python backend and the assembly VM (the first two run
+                element-wise array loops through NumPy when it is there)
+
+Each stage runs --repeat times and the best time counts.  Throughput is
+work per second: tokens for the front end, quads for the later stages,
+program runs for the engines.
+
+Every run is appended to a JSON history file.  The first run there (or
+one made with --set-baseline) is the baseline, and a later run at the
+same scale exits with status 1 if any stage's throughput falls more than
+--threshold below it.
+
+    python -m benchmarks.suite [--scale S] [--repeat N] [--case NAME]
+                               [--history PATH] [--threshold F] [--set-baseline]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.programs import SHAPES
+from code_generator import CodeGenerator
+from ic_types import convert
+from ic_interpreter import ClosureInterpreter
+from lexer import MiniLexer, TokenStream
+from lowering import lower
+from optimizer import Optimizer
+from parser import MiniParser
+from python_generator import run_program
+from semantics import check
+from symbol_table import SymbolTable
+from vm import VM, assemble
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.json')
+
+# argument of each shape's generator at --scale 1
+SIZES = {
+    'straight-line': 5000,
+    'nested-blocks': 150,
+    'expression-chain': 2000,
+    'wide-declarations': 3000,
+    'long-loop': 20000,
+    'element-wise': 20000,
+}
+MAX_DEPTH = 250     # the syntax-tree passes recurse once per nesting level
+
+
+def case_size(name, scale):
+    size = max(1, int(SIZES[name] * scale))
+    return min(size, MAX_DEPTH) if name == 'nested-blocks' else size
+
+
+def best(repeat, fn, setup=None):
+    """Shortest of repeat timed calls of fn(setup()), and fn's last result."""
+    times = []
+    value = None
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        value = fn(arg)
+        times.append(time.perf_counter() - start)
+    return min(times), value
+
+
+class Runner:
+    """Built once: the lexer and the LALR tables are not part of any stage."""
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.lexer = MiniLexer()
+        self.parser = MiniParser()
+        self.parser.build()
+
+    def run_case(self, source):
+        """{stage: (seconds, units, unit)} for one program."""
+        repeat = self.repeat
+        out = {}
+
+        def lex(_):
+            self.lexer.errors = []
+            return self.lexer.tokenize(source)[0]
+        secs, tokens = best(repeat, lex)
+        out['lex'] = (secs, len(tokens), 'tokens')
+
+        def parse(_):
+            self.parser.errors = []
+            tree, errors = self.parser.parse(None, lexer=TokenStream(tokens), source=source)
+            if errors:
+                raise SystemExit(f"benchmark program does not parse: {errors[0]}")
+            return tree
+        secs, tree = best(repeat, parse)
+        out['parse'] = (secs, len(tokens), 'tokens')
+
+        secs, symtab = best(repeat, lambda st: (check(tree, st), st)[1], SymbolTable)
+        out['symbols'] = (secs, len(tokens), 'tokens')
+
+        secs, ic = best(repeat, lambda _: lower(tree, symtab=symtab))
+        out['lower'] = (secs, len(ic), 'quads')
+
+        def typed(fresh):
+            convert(fresh, symtab)
+            return fresh
+        secs, ic = best(repeat, typed, lambda: lower(tree, symtab=symtab))
+        out['types'] = (secs, len(ic), 'quads')
+        lowered = len(ic)
+
+        secs, _ = best(repeat, lambda _: ic.display())
+        out['display'] = (secs, lowered, 'quads')
+
+        def optimize(fresh):
+            Optimizer(2).run(fresh)
+            return fresh
+        secs, ic = best(repeat, optimize, lambda: typed(lower(tree, symtab=symtab)))
+        out['optimize'] = (secs, lowered, 'quads')
+
+        secs, asm = best(repeat, lambda _: CodeGenerator(ic, symtab).generate())
+        out['codegen'] = (secs, len(ic), 'quads')
+
+        program = assemble(asm)
+        engines = {
+            'closure': lambda _: ClosureInterpreter(ic).run().output,
+            'python': lambda _: run_program(ic).output,
+            'vm': lambda _: VM(program).run().output,
+        }
+        outputs = {}
+        for name, fn in engines.items():
+            secs, outputs[name] = best(repeat, fn)
+            out[name] = (secs, 1, 'runs')
+        if len({json.dumps(o) for o in outputs.values()}) != 1:
+            raise SystemExit(f"engines disagree: {outputs}")
+        return out
+
+
+def run_suite(scale, repeat, cases):
+    runner = Runner(repeat)
+    results = {}
+    for name in cases:
+        size = case_size(name, scale)
+        source = SHAPES[name](size)
+        for stage, (secs, units, unit) in runner.run_case(source).items():
+            results[f"{name}/{stage}"] = {'seconds': secs, 'units': units, 'unit': unit,
+                                          'per_second': units / secs if secs else float('inf')}
+        print(f"  {name} ({size}) done", file=sys.stderr)
+    return results
+
+
+def _commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                             text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {'baseline': None, 'runs': []}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_history(path, history):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare(run, baseline, threshold):
+    """Lines of the comparison table and the keys that regressed."""
+    lines = [f"{'case/stage':<32} {'best':>10} {'per second':>14} {'vs baseline':>12}"]
+    regressed = []
+    for key, r in run['results'].items():
+        line = f"{key:<32} {r['seconds'] * 1000:8.2f}ms {r['per_second']:10.0f} {r['unit']:<5}"
+        base = baseline['results'].get(key) if baseline else None
+        if base:
+            change = r['per_second'] / base['per_second'] - 1
+            line += f" {change * 100:+8.1f}%"
+            if change < -threshold:
+                line += "  REGRESSION"
+                regressed.append(key)
+        lines.append(line)
+    return lines, regressed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--scale', type=float, default=1.0, help="program size factor (default: 1)")
+    ap.add_argument('--repeat', type=int, default=3, help="timed runs per stage; the best counts")
+    ap.add_argument('--case', action='append', choices=sorted(SHAPES),
+                    help="run only this case (repeatable)")
+    ap.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file")
+    ap.add_argument('--threshold', type=float, default=0.15,
+                    help="fail on a throughput drop of more than this fraction (default: 0.15)")
+    ap.add_argument('--set-baseline', action='store_true', help="make this run the baseline")
+    args = ap.parse_args(argv)
+
+    cases = args.case or list(SHAPES)
+    run = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'results': run_suite(args.scale, args.repeat, cases),
+    }
+
+    history = load_history(args.history)
+    baseline = history.get('baseline')
+    if baseline is not None and baseline['scale'] != args.scale:
+        print(f"Baseline is at scale {baseline['scale']}; not compared.", file=sys.stderr)
+        baseline = None
+    lines, regressed = compare(run, None if args.set_baseline else baseline, args.threshold)
+    print("\n".join(lines))
+
+    history['runs'].append(run)
+    if args.set_baseline or history.get('baseline') is None:
+        history['baseline'] = run
+        print("Stored as the baseline.")
+    save_history(args.history, history)
+
+    if regressed:
+        print(f"{len(regressed)} stage(s) more than {args.threshold:.0%} slower than the baseline.",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
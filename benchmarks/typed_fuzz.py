@@ -0,0 +1,250 @@
+"""
+Differential check of int and float arithmetic across the engines.
+
+Two parts.  First, a few fixed programs check that ic_types.convert()
+puts the itof/ftoi quads where C's implicit conversions go and that the
+code generator picks the typed opcodes (IDIV, FDIV, IMOD, FMOD, ITOF,
+FTOI).  Then every seed gives a programs.mixed_types program, which
+runs on the naive and closure interpreters, the Python backend and the
+VM at -O0, -O1 and -O2.  Each output, including whether every printed
+value is an int or a float, must match a tree-walking reference that
+applies C's rules directly to the syntax tree.  A program the reference
+sees fail (division by zero, an int array element overflowing) must
+fail with an ExecutionError everywhere.
+
+    python -m benchmarks.typed_fuzz [--seeds N] [--start S] [--size N]
+
+Exits with status 1 at the first mismatch, printing the program.
+"""
+import argparse
+import math
+import sys
+
+from benchmarks.programs import mixed_types
+from ic_interpreter import ClosureInterpreter, NaiveInterpreter
+from python_generator import run_program
+from runtime import ExecutionError
+from session import CompilerSession
+from syntax_tree import Visitor
+from vm import VM, assemble
+
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+STEP_LIMIT = 5000           # reference statements before a program is skipped
+INT64 = (-2**63, 2**63)     # what an int array element holds
+
+
+class Failed(Exception):
+    """The reference run hit a run-time error."""
+
+
+class TooLong(Exception):
+    pass
+
+
+class Reference(Visitor):
+    """Runs a checked syntax tree with C semantics; declarations are all global."""
+
+    def __init__(self, types):
+        self.types = types          # name -> 'int' or 'float'
+        self.env = {}
+        self.output = []
+        self.steps = 0
+
+    @staticmethod
+    def to(kind, value):
+        try:
+            return float(value) if kind == 'float' else int(value)
+        except (OverflowError, ValueError):
+            raise Failed(f"{value!r} does not fit in a {kind}")
+
+    def run(self, stmts):
+        for stmt in stmts:
+            self.steps += 1
+            if self.steps > STEP_LIMIT:
+                raise TooLong()
+            self.visit(stmt)
+
+    def element(self, name, index):
+        i = self.visit(index)
+        arr = self.env[name]
+        if not 0 <= i < len(arr):
+            raise Failed(f"index {i} out of range")
+        return arr, i
+
+    # --- Statements ---
+    def visit_Program(self, node):
+        self.run(node.body)
+
+    def visit_Block(self, node):
+        self.run(node.body)
+
+    def visit_Decl(self, node):
+        zero = 0.0 if node.type == 'float' else 0
+        self.env[node.name] = [zero] * node.size if node.size is not None else zero
+
+    def visit_Assign(self, node):
+        self.env[node.name] = self.to(self.types[node.name], self.visit(node.value))
+
+    def visit_IndexAssign(self, node):
+        arr, i = self.element(node.name, node.index)
+        value = self.to(self.types[node.name], self.visit(node.value))
+        if type(value) is int and not INT64[0] <= value < INT64[1]:
+            raise Failed(f"{value} does not fit in an array element")
+        arr[i] = value
+
+    def visit_Print(self, node):
+        self.output.append(self.visit(node.value))
+
+    def visit_If(self, node):
+        if self.visit(node.cond) != 0:
+            self.run(node.then_body)
+        elif node.else_body is not None:
+            self.run(node.else_body)
+
+    def visit_While(self, node):
+        while self.visit(node.cond) != 0:
+            self.run(node.body)
+
+    # --- Expressions ---
+    def visit_Num(self, node):
+        return node.value
+
+    def visit_Var(self, node):
+        return self.env[node.name]
+
+    def visit_Index(self, node):
+        arr, i = self.element(node.name, node.index)
+        return arr[i]
+
+    def visit_BinOp(self, node):
+        a, b = self.visit(node.left), self.visit(node.right)
+        if type(a) is not type(b):
+            a, b = self.to('float', a), self.to('float', b)
+        op = node.op
+        if op in REL_OPS:
+            return int({'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b,
+                        '==': a == b, '!=': a != b}[op])
+        if op in '/%' and b == 0:
+            raise Failed("division by zero")
+        if op == '+':
+            return a + b
+        if op == '-':
+            return a - b
+        if op == '*':
+            return a * b
+        if type(a) is float:
+            return a / b if op == '/' else math.fmod(a, b)
+        # C truncates toward zero, and the remainder takes the dividend's sign
+        q = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        return q if op == '/' else a - q * b
+
+
+def _typed(values):
+    return [(type(v).__name__, 'nan' if v != v else v) for v in values]
+
+
+def _run(engine):
+    try:
+        return _typed(engine())
+    except ExecutionError:
+        return 'error'
+    except Exception as e:          # a Python error escaping an engine is a bug
+        return f"crash {e!r}"
+
+
+def engines(result):
+    ic, asm = result.ic, result.asm
+    return {
+        'naive': lambda: NaiveInterpreter(ic).run().output,
+        'closure': lambda: ClosureInterpreter(ic).run().output,
+        'python': lambda: run_program(ic).output,
+        'vm': lambda: VM(assemble(asm)).run().output,
+    }
+
+
+# --- Fixed checks ---
+CONVERSION_CASES = [
+    # source, ops expected in the -O0 IC, mnemonics expected in the assembly
+    ("int i; float f; i = 7; f = i + 0.5; print(f);", ['itof'], ['ITOF', 'FADD']),
+    ("int i; float f; f = 2.75; i = f; print(i);", ['ftoi'], ['FTOI']),
+    ("int i; int j; i = 7; j = 2; print(i / j); print(i % j);", [], ['IDIV', 'IMOD']),
+    ("float f; float g; f = 7; g = 2; print(f / g); print(f % g);", [], ['FDIV', 'FMOD']),
+    ("int i; float f; i = 7; f = 2; print(i < f);", ['itof'], ['SLT']),
+    ("int a[2]; float x; x = 2.5; a[1] = x; print(a[1]);", ['ftoi'], ['FTOI']),
+]
+
+
+def check_conversions(session):
+    """Messages for every fixed case the IC or the assembly gets wrong."""
+    failures = []
+    for source, want_ops, want_asm in CONVERSION_CASES:
+        result = session.compile(source)
+        if result.errors:
+            failures.append(f"{source}\n    {result.errors}")
+            continue
+        ops = [row[0] for row in result.ic.rows()]
+        mnemonics = {line.split()[0] for line in result.asm.splitlines()
+                     if line.startswith('    ')}
+        for op in ('itof', 'ftoi'):
+            if (op in ops) != (op in want_ops):
+                problem = 'missing from' if op in want_ops else 'unexpected in'
+                failures.append(f"{source}\n    {op} {problem} the IC")
+        for m in want_asm:
+            if m not in mnemonics:
+                failures.append(f"{source}\n    {m} missing from the assembly")
+        if 'DIV' in mnemonics or 'MOD' in mnemonics:
+            failures.append(f"{source}\n    untyped DIV/MOD in the assembly")
+    # 'x = 1' into a float keeps a float: the constant is converted in place
+    result = session.compile("float x; x = 1; print(x / 2);")
+    if result.ic.quad(0).arg1 != 1.0 or type(result.ic.quad(0).arg1) is not float:
+        failures.append("float x; x = 1;\n    constant not converted to 1.0")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument('--seeds', type=int, default=300, help="programs to generate")
+    ap.add_argument('--start', type=int, default=0, help="first seed")
+    ap.add_argument('--size', type=int, default=6, help="top-level statements per program")
+    args = ap.parse_args()
+
+    sessions = {level: CompilerSession(opt_level=level) for level in (0, 1, 2)}
+    failures = check_conversions(sessions[0])
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        return 1
+    print(f"conversions: {len(CONVERSION_CASES) + 1} cases ok")
+
+    checked = errors = skipped = 0
+    for seed in range(args.start, args.start + args.seeds):
+        source = mixed_types(args.size, seed)
+        first = sessions[0].compile(source)
+        if first.errors:
+            print(f"seed {seed}: generated program does not compile: {first.errors[0]}")
+            return 1
+        ref = Reference({s.name: s.type for s in first.symtab.symbols})
+        try:
+            ref.visit(first.ast)
+            expect = _typed(ref.output)
+        except TooLong:
+            skipped += 1
+            continue
+        except Failed:
+            expect = 'error'
+        for level, session in sessions.items():
+            for name, engine in engines(session.compile(source)).items():
+                got = _run(engine)
+                if got != expect:
+                    print(f"MISMATCH seed {seed} -O{level} {name}\n{source}"
+                          f"expected {expect}\ngot      {got}")
+                    return 1
+        checked += 1
+        errors += expect == 'error'
+    print(f"programs: {checked} ok on 4 engines x 3 levels "
+          f"({errors} fail at run time as expected, {skipped} skipped as too long)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
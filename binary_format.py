@@ -0,0 +1,248 @@
+"""
+Versioned binary files for intermediate code and assembled programs.
+
+Every file is laid out as
+
+    header      32 bytes: magic, format version, kind, section counts
+    strings     (n_strings + 1) u32 offsets, then the UTF-8 bytes, padded to 8
+    constants   n_consts x 16 bytes: tag u32, aux u32, 8-byte payload
+    records     n_records x 16 bytes: four little-endian i32
+    pairs       n_pairs x 12 bytes: kind u32, string u32, value u32
+
+An IC file holds one (op, arg1, arg2, res) record per quad in
+IntermediateCode's own operand encoding, its interned operands as
+constants and the opcode names as pairs.  A program file holds the
+assembler's decoded (opcode, a, b, c) instructions, the initial register
+file as constants and the register and label names as pairs.
+
+Loading maps the file with mmap.  The IC columns and the program's
+instruction columns are strided memoryviews over the records, which the
+passes and the VM index directly; nothing is parsed per record.  A
+loaded IC is read-only until ic.detach(), which every pass calls first.
+
+    python binary_format.py program.mc out     # writes out.icb and out.vmb
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+import intermediate_code
+from intermediate_code import IntermediateCode
+from vm import Program
+
+MAGIC = b'MCBF'
+FORMAT_VERSION = 1
+KIND_IC, KIND_PROGRAM = 1, 2
+
+HEADER = struct.Struct('<4sHHIIIIII')   # magic, version, kind, n_records, n_consts,
+                                        # n_strings, n_pairs, aux1, aux2
+CONST = struct.Struct('<II8s')
+RECORD_WIDTH = 16
+PAIR = struct.Struct('<III')
+
+# constant tags
+STR, INT, FLOAT, BIGINT, NONE = range(5)
+# pair kinds
+PAIR_OP, PAIR_REGISTER, PAIR_LABEL = 1, 2, 3
+
+_NATIVE = sys.byteorder == 'little' and array('i').itemsize == 4
+
+
+class FormatError(Exception):
+    pass
+
+
+# --- Writing ---
+class _Strings:
+    def __init__(self):
+        self.ids = {}
+        self.items = []
+
+    def add(self, s):
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.items)
+            self.items.append(s)
+        return i
+
+    def pack(self):
+        blobs = [s.encode('utf-8') for s in self.items]
+        offsets = array('I', [0])
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        data = b''.join(blobs)
+        return _le(offsets) + data + b'\0' * (-len(data) % 8)
+
+
+def _le(arr):
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _pack_const(value, strings):
+    if value is None:
+        return CONST.pack(NONE, 0, bytes(8))
+    if isinstance(value, str):
+        return CONST.pack(STR, strings.add(value), bytes(8))
+    if isinstance(value, float):
+        return CONST.pack(FLOAT, 0, struct.pack('<d', value))
+    if isinstance(value, int):
+        if -2**63 <= value < 2**63:
+            return CONST.pack(INT, 0, struct.pack('<q', value))
+        return CONST.pack(BIGINT, strings.add(str(value)), bytes(8))
+    raise FormatError(f"Cannot store constant {value!r}")
+
+
+def _write(path, kind, records, consts, pairs, strings, aux=(0, 0)):
+    """records: flat array('i') of 4 ints per record."""
+    const_bytes = b''.join(_pack_const(v, strings) for v in consts)
+    pair_bytes = b''.join(PAIR.pack(k, strings.add(s), v) for k, s, v in pairs)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, kind, len(records) // 4, len(consts),
+                         len(strings.items), len(pairs), *aux)
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(strings.pack())
+        f.write(const_bytes)
+        f.write(_le(records))
+        f.write(pair_bytes)
+
+
+def save_ic(ic, path):
+    # interleave the four columns into records
+    records = array('i', bytes(RECORD_WIDTH * len(ic)))
+    for k, column in enumerate((ic.ops, ic.a1, ic.a2, ic.rs)):
+        records[k::4] = array('i', column)
+    pairs = [(PAIR_OP, name, code) for code, name in enumerate(intermediate_code.OPS)]
+    _write(path, KIND_IC, records, ic.values, pairs, _Strings(),
+           (ic.temp_count, ic.label_count))
+
+
+def save_program(program, path):
+    records = array('i', bytes(RECORD_WIDTH * len(program)))
+    for k, column in enumerate((program.ops, program.a, program.b, program.c)):
+        records[k::4] = array('i', column)
+    pairs = ([(PAIR_REGISTER, name, slot) for name, slot in program.regnames.items()]
+             + [(PAIR_LABEL, name, index) for name, index in program.labels.items()])
+    _write(path, KIND_PROGRAM, records, program.slots, pairs, _Strings())
+
+
+# --- Reading ---
+class _Image:
+    """The sections of a mapped file, as memoryviews."""
+
+    def __init__(self, path, kind):
+        with open(path, 'rb') as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise FormatError(f"{path}: empty file") from None
+        view = memoryview(self.map)
+        if len(view) < HEADER.size:
+            raise FormatError(f"{path}: truncated header")
+        (magic, version, file_kind, self.n_records, n_consts, n_strings,
+         n_pairs, *self.aux) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise FormatError(f"{path}: not a Mini-Compiler binary")
+        if version > FORMAT_VERSION:
+            raise FormatError(f"{path}: format version {version} is newer than {FORMAT_VERSION}")
+        if file_kind != kind:
+            raise FormatError(f"{path}: wrong kind of file ({file_kind}, expected {kind})")
+
+        pos = HEADER.size
+        offsets = self._ints(view, pos, n_strings + 1, 'I')
+        pos += 4 * (n_strings + 1)
+        data = view[pos:pos + offsets[-1]]
+        self.strings = [str(data[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(n_strings)]
+        pos += offsets[-1] + (-offsets[-1] % 8)
+
+        self.consts = [self._const(view, pos + i * CONST.size) for i in range(n_consts)]
+        pos += n_consts * CONST.size
+        self.records = self._ints(view, pos, 4 * self.n_records, 'i')
+        pos += self.n_records * RECORD_WIDTH
+        self.pairs = [PAIR.unpack_from(view, pos + i * PAIR.size) for i in range(n_pairs)]
+        if pos + n_pairs * PAIR.size > len(view):
+            raise FormatError(f"{path}: truncated file")
+
+    @staticmethod
+    def _ints(view, pos, count, typecode):
+        part = view[pos:pos + 4 * count]
+        if len(part) != 4 * count:
+            raise FormatError("truncated section")
+        if _NATIVE:
+            return part.cast(typecode)      # zero-copy
+        arr = array(typecode, part.tobytes())
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        return arr
+
+    def _const(self, view, pos):
+        tag, aux, payload = CONST.unpack_from(view, pos)
+        if tag == STR:
+            return self.strings[aux]
+        if tag == INT:
+            return struct.unpack('<q', payload)[0]
+        if tag == FLOAT:
+            return struct.unpack('<d', payload)[0]
+        if tag == BIGINT:
+            return int(self.strings[aux])
+        if tag == NONE:
+            return None
+        raise FormatError(f"Unknown constant tag {tag}")
+
+
+def load_ic(path):
+    img = _Image(path, KIND_IC)
+    ic = IntermediateCode()
+    ic.values = img.consts
+    ic._value_ids = {(v if type(v) is str else (type(v), v)): i << 2
+                     for i, v in enumerate(img.consts)}
+    ic.temp_count, ic.label_count = img.aux
+    rec = img.records
+    ops = rec[0::4]
+    # opcode numbers past the built-in ones depend on the order ops were
+    # first emitted in the writing process; remap if the tables differ
+    names = {code: img.strings[s] for kind, s, code in img.pairs if kind == PAIR_OP}
+    current = intermediate_code.OPS
+    if any(code >= len(current) or current[code] != name for code, name in names.items()):
+        ops = array('B', (intermediate_code._op_code(names[c]) for c in ops))
+    ic.ops, ic.a1, ic.a2, ic.rs = ops, rec[1::4], rec[2::4], rec[3::4]
+    return ic
+
+
+def load_program(path):
+    img = _Image(path, KIND_PROGRAM)
+    rec = img.records
+    regnames, labels = {}, {}
+    for kind, s, value in img.pairs:
+        (regnames if kind == PAIR_REGISTER else labels)[img.strings[s]] = value
+    return Program([rec[k::4] for k in range(4)], img.consts, regnames, labels)
+
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python binary_format.py program.mc out", file=sys.stderr)
+        return 2
+    from session import CompilerSession
+    from vm import assemble
+    with open(argv[0], encoding='utf-8') as f:
+        result = CompilerSession().compile(f.read())
+    if result.errors:
+        for e in result.errors:
+            print(e, file=sys.stderr)
+        return 1
+    save_ic(result.ic, argv[1] + '.icb')
+    save_program(assemble(result.asm), argv[1] + '.vmb')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
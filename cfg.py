@@ -0,0 +1,242 @@
+"""
+Control-flow graph over IntermediateCode.code.
+
+build_cfg() splits the quads into basic blocks (a new block starts at
+every label and after every goto/if_false/if_true), links successors and
+predecessors, and keeps each block's fallthrough successor so the graph
+can be turned back into a quad list with linearize().  Dominators use
+the iterative algorithm of Cooper, Harvey and Kennedy over reverse
+postorder, and natural loops are found from back edges (an edge whose
+target dominates its source).  Everything is linear or near-linear in
+the number of quads.
+"""
+
+
+class BasicBlock:
+    __slots__ = ('id', 'label', 'quads', 'succs', 'preds', 'fallthrough')
+
+    def __init__(self, id, quads):
+        self.id = id
+        self.quads = quads
+        first = quads[0] if quads else None
+        self.label = (first.get('res') or first.get('arg1')) if first and first['op'] == 'label' else None
+        self.succs = []
+        self.preds = []
+        self.fallthrough = None     # block reached when the last quad does not jump
+
+    @property
+    def terminator(self):
+        if self.quads and self.quads[-1]['op'] in ('goto', 'if_false', 'if_true'):
+            return self.quads[-1]
+        return None
+
+    def __repr__(self):
+        return f"<BasicBlock {self.id} {self.label or ''} {len(self.quads)} quads>"
+
+
+class Loop:
+    __slots__ = ('header', 'blocks', 'latches', 'parent')
+
+    def __init__(self, header, blocks, latches):
+        self.header = header        # block id
+        self.blocks = blocks        # set of block ids, header included
+        self.latches = latches      # blocks with a back edge to the header
+        self.parent = None          # innermost enclosing Loop
+
+    @property
+    def depth(self):
+        d, p = 1, self.parent
+        while p is not None:
+            d, p = d + 1, p.parent
+        return d
+
+
+class CFG:
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.label_block = {b.label: b.id for b in blocks if b.label is not None}
+        self._idom = None
+        self._dom_span = None
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    # --- Orders ---
+    def rpo(self):
+        """Block ids reachable from the entry, in reverse postorder."""
+        if not self.blocks:
+            return []
+        seen = [False] * len(self.blocks)
+        post = []
+        stack = [(0, iter(self.blocks[0].succs))]
+        seen[0] = True
+        while stack:
+            node, it = stack[-1]
+            for s in it:
+                if not seen[s]:
+                    seen[s] = True
+                    stack.append((s, iter(self.blocks[s].succs)))
+                    break
+            else:
+                stack.pop()
+                post.append(node)
+        post.reverse()
+        return post
+
+    # --- Dominators ---
+    def dominators(self):
+        """Immediate dominator per block id (None for the entry and unreachable blocks)."""
+        if self._idom is not None:
+            return self._idom
+        order = self.rpo()
+        index = {b: i for i, b in enumerate(order)}
+        idom = [None] * len(self.blocks)
+        if not order:
+            self._idom = idom
+            return idom
+        idom[0] = 0
+
+        def intersect(a, b):
+            while a != b:
+                while index[a] > index[b]:
+                    a = idom[a]
+                while index[b] > index[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for b in order[1:]:
+                new = None
+                for p in self.blocks[b].preds:
+                    if idom[p] is None:
+                        continue
+                    new = p if new is None else intersect(p, new)
+                if new is not None and idom[b] != new:
+                    idom[b] = new
+                    changed = True
+        idom[0] = None
+        self._idom = idom
+        return idom
+
+    def dominates(self, a, b):
+        """True if block a dominates block b (O(1) after the first call)."""
+        if self._dom_span is None:
+            idom = self.dominators()
+            children = [[] for _ in self.blocks]
+            for b_id, d in enumerate(idom):
+                if d is not None:
+                    children[d].append(b_id)
+            # pre/post numbering of the dominator tree
+            enter = [-1] * len(self.blocks)
+            leave = [-1] * len(self.blocks)
+            clock = 0
+            stack = [(0, iter(children[0]))] if self.blocks else []
+            if self.blocks:
+                enter[0] = clock
+                clock += 1
+            while stack:
+                node, it = stack[-1]
+                child = next(it, None)
+                if child is None:
+                    leave[node] = clock
+                    clock += 1
+                    stack.pop()
+                else:
+                    enter[child] = clock
+                    clock += 1
+                    stack.append((child, iter(children[child])))
+            self._dom_span = (enter, leave)
+        enter, leave = self._dom_span
+        if enter[a] < 0 or enter[b] < 0:
+            return False
+        return enter[a] <= enter[b] and leave[b] <= leave[a]
+
+    # --- Loops ---
+    def loops(self):
+        """Natural loops, outermost first; loops sharing a header are merged."""
+        by_header = {}
+        for b in self.rpo():
+            for s in self.blocks[b].succs:
+                if self.dominates(s, b):
+                    by_header.setdefault(s, []).append(b)
+
+        found = []
+        for header, latches in by_header.items():
+            body = {header}
+            work = [l for l in latches if l != header]
+            body.update(work)
+            while work:
+                n = work.pop()
+                for p in self.blocks[n].preds:
+                    if p not in body and self.dominates(header, p):
+                        body.add(p)
+                        work.append(p)
+            found.append(Loop(header, body, latches))
+
+        found.sort(key=lambda l: len(l.blocks), reverse=True)
+        for i, inner in enumerate(found):
+            for outer in reversed(found[:i]):
+                if inner.header in outer.blocks and inner is not outer:
+                    inner.parent = outer
+                    break
+        return found
+
+    # --- Back to quads ---
+    def linearize(self, order=None):
+        """
+        Quad list for the blocks in the given order (default: block id order).
+        A goto is added wherever a block's fallthrough successor does not
+        come next.
+        """
+        order = list(range(len(self.blocks))) if order is None else order
+        code = []
+        for pos, b in enumerate(order):
+            block = self.blocks[b]
+            code.extend(block.quads)
+            ft = block.fallthrough
+            nxt = order[pos + 1] if pos + 1 < len(order) else None
+            if ft is not None and ft != nxt:
+                target = self.blocks[ft]
+                if target.label is None:
+                    raise ValueError(f"Block {ft} needs a label to be jumped to")
+                code.append({'op': 'goto', 'arg1': '', 'arg2': '', 'res': target.label})
+        return code
+
+
+def build_cfg(code):
+    """Split a quad list into basic blocks and link them."""
+    blocks = []
+    current = []
+    for q in code:
+        op = q['op']
+        if op == 'label' and current:
+            blocks.append(current)
+            current = []
+        current.append(q)
+        if op in ('goto', 'if_false', 'if_true'):
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+
+    blocks = [BasicBlock(i, quads) for i, quads in enumerate(blocks)]
+    cfg = CFG(blocks)
+    for b in blocks:
+        term = b.terminator
+        targets = []
+        if term is not None:
+            label = term.get('res') or term.get('arg1')
+            if label not in cfg.label_block:
+                raise ValueError(f"Undefined label '{label}'")
+            targets.append(cfg.label_block[label])
+        if (term is None or term['op'] != 'goto') and b.id + 1 < len(blocks):
+            b.fallthrough = b.id + 1
+            targets.append(b.id + 1)
+        for t in targets:
+            if t not in b.succs:
+                b.succs.append(t)
+                blocks[t].preds.append(b.id)
+    return cfg
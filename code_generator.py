@@ -1,74 +1,142 @@
+from ic_types import FLOAT, INT, infer
+from register_allocator import allocate
+
+# arithmetic by operand type (from ic_types.infer); comparisons are untyped
+TYPED_OPS = {
+    ('+', INT): 'IADD', ('-', INT): 'ISUB', ('*', INT): 'IMUL', ('/', INT): 'IDIV', ('%', INT): 'IMOD',
+    ('+', FLOAT): 'FADD', ('-', FLOAT): 'FSUB', ('*', FLOAT): 'FMUL', ('/', FLOAT): 'FDIV',
+    ('%', FLOAT): 'FMOD',
+}
+REL_OPS = {'<': 'SLT', '<=': 'SLE', '>': 'SGT', '>=': 'SGE', '==': 'SEQ', '!=': 'SNE'}
+
+
 class CodeGenerator:
     def __init__(self, ic, symtab):
         self.ic = ic
         self.symtab = symtab
         self.asm = []
         self.regmap = {}         # variable -> register
-        self.regcount = 0
+        self.spilled = set()     # variables kept in memory
         self.max_regs = 8
-        self.TMP_REG = "temp"     
+        self.TMP_REG = "temp"
+        self.TMP_REG2 = "temp2"  # second scratch, needed once values live in memory
+        self.stats = {}
+        self.types = {}          # name -> 'int' or 'float', from ic_types.infer
 
     def get_reg(self, name):
-        """Return a register for a variable or #constant."""
+        """Return the location of a variable or #constant."""
         if name is None:
             return None
         if isinstance(name, (int, float)):
             return f"#{name}"
         if name in self.regmap:
             return self.regmap[name]
-        r = f"R{(self.regcount % self.max_regs) + 1}"
-        self.regcount += 1
-        self.regmap[name] = r
-        return r
+        return f"[{name}]"
+
+    def _read(self, name, scratch, allow_imm=False):
+        """Operand holding name's value; spilled values are loaded into scratch."""
+        loc = self.get_reg(name)
+        if loc.startswith('['):
+            self.asm.append(f"    LOAD {scratch}, {loc}")
+            self.stats['loads'] += 1
+            return scratch
+        if loc.startswith('#') and not allow_imm:
+            self.asm.append(f"    MOV {scratch}, {loc}")
+            return scratch
+        return loc
+
+    def _type(self, x):
+        if isinstance(x, (int, float)):
+            return FLOAT if type(x) is float else INT
+        return self.types.get(x, INT)
+
+    def _store(self, name, reg):
+        self.asm.append(f"    STORE [{name}], {reg}")
+        self.stats['stores'] += 1
 
     def generate(self):
         self.asm = []
         self.asm.append("\n; --- CODE ---")
 
-        for inst in self.ic.code:
-            op = inst.get('op')
-            a1 = inst.get('arg1')
-            a2 = inst.get('arg2')
-            res = inst.get('res')
+        alloc = allocate(self.ic.code, self.max_regs)
+        self.types = infer(self.ic)
+        self.regmap = alloc.regmap
+        self.spilled = alloc.spilled
+        self.stats = {
+            'max_live': alloc.max_live,
+            'registers_used': len(set(alloc.regmap.values())),
+            'max_regs': self.max_regs,
+            'spilled': sorted(alloc.spilled, key=str),
+            'loads': 0,
+            'stores': 0,
+        }
+
+        for op, a1, a2, res in self.ic.rows():
 
             # --- assignment ---
             if op == '=':
-                dest = self.get_reg(res)
-                src = self.get_reg(a1)
-                self.asm.append(f"    MOV {dest}, {src}")
-
-            # --- binary arithmetic ---
-            elif op in ['+', '-', '*', '/', '%']:
-                opmap = {'+':'ADD', '-':'SUB', '*':'MUL', '/':'DIV', '%':'MOD'}
-                asm_op = opmap[op]
-
-                left = a1
-                right = a2
-                dest = self.get_reg(res)
-
-                r_left = self.get_reg(left)
-                r_right = self.get_reg(right)
-
-                # If right is immediate, load into TMP_REG
-                if isinstance(r_right, str) and r_right.startswith("#"):
-                    r_right_use = self.TMP_REG
-                    self.asm.append(f"    MOV {self.TMP_REG}, {r_right}")
+                if res in self.spilled:
+                    src = self._read(a1, self.TMP_REG)
+                    self._store(res, src)
+                else:
+                    src = self._read(a1, self.get_reg(res), allow_imm=True)
+                    if src != self.get_reg(res):
+                        self.asm.append(f"    MOV {self.get_reg(res)}, {src}")
+
+            # --- binary arithmetic & comparisons ---
+            elif op in ['+', '-', '*', '/', '%', '<', '<=', '>', '>=', '==', '!=']:
+                # comparisons set dest to 1 or 0; arithmetic is float if either operand is
+                if op in REL_OPS:
+                    asm_op = REL_OPS[op]
                 else:
-                    r_right_use = r_right
+                    kind = FLOAT if FLOAT in (self._type(a1), self._type(a2)) else INT
+                    asm_op = TYPED_OPS[op, kind]
+
+                # A spilled result is computed in the second scratch register,
+                # as is one that would overwrite its own right operand.
+                in_scratch = res in self.spilled or (a2 == res and a1 != res)
+                dest = self.TMP_REG2 if in_scratch else self.get_reg(res)
 
-                # Operate in-place on left if possible
+                # If right is immediate or in memory, load it into TMP_REG
+                r_right = self._read(a2, self.TMP_REG)
+
+                # Operate in-place on dest: MOV dest, left / OP dest, right
+                r_left = self._read(a1, dest, allow_imm=True)
                 if dest != r_left:
                     self.asm.append(f"    MOV {dest}, {r_left}")
-                self.asm.append(f"    {asm_op} {dest}, {r_right_use}")
+                self.asm.append(f"    {asm_op} {dest}, {r_right}")
+                if res in self.spilled:
+                    self._store(res, dest)
+                elif in_scratch:
+                    self.asm.append(f"    MOV {self.get_reg(res)}, {dest}")
+
+            # --- int <-> float ---
+            elif op in ('itof', 'ftoi'):
+                dest = self.TMP_REG2 if res in self.spilled else self.get_reg(res)
+                src = self._read(a1, self.TMP_REG, allow_imm=True)
+                self.asm.append(f"    {op.upper()} {dest}, {src}")
+                if res in self.spilled:
+                    self._store(res, dest)
+
+            # --- arrays: always in memory, addressed as [name] ---
+            elif op == 'array':
+                size = self._read(a1, self.TMP_REG, allow_imm=True)
+                self.asm.append(f"    ALLOC [{res}], {size}, {self.get_reg(a2)}")
+            elif op == '=[]':
+                dest = self.TMP_REG2 if res in self.spilled else self.get_reg(res)
+                index = self._read(a2, self.TMP_REG, allow_imm=True)
+                self.asm.append(f"    LDX {dest}, [{a1}], {index}")
+                if res in self.spilled:
+                    self._store(res, dest)
+            elif op == '[]=':
+                index = self._read(a2, self.TMP_REG, allow_imm=True)
+                value = self._read(a1, self.TMP_REG2, allow_imm=True)
+                self.asm.append(f"    STX [{res}], {index}, {value}")
 
             # --- print ---
             elif op == 'print':
-                r = self.get_reg(a1)
-                if isinstance(r, str) and r.startswith("#"):
-                    self.asm.append(f"    MOV {self.TMP_REG}, {r}")
-                    self.asm.append(f"    OUT {self.TMP_REG}")
-                else:
-                    self.asm.append(f"    OUT {r}")
+                r = self._read(a1, self.TMP_REG)
+                self.asm.append(f"    OUT {r}")
 
             # --- labels & jumps ---
             elif op == 'label':
@@ -77,15 +145,10 @@ class CodeGenerator:
             elif op == 'goto':
                 lbl = res or a1
                 self.asm.append(f"    JMP {lbl}")
-            elif op == 'if_false':
-                cond_reg = self.get_reg(a1)
-                if isinstance(cond_reg, str) and cond_reg.startswith("#"):
-                    self.asm.append(f"    MOV {self.TMP_REG}, {cond_reg}")
-                    cond_reg_use = self.TMP_REG
-                else:
-                    cond_reg_use = cond_reg
-                self.asm.append(f"    CMP {cond_reg_use}, 0")
-                self.asm.append(f"    JE {res}")
+            elif op in ('if_false', 'if_true'):
+                cond_reg = self._read(a1, self.TMP_REG)
+                self.asm.append(f"    CMP {cond_reg}, 0")
+                self.asm.append(f"    {'JE' if op == 'if_false' else 'JNE'} {res}")
 
             # --- scope ---
             elif op == 'scope_enter':
@@ -95,6 +158,14 @@ class CodeGenerator:
 
             # --- unknown ---
             else:
-                self.asm.append(f"; unknown op {op} {inst}")
+                self.asm.append(f"; unknown op {op} {a1} {a2} {res}")
 
+        self.asm.append(self.report())
         return "\n".join(self.asm)
+
+    def report(self):
+        """Register pressure and spill counts for the last generate() call."""
+        s = self.stats
+        return (f"; registers: {s['registers_used']}/{s['max_regs']} used, "
+                f"max live values {s['max_live']}, "
+                f"{len(s['spilled'])} spilled ({s['loads']} loads, {s['stores']} stores)")
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from session import COMPILER_VERSION, CompileResult
+
+
+class CompileCache:
+    """
+    Content-addressed cache of compile results, keyed by the compiler
+    version, the session's passes and the source.  An in-memory LRU holds
+    up to max_bytes of results; with cache_dir they are also kept on disk.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()   # key -> (result, size)
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(code, variant=''):
+        h = hashlib.sha256()
+        h.update(COMPILER_VERSION.encode())
+        h.update(b'\0')
+        h.update(variant.encode())
+        h.update(b'\0')
+        h.update(code.encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, code, variant=''):
+        """Cached result for this source, or None."""
+        key = self.key(code, variant)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        if self.cache_dir:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    data = f.read()
+                result = CompileResult.from_record(json.loads(data))
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            else:
+                self.disk_hits += 1
+                self._remember(key, result, len(data))
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, code, result, variant=''):
+        key = self.key(code, variant)
+        data = json.dumps(result.to_record(), separators=(',', ':')).encode('utf-8')
+        self._remember(key, result, len(data))
+        if self.cache_dir:
+            self._write(key, data)
+
+    def _remember(self, key, result, size):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self.entries[key] = (result, size)
+        self.size += size
+        # The newest entry always stays, even if it alone exceeds the limit.
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+    def _write(self, key, data):
+        # Write-then-rename so concurrent workers never see a partial file.
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.size,
+        }
@@ -0,0 +1,107 @@
+"""
+Blocking client for compile_server.py.
+
+    from compile_client import CompileClient
+    with CompileClient() as client:
+        result = client.compile("int x; x = 1; print(x);")
+        results = client.compile_many(sources, opt=2)
+
+One connection is kept open and requests go one at a time, so a script
+pays the socket round trip and the JSON coding per call, not a Python
+start.  From the shell:
+
+    python compile_client.py prog.mc other.mc [-O 2] [--field asm ...]
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Only the standard library is imported here, so a script using the
+# client starts fast; the server takes its default socket from here.
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), 'mini-compiler.sock')
+
+
+class ServerError(Exception):
+    pass
+
+
+class CompileClient:
+    def __init__(self, path=DEFAULT_SOCKET, port=None, timeout=None):
+        if port is not None:
+            sock = socket.create_connection(('127.0.0.1', port), timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            sock.connect(path)
+        self.sock = sock
+        self.file = sock.makefile('rb')
+        self._ids = itertools.count(1)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, **request):
+        """Send one request and return its reply; raises ServerError on an error reply."""
+        request['id'] = next(self._ids)
+        self.sock.sendall(json.dumps(request, separators=(',', ':')).encode('utf-8') + b'\n')
+        line = self.file.readline()
+        if not line:
+            raise ServerError("the server closed the connection")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise ServerError(reply['error'])
+        return reply
+
+    def ping(self):
+        return self.request(op='ping')
+
+    def compile(self, source, opt=0, fields=None):
+        """The compile of one source as a dict: tokens, symbols, ic, asm and errors by default."""
+        extra = {'fields': list(fields)} if fields is not None else {}
+        return self.request(source=source, opt=opt, **extra)['result']
+
+    def compile_many(self, sources, opt=0, fields=None):
+        """compile() for each source, done in parallel on the server; results in order."""
+        extra = {'fields': list(fields)} if fields is not None else {}
+        return self.request(sources=list(sources), opt=opt, **extra)['results']
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compile files on a running compile server.")
+    ap.add_argument('paths', nargs='+', help="source files")
+    ap.add_argument('--socket', default=DEFAULT_SOCKET, help="server socket path")
+    ap.add_argument('--port', type=int, help="server port on 127.0.0.1 instead of a socket")
+    ap.add_argument('-O', dest='opt', type=int, default=0, help="optimization level")
+    ap.add_argument('--field', action='append', dest='fields',
+                    help="result field to print (repeatable; default: all the server sends)")
+    args = ap.parse_args(argv)
+
+    sources = []
+    for path in args.paths:
+        with open(path, encoding='utf-8') as f:
+            sources.append(f.read())
+    try:
+        with CompileClient(args.socket, args.port) as client:
+            results = client.compile_many(sources, args.opt, args.fields)
+    except (OSError, ServerError) as e:
+        print(f"compile server: {e}", file=sys.stderr)
+        return 2
+    json.dump(dict(zip(args.paths, results)), sys.stdout, indent=2)
+    print()
+    return 1 if any(r.get('errors') for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
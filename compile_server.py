@@ -0,0 +1,238 @@
+"""
+Long-lived compile server.
+
+Tools that compile many programs can keep one server running instead of
+starting Python, importing PLY and building the LALR tables for every
+program.  The server listens on a Unix domain socket (or on a localhost
+TCP port) with asyncio.  Compiles run on its own compile thread or on a
+pool of worker processes; each builds its sessions once, as batch.py's
+workers do.
+
+The protocol is one JSON object per line each way.  Requests:
+
+    {"id": 1, "source": "int x; ..."}                   one program
+    {"id": 2, "sources": ["...", "..."]}                a batch, compiled in parallel
+    {"id": 3, "op": "ping"}
+
+with optional "opt" (optimization level, default 0) and "fields" (what
+to send back; default tokens, symbols, ic, asm and errors, and any other
+key of CompileResult.to_record() may be asked for).  A reply carries the
+request's id and either "result" (or "results" for a batch, in order) or
+"error".  Requests on one connection may be pipelined; replies can come
+back out of order, so match them up by id.  compile_client.py is a
+blocking client for scripts.
+
+    python compile_server.py [--socket PATH | --port N] [-j WORKERS] [--cache-dir DIR]
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from compile_cache import CompileCache
+from compile_client import DEFAULT_SOCKET
+from optimizer import LEVELS
+from session import COMPILER_VERSION, CompilerSession
+
+DEFAULT_FIELDS = ('tokens', 'symbols', 'ic', 'asm', 'errors')
+KNOWN_FIELDS = set(DEFAULT_FIELDS) | {'lex_errors', 'parse_errors', 'scopes', 'opt_report',
+                                      'peephole', 'ast'}
+LINE_LIMIT = 1 << 28        # longest request line the server reads
+INLINE_LIMIT = 2048         # longest single source compiled on the server's own thread
+
+
+class RequestError(Exception):
+    pass
+
+
+# One session per optimization level in each worker, built on first use;
+# the initializer builds the -O0 one so a fresh worker is ready at once.
+_sessions = {}
+_cache_dir = None
+
+
+def _init_worker(cache_dir=None):
+    global _cache_dir
+    _cache_dir = cache_dir
+    _session(0)
+
+
+def _session(opt_level):
+    session = _sessions.get(opt_level)
+    if session is None:
+        cache = CompileCache(cache_dir=_cache_dir) if _cache_dir else None
+        session = _sessions[opt_level] = CompilerSession(cache=cache, opt_level=opt_level)
+    return session
+
+
+def _ready():
+    return os.getpid()
+
+
+def compile_source(source, opt_level=0, fields=DEFAULT_FIELDS):
+    """Compile one program inside a worker; returns the requested fields as plain data."""
+    rec = _session(opt_level).compile(source).to_record()
+    rec['errors'] = rec['lex_errors'] + rec['parse_errors']
+    return {name: rec[name] for name in fields}
+
+
+class CompileServer:
+    """
+    A single small program is compiled on the server's compile thread: the
+    round trip to a worker process would cost more than the compile.
+    Larger programs and the programs of a batch go to the process pool.
+    With workers=0 everything is compiled on the thread.  There is one
+    thread because the sessions are not thread-safe; the event loop stays
+    free to answer other connections meanwhile.
+    """
+
+    def __init__(self, workers=None, cache_dir=None):
+        _init_worker(cache_dir)
+        self.thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='compile')
+        if workers == 0:
+            self.workers = 0
+            self.pool = None
+        else:
+            self.workers = workers or os.cpu_count() or 1
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_init_worker, initargs=(cache_dir,))
+        self.requests = 0
+
+    async def warm_up(self):
+        """Start every worker now rather than on the first requests."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready)
+                               for _ in range(self.workers)))
+
+    async def _compile(self, source, opt_level, fields, batch=False):
+        loop = asyncio.get_running_loop()
+        if self.pool is None or (not batch and len(source) <= INLINE_LIMIT):
+            executor = self.thread
+        else:
+            executor = self.pool
+        return await loop.run_in_executor(executor, compile_source, source, opt_level, fields)
+
+    async def handle(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # pipelined requests run side by side; the replies say whose they are
+                task = asyncio.create_task(self._reply(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _reply(self, line, writer):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request is a JSON object")
+        except ValueError as e:
+            reply = {'id': None, 'error': f"Bad request: {e}"}
+        else:
+            reply = {'id': request.get('id')}
+            try:
+                reply.update(await self.run(request))
+            except RequestError as e:
+                reply['error'] = f"Bad request: {e}"
+            except Exception as e:      # a compile that blew up in a worker
+                reply['error'] = f"Compile failed: {e!r}"
+        writer.write(json.dumps(reply, separators=(',', ':')).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def run(self, request):
+        op = request.get('op', 'compile')
+        if op == 'ping':
+            return {'ok': True, 'version': COMPILER_VERSION, 'requests': self.requests}
+        if op != 'compile':
+            raise RequestError(f"unknown op {op!r}")
+
+        opt_level = request.get('opt', 0)
+        if type(opt_level) is not int or opt_level not in LEVELS:
+            raise RequestError(f"no optimization level {opt_level!r}")
+        fields = request.get('fields', DEFAULT_FIELDS)
+        if fields is not DEFAULT_FIELDS and (not isinstance(fields, list)
+                                             or not all(isinstance(f, str) for f in fields)):
+            raise RequestError("fields must be a list of strings")
+        fields = tuple(fields)
+        unknown = set(fields) - KNOWN_FIELDS
+        if unknown:
+            raise RequestError(f"unknown fields {sorted(unknown)}")
+
+        if 'sources' in request:
+            sources = request['sources']
+            if not isinstance(sources, list) or not all(isinstance(s, str) for s in sources):
+                raise RequestError("sources must be a list of strings")
+            self.requests += len(sources)
+            results = await asyncio.gather(*(self._compile(s, opt_level, fields, batch=True)
+                                             for s in sources))
+            return {'results': results}
+        source = request.get('source')
+        if not isinstance(source, str):
+            raise RequestError("source must be a string")
+        self.requests += 1
+        return {'result': await self._compile(source, opt_level, fields)}
+
+    async def serve(self, path=None, port=None):
+        await self.warm_up()
+        if port is not None:
+            server = await asyncio.start_server(self.handle, '127.0.0.1', port, limit=LINE_LIMIT)
+            where = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        else:
+            if os.path.exists(path):
+                os.unlink(path)             # left behind by a server that did not shut down
+            server = await asyncio.start_unix_server(self.handle, path, limit=LINE_LIMIT)
+            where = path
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(f"Compile server listening on {where}", flush=True)
+        async with server:
+            await stop.wait()
+        if port is None and os.path.exists(path):
+            os.unlink(path)
+        self.thread.shutdown(cancel_futures=True)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve compiles over a local socket.")
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument('--socket', default=None,
+                       help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    where.add_argument('--port', type=int, help="listen on 127.0.0.1:PORT instead")
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                    help="worker processes (default: all cores; 0 compiles in the server)")
+    ap.add_argument('--cache-dir', help="keep compile results in this directory too")
+    args = ap.parse_args(argv)
+
+    path = args.socket or DEFAULT_SOCKET
+    if args.port is None and not hasattr(socket, 'AF_UNIX'):
+        print("Unix sockets are not available here; use --port.", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(CompileServer(args.jobs, args.cache_dir).serve(path, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
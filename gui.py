@@ -1,10 +1,291 @@
+import queue
+import threading
+import time
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, scrolledtext, messagebox
-from lexer import MiniLexer
-from parser import MiniParser
-from symbol_table import SymbolTable
-from intermediate_code import IntermediateCode
-from code_generator import CodeGenerator
+from incremental import IncrementalSession
+from compile_cache import CompileCache
+
+DEBOUNCE_MS = 300       # quiet time after the last keystroke before a live compile
+POLL_MS = 50            # how often the main loop picks up finished compiles
+
+KEYWORDS = {'INT', 'FLOAT', 'IF', 'ELSE', 'WHILE', 'PRINT',
+            'AUTO', 'BREAK', 'CASE', 'CHAR', 'CONST', 'CONTINUE',
+            'DEFAULT', 'DO', 'DOUBLE', 'ENUM', 'EXTERN', 'FOR',
+            'GOTO', 'LONG', 'REGISTER', 'RETURN', 'SHORT', 'SIGNED',
+            'SIZEOF', 'STATIC', 'STRUCT', 'SWITCH', 'TYPEDEF',
+            'UNION', 'UNSIGNED', 'VOID', 'VOLATILE'}
+
+
+def token_category(tok):
+    if tok.type in KEYWORDS:
+        return 'Keyword'
+    elif tok.type == 'ID':
+        return 'Identifier'
+    elif tok.type in ['NUMBER']:
+        return 'Constant'
+    elif tok.type in ['STRING']:
+        return 'Literal'
+    elif tok.type in ['PLUS', 'MINUS', 'TIMES', 'DIVIDE', 'MOD', 'ASSIGN',
+                      'LT', 'LE', 'GT', 'GE', 'EQ', 'NE']:
+        return 'Operator'
+    elif tok.type in ['LBRACE', 'RBRACE', 'LPAREN', 'RPAREN', 'RBRACKET', 'LBRACKET']:
+        return 'Parenthesis'
+    elif tok.type in ['SEMICOLON', 'COMMA']:
+        return 'Punctuation'
+    else:
+        return tok.type
+
+
+# --- Row sources ---
+# The output tabs show sequences of rows: len(rows) and rows[i] -> str, with
+# rows formatted only when they come into view.
+
+class LineRows:
+    """Rows that are already strings."""
+
+    def __init__(self, lines, empty=None):
+        self.lines = lines if lines or empty is None else [empty]
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, i):
+        return self.lines[i]
+
+    def row_of_line(self, n):
+        """Row to show for line n (1-based) of the listing."""
+        return n - 1
+
+
+class TokenRows(LineRows):
+    def __init__(self, tokens):
+        super().__init__(tokens, None)
+
+    def __getitem__(self, i):
+        t = self.lines[i]
+        val = t.value if t.type != 'STRING' else f'"{t.value}"'
+        return f"{token_category(t):<12} {val:<20} (line {t.lineno})"
+
+    def row_of_line(self, n):
+        # line n of the source: the first token on or after it
+        tokens = self.lines
+        lo, hi = 0, len(tokens)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tokens[mid].lineno < n:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class ICRows(LineRows):
+    def __init__(self, ic):
+        super().__init__(ic, None)
+
+    def __getitem__(self, i):
+        return self.lines.line(i)
+
+
+def render(result):
+    """Rows of every output tab for a CompileResult."""
+    st = result.symtab
+    symbols = [f"{s['name']:<12} {s['type']:<8} scope:{s['scope']}" for s in st.get_all()]
+    if result.errors:
+        errors = LineRows(list(result.errors))
+    else:
+        errors = LineRows(["No errors detected. The compilation completed successfully."])
+    return {
+        'tokens': TokenRows(result.tokens) if result.tokens else LineRows([], "(no tokens)"),
+        'symbols': LineRows(symbols, "(no symbols)"),
+        'ic': ICRows(result.ic) if len(result.ic) else LineRows([], "(No intermediate code)"),
+        'asm': LineRows(result.asm.splitlines(), "(no assembly)"),
+        'errors': errors,
+    }
+
+
+class ListingView(tk.Frame):
+    """
+    A read-only listing that holds only the rows in view.
+
+    The text widget is refilled from the row source whenever the view
+    moves, so opening a listing costs the same however long it is.  The
+    bar above it finds text (case-insensitive, from the row after the
+    current one, wrapping around) and jumps to a line.
+    """
+
+    def __init__(self, master, font, line_label="Line"):
+        super().__init__(master)
+        self.rows = LineRows([])
+        self.top = 0                # first row in view
+        self.current = None         # row found or jumped to
+        self.linespace = tkfont.Font(font=font).metrics('linespace')
+
+        bar = tk.Frame(self)
+        bar.pack(fill='x')
+        tk.Label(bar, text="Find").pack(side='left')
+        self.find_entry = tk.Entry(bar, width=24)
+        self.find_entry.pack(side='left', padx=4)
+        self.find_entry.bind('<Return>', lambda e: self.find_next())
+        tk.Button(bar, text="Next", command=self.find_next).pack(side='left')
+        tk.Label(bar, text=line_label).pack(side='left', padx=(12, 0))
+        self.line_entry = tk.Entry(bar, width=8)
+        self.line_entry.pack(side='left', padx=4)
+        self.line_entry.bind('<Return>', lambda e: self.jump())
+        tk.Button(bar, text="Go", command=self.jump).pack(side='left')
+        self.position = tk.Label(bar, text="", anchor='e')
+        self.position.pack(side='right')
+
+        body = tk.Frame(self)
+        body.pack(fill='both', expand=True)
+        self.yscroll = tk.Scrollbar(body, orient='vertical', command=self._yview)
+        self.yscroll.pack(side='right', fill='y')
+        self.text = tk.Text(body, font=font, wrap='none', width=70, height=20)
+        xscroll = tk.Scrollbar(self, orient='horizontal', command=self.text.xview)
+        xscroll.pack(fill='x')
+        self.text.configure(xscrollcommand=xscroll.set, state='disabled')
+        self.text.pack(side='left', fill='both', expand=True)
+        self.text.tag_configure('current', background='#ffe66d')
+
+        self.text.bind('<Configure>', lambda e: self._render())
+        self.text.bind('<MouseWheel>', self._wheel)
+        self.text.bind('<Button-4>', lambda e: self._scroll(-3))
+        self.text.bind('<Button-5>', lambda e: self._scroll(3))
+        self.text.bind('<Prior>', lambda e: self._scroll(-self._height()))
+        self.text.bind('<Next>', lambda e: self._scroll(self._height()))
+        self.text.bind('<Control-Home>', lambda e: self._scroll(-len(self.rows)))
+        self.text.bind('<Control-End>', lambda e: self._scroll(len(self.rows)))
+        self.text.bind('<Button-1>', lambda e: self.text.focus_set())
+
+    def show(self, rows):
+        """Swap in a new row source, keeping the scroll position where it can."""
+        self.rows = rows
+        self.current = None
+        self._render()
+
+    def _height(self):
+        return max(1, self.text.winfo_height() // self.linespace)
+
+    def _render(self):
+        n = len(self.rows)
+        height = self._height()
+        self.top = max(0, min(self.top, n - height))
+        end = min(n, self.top + height)
+        text = self.text
+        text.configure(state='normal')
+        text.delete('1.0', tk.END)
+        text.insert('1.0', "\n".join(self.rows[i] for i in range(self.top, end)))
+        if self.current is not None and self.top <= self.current < end:
+            line = self.current - self.top + 1
+            text.tag_add('current', f'{line}.0', f'{line + 1}.0')
+        text.configure(state='disabled')
+        if n:
+            self.yscroll.set(self.top / n, end / n)
+            self.position.config(text=f"{self.top + 1}-{end} of {n}")
+        else:
+            self.yscroll.set(0, 1)
+            self.position.config(text="")
+
+    def _scroll(self, delta):
+        self.top += delta
+        self._render()
+        return 'break'
+
+    def _wheel(self, event):
+        return self._scroll(-3 if event.delta > 0 else 3)
+
+    def _yview(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.rows))
+            self._render()
+        elif args[0] == 'scroll':
+            step = self._height() if args[2] == 'pages' else 1
+            self._scroll(int(args[1]) * step)
+
+    def goto(self, row):
+        """Bring row into view, a third of the way down, and mark it."""
+        self.current = max(0, min(row, len(self.rows) - 1))
+        self.top = self.current - self._height() // 3
+        self._render()
+
+    def find_next(self):
+        needle = self.find_entry.get().lower()
+        rows = self.rows
+        n = len(rows)
+        if not needle or not n:
+            return
+        start = self.current + 1 if self.current is not None else self.top
+        for k in range(n):
+            i = (start + k) % n
+            if needle in rows[i].lower():
+                self.goto(i)
+                return
+        self.position.config(text="not found")
+
+    def jump(self):
+        try:
+            n = int(self.line_entry.get())
+        except ValueError:
+            return
+        if len(self.rows):
+            self.goto(self.rows.row_of_line(n))
+
+
+class CompileWorker(threading.Thread):
+    """
+    Compiles on its own thread so the window stays live.
+
+    submit() queues a source; only the newest one waiting is compiled,
+    keeping the announce and profile requests of the ones it replaces.
+    Rows for the output tabs are built here too, but formatted lazily.
+    A profiled compile also fills the Profile tab, with timings, counters,
+    peak memory and the top cProfile functions.
+    Finished compiles go to self.results as (generation, rows, stats),
+    for the Tk thread to pick up: the worker never touches a widget.
+    """
+
+    def __init__(self, session):
+        super().__init__(daemon=True)
+        self.session = session
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+
+    def submit(self, generation, code, announce, profile=False):
+        self.requests.put((generation, code, announce, profile))
+
+    def run(self):
+        while True:
+            generation, code, announce, profile = self.requests.get()
+            try:
+                while True:
+                    # a newer source replaces this one, but a button press
+                    # (a message box, a profile) still applies to it
+                    generation, code, more_announce, more_profile = self.requests.get_nowait()
+                    announce = announce or more_announce
+                    profile = profile or more_profile
+            except queue.Empty:
+                pass
+            start = time.perf_counter()
+            cache = self.session.cache
+            served = cache.hits + cache.disk_hits if cache else 0
+            if profile:
+                result, prof = self.session.profile(code, cprofile=True, memory=True)
+            else:
+                result = self.session.compile(code)
+            rows = render(result)
+            if profile:
+                rows['profile'] = LineRows(prof.format().splitlines())
+            stats = {
+                'seconds': time.perf_counter() - start,
+                'errors': len(result.errors),
+                'cached': bool(cache) and cache.hits + cache.disk_hits > served,
+                'reused': self.session.reused,
+                'statements': self.session.reused + self.session.reparsed,
+                'announce': announce,
+            }
+            self.results.put((generation, rows, stats))
 
 
 class CompilerGUI:
@@ -12,7 +293,13 @@ class CompilerGUI:
         self.root = root
         self.root.title("Mini-Compiler by Nur Habibah Binti Mahbub")
         self.root.geometry("1200x800")
+        self.session = IncrementalSession(cache=CompileCache())
+        self.worker = CompileWorker(self.session)
+        self.worker.start()
+        self.generation = 0         # bumped for every source sent to the worker
+        self._pending = None        # after() id of the debounced live compile
         self._build_ui()
+        self.root.after(POLL_MS, self._poll)
 
     def _build_ui(self):
         top = tk.Frame(self.root)
@@ -25,7 +312,13 @@ class CompilerGUI:
         btn_frame.pack(side='right')
 
         tk.Button(btn_frame, text="▶ Compile", command=self.compile_action, bg="#50fa7b").pack(side='left', padx=4)
+        tk.Button(btn_frame, text="⏱ Profile", command=self.profile_action, bg="#8be9fd").pack(side='left', padx=4)
         tk.Button(btn_frame, text="🧹 Remove", command=self.clear_all, bg="#ff6b6b").pack(side='left', padx=4)
+        self.live = tk.BooleanVar(value=True)
+        tk.Checkbutton(btn_frame, text="Live", variable=self.live).pack(side='left', padx=4)
+
+        self.status = tk.Label(top, text="", anchor='e')
+        self.status.pack(side='right', padx=8)
 
         pane = tk.PanedWindow(self.root, orient='horizontal')
         pane.pack(fill='both', expand=True, padx=8, pady=8)
@@ -37,6 +330,8 @@ class CompilerGUI:
         self.source = scrolledtext.ScrolledText(left, font=('Courier', 11), width=70, height=36)
         self.source.pack(fill='both', expand=True)
         self.source.insert('1.0', "int x;\nint y;\nx=5;\ny=3;\nint z;\nz=x+y*2;\nprint(z);\n")
+        self.source.edit_modified(False)
+        self.source.bind('<<Modified>>', self._source_modified)
 
         right = tk.Frame(pane)
         pane.add(right)
@@ -44,96 +339,75 @@ class CompilerGUI:
         self.notebook = ttk.Notebook(right)
         self.notebook.pack(fill='both', expand=True)
 
-        self.tokens_area = self._make_tab("Tokens")
+        self.tokens_area = self._make_tab("Tokens", "Source line")
         self.sym_area = self._make_tab("Symbol Table")
         self.ic_area = self._make_tab("Intermediate Code")
         self.asm_area = self._make_tab("Assembly")
         self.err_area = self._make_tab("Errors")
+        self.profile_area = self._make_tab("Profile")
+        self.profile_area.show(LineRows(["Press Profile to time each compiler phase."]))
+        self.areas = {'tokens': self.tokens_area, 'symbols': self.sym_area,
+                      'ic': self.ic_area, 'asm': self.asm_area, 'errors': self.err_area,
+                      'profile': self.profile_area}
 
-    def _make_tab(self, title):
-        frame = tk.Frame(self.notebook)
-        txt = scrolledtext.ScrolledText(frame, font=('Courier', 10), width=70, height=20)
-        txt.pack(fill='both', expand=True)
-        self.notebook.add(frame, text=title)
-        return txt
+    def _make_tab(self, title, line_label="Line"):
+        view = ListingView(self.notebook, ('Courier', 10), line_label)
+        self.notebook.add(view, text=title)
+        return view
 
     def clear_all(self):
         self.source.delete('1.0', tk.END)
-        for area in (self.tokens_area, self.sym_area, self.ic_area, self.asm_area, self.err_area):
-            area.delete('1.0', tk.END)
+        self.generation += 1        # drop compiles still in flight
+        for area in self.areas.values():
+            area.show(LineRows([]))
 
     def compile_action(self):
-        code = self.source.get('1.0', tk.END)
-        for area in (self.tokens_area, self.sym_area, self.ic_area, self.asm_area, self.err_area):
-            area.delete('1.0', tk.END) 
-
-    # --- Lexical Analysis ---
-        lexer = MiniLexer()
-        lexer.build()
-        toks, lex_errors = lexer.tokenize(code)
-
-        def token_category(tok):
-            if tok.type in ['INT', 'FLOAT', 'IF', 'ELSE', 'WHILE', 'PRINT', 
-                'AUTO', 'BREAK', 'CASE', 'CHAR', 'CONST', 'CONTINUE',
-                'DEFAULT', 'DO', 'DOUBLE', 'ENUM', 'EXTERN', 'FOR', 
-                'GOTO', 'LONG', 'REGISTER', 'RETURN', 'SHORT', 'SIGNED',
-                'SIZEOF', 'STATIC', 'STRUCT', 'SWITCH', 'TYPEDEF',
-                'UNION', 'UNSIGNED', 'VOID', 'VOLATILE']:
-                return 'Keyword'
-
-            elif tok.type == 'ID':
-                return 'Identifier'
-            
-            elif tok.type in ['NUMBER']:
-                return 'Constant'
-            
-            elif tok.type in ['STRING']:
-                return 'Literal'
-            
-            elif tok.type in ['PLUS', 'MINUS', 'TIMES', 'DIVIDE', 'MOD', 'ASSIGN',
-                          'LT', 'LE', 'GT', 'GE', 'EQ', 'NE']:
-                return 'Operator'
-            
-            elif tok.type in ['LBRACE', 'RBRACE', 'LPAREN', 'RPAREN', 'RBRACKET', 'LBRACKET']:
-                return 'Parenthesis'
-            
-            elif tok.type in [ 'SEMICOLON', 'COMMA']:
-                return 'Punctuation'
-            
-            else:
-                return tok.type
-
-        tok_text = ""
-        for t in toks:
-            cat = token_category(t)
-            val = t.value if t.type != 'STRING' else f'"{t.value}"'
-            tok_text += f"{cat:<12} {val:<20} (line {t.lineno})\n"
-
-        self.tokens_area.insert('1.0', tok_text or "(no tokens)\n")
-
-        # --- Symbol Table & Parsing ---
-        st = SymbolTable()
-        ic = IntermediateCode()
-        parser = MiniParser(st, ic)
-        parser.build()
-        _, parse_errors = parser.parse(code)
-
-        sym_text = "".join(f"{s['name']:<12} {s['type']:<8} scope:{s['scope']}\n" for s in st.get_all())
-        self.sym_area.insert('1.0', sym_text or "(no symbols)\n")
-
-        # --- Intermediate Code ---
-        ic_text = ic.display()
-        self.ic_area.insert('1.0', ic_text or "(No intermediate code)\n")
-
-        # --- Assembly Generation ---
-        cg = CodeGenerator(ic, st)
-        asm = cg.generate()
-        self.asm_area.insert('1.0', asm or "(no assembly)\n")
-
-        # --- Error Reporting ---
-        all_errs = lex_errors + parse_errors + parser.errors
-        if all_errs:
-            messagebox.showwarning("Compilation Completed", f"The compilation process has generated {len(all_errs)} error(s).")
+        self._submit(announce=True)
+
+    def profile_action(self):
+        self._submit(profile=True)
+        self.notebook.select(self.profile_area)
+
+    # --- Live compile ---
+    def _source_modified(self, event):
+        if not self.source.edit_modified():
+            return
+        self.source.edit_modified(False)
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        if self.live.get():
+            self._pending = self.root.after(DEBOUNCE_MS, self._submit)
+
+    def _submit(self, announce=False, profile=False):
+        self._pending = None
+        self.generation += 1
+        self.worker.submit(self.generation, self.source.get('1.0', tk.END), announce, profile)
+        self.status.config(text="Compiling…")
+
+    def _poll(self):
+        latest = None
+        try:
+            while True:
+                latest = self.worker.results.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not None and latest[0] == self.generation:
+            self._show(*latest[1:])
+        self.root.after(POLL_MS, self._poll)
+
+    def _show(self, rows, stats):
+        for name, tab_rows in rows.items():
+            self.areas[name].show(tab_rows)
+
+        if stats['cached']:
+            detail = "from cache"
         else:
-            self.err_area.insert('1.0', "No errors detected. The compilation completed successfully.")
-            messagebox.showinfo("Compilation Successful", "The code has compiled successfully without any errors.")
+            detail = f"{stats['reused']} of {stats['statements']} statements reused"
+        self.status.config(text=f"{stats['seconds'] * 1000:.0f} ms, {detail}")
+
+        if stats['announce']:
+            if stats['errors']:
+                messagebox.showwarning("Compilation Completed", f"The compilation process has generated {stats['errors']} error(s).")
+            else:
+                messagebox.showinfo("Compilation Successful", "The code has compiled successfully without any errors.")
@@ -0,0 +1,241 @@
+"""
+Execution engines that run IntermediateCode.code directly.
+
+ClosureInterpreter does all decoding once: every variable and temp gets a
+slot in one flat list, labels are resolved to jump indices, label/scope
+quads disappear, and each remaining quad becomes a small generated Python
+function specialised for its operand kinds (slot or literal) and, through
+ic_types.infer(), for int or float arithmetic.  The whole program is
+generated as one module and compiled with a single compile() call, so
+running is just ``pc = fns[pc]()`` in a loop.  In front of each
+loop vectorize.py can run as whole-array operations there is one more
+function, which tries that and on success jumps past the loop.
+
+NaiveInterpreter walks the quad dicts with a name -> value environment,
+looking at the operands' types as it goes, and exists as the baseline
+for benchmarks and as a reference for checks.
+"""
+import operator
+
+from ic_types import infer
+from runtime import (ExecutionError, RunResult, c_div, c_mod, fdiv, fmod, ftoi, idiv, imod, itof,
+                     load, new_array, store)
+from vectorize import find_loops
+
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+NOP_OPS = ('label', 'scope_enter', 'scope_exit')
+
+# Python expression for each IC operator on ints; {a} and {b} are operand expressions.
+EXPR = {
+    '+': '{a} + {b}',
+    '-': '{a} - {b}',
+    '*': '{a} * {b}',
+    '/': 'idiv({a}, {b})',
+    '%': 'imod({a}, {b})',
+}
+for _op in REL_OPS:
+    EXPR[_op] = '1 if {a} %s {b} else 0' % _op
+# ... when either operand is a float
+FLOAT_EXPR = dict(EXPR, **{'/': 'fdiv({a}, {b})', '%': 'fmod({a}, {b})'})
+# ... for an int divided by a positive constant: no zero check, no call
+CONST_DIV_EXPR = {
+    '/': '{a} // {b} if {a} >= 0 else -(-{a} // {b})',
+    '%': '{a} % {b} if {a} >= 0 else -(-{a} % {b})',
+}
+
+PY_OPS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': c_div, '%': c_mod,
+    '<': lambda a, b: int(a < b), '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b), '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b),
+}
+CONVERT = {'itof': itof, 'ftoi': ftoi}
+
+
+def is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+class ClosureInterpreter:
+    def __init__(self, ic, max_jumps=None, vectorize=True):
+        self.ic = ic
+        self.max_jumps = max_jumps      # guard on backward jumps, None = no guard
+        # a vectorized loop takes no jumps, so it is only used without the guard
+        self.vectorize = vectorize and max_jumps is None
+        self.slots = {}                 # name -> slot index
+        self.types = {}                 # name -> 'int' or 'float'
+        self.source = None              # generated module text, for inspection
+        self.vector_loops = []
+        self._compile()
+
+    def _slot(self, name):
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def _operand(self, x):
+        return repr(x) if is_const(x) else f"r[{self._slot(x)}]"
+
+    def _template(self, op, a1, a2):
+        if type(a1) is float or type(a2) is float or 'float' in (self.types.get(a1),
+                                                                 self.types.get(a2)):
+            return FLOAT_EXPR[op]
+        if op in CONST_DIV_EXPR and type(a2) is int and a2 > 0:
+            return CONST_DIV_EXPR[op]
+        return EXPR[op]
+
+    def _compile(self):
+        quads = [q for q in self.ic.code if q.get('op') not in ('scope_enter', 'scope_exit')]
+        self.types = infer(self.ic)
+        self.vector_loops = find_loops(quads) if self.vectorize else []
+        vector_at = {loop.start: n for n, loop in enumerate(self.vector_loops)}
+
+        # label -> index of the first executable quad after it
+        targets = {}
+        index = 0
+        for k, q in enumerate(quads):
+            if k in vector_at:
+                index += 1
+            if q['op'] == 'label':
+                targets[q.get('res') or q.get('arg1')] = index
+            else:
+                index += 1
+
+        lines = []
+        pc = 0
+        for k, q in enumerate(quads):
+            if k in vector_at:
+                n = vector_at[k]
+                names = ", ".join(f"r[{self._slot(x)}]" for x in self.vector_loops[n].names)
+                lines.append(f"def f{pc}(r=r):")
+                lines.append(f"    out = vec{n}(({names},))")
+                lines.append("    if out is None:")
+                lines.append(f"        return {pc + 1}")
+                lines.append(f"    {names}, = out")
+                lines.append(f"    return {targets[self.vector_loops[n].exit]}")
+                pc += 1
+            op = q['op']
+            if op == 'label':
+                continue
+            a1, a2, res = q.get('arg1'), q.get('arg2'), q.get('res')
+            nxt = pc + 1
+            body = []
+            if op == '=':
+                body.append(f"r[{self._slot(res)}] = {self._operand(a1)}")
+                body.append(f"return {nxt}")
+            elif op in EXPR:
+                expr = self._template(op, a1, a2).format(a=self._operand(a1), b=self._operand(a2))
+                body.append(f"r[{self._slot(res)}] = {expr}")
+                body.append(f"return {nxt}")
+            elif op in CONVERT:
+                body.append(f"r[{self._slot(res)}] = {op}({self._operand(a1)})")
+                body.append(f"return {nxt}")
+            elif op == 'print':
+                body.append(f"emit({self._operand(a1)})")
+                body.append(f"return {nxt}")
+            elif op == 'array':
+                body.append(f"r[{self._slot(res)}] = new_array({self._operand(a1)}, {a2!r})")
+                body.append(f"return {nxt}")
+            elif op == '=[]':
+                body.append(f"r[{self._slot(res)}] = load(r[{self._slot(a1)}], {self._operand(a2)})")
+                body.append(f"return {nxt}")
+            elif op == '[]=':
+                body.append(f"store(r[{self._slot(res)}], {self._operand(a2)}, {self._operand(a1)})")
+                body.append(f"return {nxt}")
+            elif op in ('goto', 'if_false', 'if_true'):
+                label = res or a1
+                if label not in targets:
+                    raise ExecutionError(f"Undefined label '{label}'")
+                target = targets[label]
+                if self.max_jumps is not None and target <= pc:
+                    body.append("budget[0] -= 1")
+                    body.append("if budget[0] == 0: raise ExecutionError('Jump limit exceeded')")
+                if op == 'goto':
+                    body.append(f"return {target}")
+                elif op == 'if_false':
+                    body.append(f"return {target} if {self._operand(a1)} == 0 else {nxt}")
+                else:
+                    body.append(f"return {target} if {self._operand(a1)} != 0 else {nxt}")
+            else:
+                raise ExecutionError(f"Cannot execute quad {q}")
+            lines.append(f"def f{pc}(r=r):")
+            lines.extend("    " + b for b in body)
+            pc += 1
+        lines.append(f"fns = [{', '.join(f'f{i}' for i in range(pc))}]")
+        self.source = "\n".join(lines)
+        self.code = compile(self.source, '<ic>', 'exec')
+
+    def run(self):
+        r = [0] * len(self.slots)
+        out = []
+        ns = {
+            'r': r, 'emit': out.append, 'budget': [self.max_jumps or -1],
+            'idiv': idiv, 'imod': imod, 'fdiv': fdiv, 'fmod': fmod, 'itof': itof, 'ftoi': ftoi,
+            'ExecutionError': ExecutionError,
+            'new_array': new_array, 'load': load, 'store': store,
+        }
+        for n, loop in enumerate(self.vector_loops):
+            ns[f'vec{n}'] = loop.run
+        exec(self.code, ns)
+        fns = ns['fns']
+        n = len(fns)
+        pc = 0
+        while pc < n:
+            pc = fns[pc]()
+        variables = {name: r[slot] for name, slot in self.slots.items()}
+        return RunResult(out, variables)
+
+
+class NaiveInterpreter:
+    def __init__(self, ic, max_steps=None):
+        self.ic = ic
+        self.max_steps = max_steps
+
+    def run(self):
+        code = self.ic.code
+        labels = {}
+        for i, q in enumerate(code):
+            if q['op'] == 'label':
+                labels[q.get('res') or q.get('arg1')] = i
+        env = {}
+        out = []
+        steps = 0
+        pc = 0
+
+        def value(x):
+            return x if is_const(x) else env.get(x, 0)
+
+        while pc < len(code):
+            q = code[pc]
+            op = q['op']
+            pc += 1
+            if op in NOP_OPS:
+                continue
+            steps += 1
+            if self.max_steps is not None and steps > self.max_steps:
+                raise ExecutionError("Step limit exceeded")
+            if op == '=':
+                env[q['res']] = value(q['arg1'])
+            elif op in PY_OPS:
+                env[q['res']] = PY_OPS[op](value(q['arg1']), value(q['arg2']))
+            elif op in CONVERT:
+                env[q['res']] = CONVERT[op](value(q['arg1']))
+            elif op == 'print':
+                out.append(value(q['arg1']))
+            elif op == 'array':
+                env[q['res']] = new_array(value(q['arg1']), q['arg2'])
+            elif op == '=[]':
+                env[q['res']] = load(env.get(q['arg1']), value(q['arg2']))
+            elif op == '[]=':
+                store(env.get(q['res']), value(q['arg2']), value(q['arg1']))
+            elif op == 'goto':
+                pc = labels[q.get('res') or q.get('arg1')]
+            elif op == 'if_false':
+                if value(q['arg1']) == 0:
+                    pc = labels[q['res']]
+            elif op == 'if_true':
+                if value(q['arg1']) != 0:
+                    pc = labels[q['res']]
+            else:
+                raise ExecutionError(f"Cannot execute quad {q}")
+        return RunResult(out, env, steps)
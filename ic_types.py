@@ -0,0 +1,152 @@
+"""
+Int and float types over the intermediate code.
+
+convert() runs on the code lowering.py produces and makes C's implicit
+conversions explicit, with the declared types from the symbol table:
+
+    int op float, float op int      the int operand becomes a float first
+    x = v, a[i] = v                 v becomes x's (or a's element) type,
+                                    a float truncated toward zero
+
+A constant operand is converted in place; anything else gets an
+`itof a _ t` or `ftoi a _ t` quad in front.  After it, the operands of
+every arithmetic quad and comparison have one type and every assignment
+keeps a variable's type.
+
+infer() gives every name in (possibly optimized) code the type of the
+values it holds at run time: constants by their Python type, an array
+by its element type, conversions by what they produce, comparisons int,
+and arithmetic float as soon as one operand is.  A name every
+definition of which is int (or that is never defined, and so is 0)
+holds only Python ints.  The backends call it to pick typed
+instructions: the VM's IDIV/FDIV, the interpreters' idiv/fdiv calls
+instead of the c_div that checks types each time.  Nothing needs to be
+stored with the IC for that.
+
+    python ic_types.py program.mc       prints the converted IC with the type of every name
+"""
+import sys
+
+from intermediate_code import CONVERSIONS
+
+INT, FLOAT = 'int', 'float'
+ARITH_OPS = ('+', '-', '*', '/', '%')
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+# quads besides arithmetic that define a name; comparisons always give an int
+VALUE_OPS = REL_OPS + ('=', '=[]', 'array') + CONVERSIONS
+
+
+def _is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def convert(ic, symtab):
+    """Insert the int/float conversions into ic in place; returns how many were needed."""
+    declared = {sym.ic_name: sym.type for sym in symtab.symbols}
+    types = {}                      # temp -> type of its value
+    patches = []                    # (column, quad index, new operand)
+    before = {}                     # quad index -> conversions to insert in front of it
+
+    def kind(x):
+        if _is_const(x):
+            return FLOAT if type(x) is float else INT
+        return types.get(x) or declared.get(x, INT)
+
+    def to(want, x, i, column):
+        if _is_const(x):
+            try:
+                value = float(x) if want == FLOAT else int(x)
+            except (OverflowError, ValueError):
+                pass                # an inf or huge constant fails at run time instead
+            else:
+                patches.append((column, i, value))
+                return value
+        t = ic.new_temp()
+        before.setdefault(i, []).append(('itof' if want == FLOAT else 'ftoi', x, "", t))
+        patches.append((column, i, t))
+        types[t] = want
+        return t
+
+    for i, (op, a1, a2, res) in enumerate(ic.rows()):
+        if op in ARITH_OPS or op in REL_OPS:
+            k1, k2 = kind(a1), kind(a2)
+            if k1 != k2:
+                if k1 == INT:
+                    to(FLOAT, a1, i, 'a1')
+                else:
+                    to(FLOAT, a2, i, 'a2')
+            types[res] = INT if op in REL_OPS or k1 == k2 == INT else FLOAT
+        elif op == '=':
+            want = declared.get(res) or types.get(res) or kind(a1)
+            if kind(a1) != want:
+                to(want, a1, i, 'a1')
+            if res not in declared:
+                types[res] = want
+        elif op == '[]=':
+            want = declared.get(res, INT)
+            if kind(a1) != want:
+                to(want, a1, i, 'a1')
+        elif op == '=[]':
+            types[res] = declared.get(a1, INT)
+        elif op in CONVERSIONS:
+            types[res] = FLOAT if op == 'itof' else INT
+
+    ic.detach()
+    for column, i, x in patches:
+        getattr(ic, column)[i] = ic.encode(x)
+    if before:
+        ic.insert(before)
+    return len(patches)
+
+
+def infer(ic):
+    """{name: 'int' or 'float'} for every name ic's code defines."""
+    rows = [row for row in ic.rows() if row[0] in ARITH_OPS or row[0] in VALUE_OPS]
+    floats = set()
+
+    def is_float(x):
+        return type(x) is float if _is_const(x) else x in floats
+
+    # a name's type is the join of its definitions'; a loop can carry a
+    # float back to an earlier definition, hence the repeat
+    changed = True
+    while changed:
+        changed = False
+        for op, a1, a2, res in rows:
+            if res in floats:
+                continue
+            if op in ARITH_OPS:
+                f = is_float(a1) or is_float(a2)
+            elif op == '=' or op == '=[]':
+                f = is_float(a1)
+            elif op == 'array':
+                f = type(a2) is float
+            else:
+                f = op == 'itof'
+            if f:
+                floats.add(res)
+                changed = True
+    types = {res: INT for op, a1, a2, res in rows}
+    types.update(dict.fromkeys(floats, FLOAT))
+    return types
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python ic_types.py program.mc", file=sys.stderr)
+        return 2
+    from session import CompilerSession
+
+    with open(argv[0], encoding='utf-8') as f:
+        result = CompilerSession().compile(f.read())
+    for err in result.errors:
+        print(err, file=sys.stderr)
+    print(result.ic.display())
+    for name, kind in sorted(infer(result.ic).items()):
+        print(f"; {name:<12} {kind}")
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Incremental recompilation for editors.
+
+IncrementalSession remembers the tokens and syntax tree of every
+top-level statement of the last source it compiled without errors.  For
+the next source it finds the edited span (the text between the common
+prefix and the common suffix), keeps the statements that lie wholly
+before it, and re-lexes from the end of the last kept statement.  As
+soon as the new tokens reach, at brace depth 0, the start of an old
+statement from the unchanged suffix, the lexer stops: that statement and
+all after it are reused, moved by the change in length and line count
+(and in column, for what shares a line with the edit).  Only the
+re-lexed tokens are parsed.
+
+Declaration checks, lowering, optimization and code generation still run
+over the whole program (temp, label and scope numbering is global).
+Whenever the result could differ from a full compile (lexical or syntax
+errors in the edited span, or tokens that do not fall into whole
+statements) the session compiles the whole source instead; a source
+with errors leaves the remembered statements alone, so the next edit
+that fixes it is incremental again.
+"""
+import gc
+from bisect import bisect_left, bisect_right
+
+from lexer import Token, TokenStream
+from session import CompilerSession
+from syntax_tree import Block, If, Program, While, copy_tree
+
+_BLOCK = 1 << 12    # characters compared at a time when diffing sources
+
+
+class _Statement:
+    __slots__ = ('start', 'end', 'line', 'tokens', 'tree')
+
+    def __init__(self, tokens, tree):
+        self.tokens = tokens
+        self.tree = tree
+        self.start = tokens[0].lexpos
+        self.end = tokens[-1].lexpos + 1     # statements end with ';' or '}'
+        self.line = tokens[0].lineno
+
+    def moved(self, chars, lines, cols=0):
+        """
+        The statement in a source where it starts chars and lines later, and
+        what is on its first line cols columns further right.
+        """
+        tokens = self.tokens
+        if chars or lines:
+            new = tuple.__new__
+            tokens = [new(Token, (t.type, t.value, t.lineno + lines, t.lexpos + chars))
+                      for t in tokens]
+        # the checker renames scopes in place and the old tree may still
+        # belong to a cached result, so trees with blocks are always copied
+        if lines or cols or type(self.tree) in (Block, If, While):
+            return _Statement(tokens, copy_tree(self.tree, lines, cols, self.line))
+        return _Statement(tokens, self.tree)
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i + _BLOCK <= n and a[i:i + _BLOCK] == b[i:i + _BLOCK]:
+        i += _BLOCK
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a, b, limit):
+    """Length of the common suffix of a and b, at most limit."""
+    la, lb = len(a), len(b)
+    i = 0
+    while i + _BLOCK <= limit and a[la - i - _BLOCK:la - i] == b[lb - i - _BLOCK:lb - i]:
+        i += _BLOCK
+    while i < limit and a[la - i - 1] == b[lb - i - 1]:
+        i += 1
+    return i
+
+
+def split_statements(tokens):
+    """Token lists of top-level statements, or None if the last one is unfinished."""
+    groups = []
+    current = []
+    depth = 0
+    for i, tok in enumerate(tokens):
+        current.append(tok)
+        kind = tok.type
+        if kind == 'LBRACE':
+            depth += 1
+        elif kind == 'RBRACE':
+            depth -= 1
+            if depth == 0 and not (i + 1 < len(tokens) and tokens[i + 1].type == 'ELSE'):
+                groups.append(current)
+                current = []
+        elif kind == 'SEMICOLON' and depth == 0:
+            groups.append(current)
+            current = []
+    return None if current else groups
+
+
+class IncrementalSession(CompilerSession):
+    def __init__(self, cache=None, opt_level=0, disabled_passes=()):
+        super().__init__(cache, opt_level, disabled_passes)
+        self._text = ''
+        self._statements = []       # _Statement per top-level statement of _text
+        self.reused = 0             # statements of the last compile taken over as they were
+        self.reparsed = 0           # statements lexed and parsed again
+
+    def front_end(self, code):
+        front = self._incremental(code)
+        if front is None:
+            front = super().front_end(code)
+            toks, lex_errors, tree, parse_errors = front
+            groups = split_statements(toks) if tree is not None else None
+            if not lex_errors and not parse_errors and groups and len(groups) == len(tree.body):
+                self._remember(code, [_Statement(g, s) for g, s in zip(groups, tree.body)])
+            self.reused, self.reparsed = 0, len(tree.body) if tree is not None else 0
+        self._count(reused=self.reused, reparsed=self.reparsed)
+        return front
+
+    def _remember(self, code, statements):
+        self._text = code
+        self._statements = statements
+
+    def _incremental(self, code):
+        old, stmts = self._text, self._statements
+        if not stmts:
+            return None
+        prefix = _common_prefix(old, code)
+        suffix = _common_suffix(old, code, min(len(old), len(code)) - prefix)
+
+        # statements wholly before the edit; an if without else is dropped
+        # too, since the edit may have added its else branch
+        keep = bisect_right([s.end for s in stmts], prefix)
+        if keep and type(stmts[keep - 1].tree) is If and stmts[keep - 1].tree.else_body is None:
+            keep -= 1
+        start = stmts[keep - 1].end if keep else 0
+
+        # old statements in the unchanged suffix, by where they start now
+        shift = len(code) - len(old)
+        first = max(keep, bisect_left([s.start for s in stmts], len(old) - suffix))
+        resume = {stmts[k].start + shift: k for k in range(first, len(stmts))}
+
+        self.reset()
+        tokens = []
+        depth = 0
+        k = len(stmts)
+        lines = cols = 0
+        with self._phase('lex'):
+            for tok in self.lexer.stream(code[start:], code.count('\n', 0, start) + 1, start):
+                # old statements never start with 'else', so a match here also
+                # means the statement before it is complete
+                if depth == 0 and tok.lexpos in resume:
+                    k = resume[tok.lexpos]
+                    lines = tok.lineno - stmts[k].line
+                    old_start = stmts[k].start
+                    cols = ((tok.lexpos - code.rfind('\n', 0, tok.lexpos))
+                            - (old_start - old.rfind('\n', 0, old_start)))
+                    break
+                tokens.append(tok)
+                if tok.type == 'LBRACE':
+                    depth += 1
+                elif tok.type == 'RBRACE':
+                    depth -= 1
+        if self.lexer.errors:
+            return None
+
+        groups = split_statements(tokens)
+        if groups is None:
+            return None
+        body = []
+        if tokens:
+            with self._phase('parse'):
+                tree, errors = self.parser.parse(None, lexer=TokenStream(tokens), source=code)
+            if errors or tree is None or len(tree.body) != len(groups):
+                return None
+            body = tree.body
+
+        # moving the tail allocates a tuple per token and creates no cycles;
+        # Token is a tuple subclass, so the collector would keep scanning them
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with self._phase('reuse'):
+                # only statements on the edited line move sideways
+                line = stmts[k].line if k < len(stmts) else 0
+                tail = [s.moved(shift, lines, cols if s.line == line else 0)
+                        for s in stmts[k:]]
+        finally:
+            if enabled:
+                gc.enable()
+        statements = stmts[:keep] + [_Statement(g, s) for g, s in zip(groups, body)] + tail
+        if not statements:
+            return None
+        self._remember(code, statements)
+        self.reused = keep + len(tail)
+        self.reparsed = len(groups)
+        toks = [t for s in statements for t in s.tokens]
+        return toks, [], Program([s.tree for s in statements]), []
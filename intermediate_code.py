@@ -1,6 +1,178 @@
+from array import array
+from itertools import compress
+
+# Opcode numbers for the op column; ops not listed here get the next free
+# number the first time they are emitted.
+OPS = ['=', '+', '-', '*', '/', '%', '<', '<=', '>', '>=', '==', '!=',
+       'print', 'label', 'goto', 'if_false', 'if_true', 'scope_enter', 'scope_exit',
+       'array', '=[]', '[]=', 'itof', 'ftoi']
+OP_CODES = {op: i for i, op in enumerate(OPS)}
+LABEL_OPS = ('label', 'goto', 'if_false', 'if_true')
+# array a1 a2 res   res = new array of a1 elements, each a2 (0 or 0.0)
+# =[] a1 a2 res     res = a1[a2]
+# []= a1 a2 res     res[a2] = a1
+ARRAY_OPS = ('array', '=[]', '[]=')
+# itof a1 _ res     res = a1 converted to a float (see ic_types.py)
+# ftoi a1 _ res     res = a1 truncated to an int
+CONVERSIONS = ('itof', 'ftoi')
+FIELDS = ('op', 'arg1', 'arg2', 'res')
+
+# Operands are stored as one int each: the low two bits say what the rest is.
+VALUE, TEMP, LABEL = 0, 1, 2
+
+
+def _op_code(op):
+    code = OP_CODES.get(op)
+    if code is None:
+        code = OP_CODES[op] = len(OPS)
+        OPS.append(op)
+    return code
+
+
+class Quad:
+    """
+    One decoded quad.  It reads like the dicts the IC used to hold
+    (q['op'], q.get('res'), dict(q)), but is a detached copy: changing it
+    does not change the IntermediateCode it came from.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, op, arg1="", arg2="", res=""):
+        self.op = op
+        self.arg1 = arg1
+        self.arg2 = arg2
+        self.res = res
+
+    # q['op'] is plain attribute access, done in C; unknown keys raise AttributeError
+    __getitem__ = object.__getattribute__
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in FIELDS else default
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def keys(self):
+        return FIELDS
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in FIELDS]
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Quad) or hasattr(other, 'keys'):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Quad({self.op!r}, {self.arg1!r}, {self.arg2!r}, {self.res!r})"
+
+
+class _CodeView:
+    """Read-only sequence of Quads decoded on access."""
+    __slots__ = ('_ic',)
+
+    def __init__(self, ic):
+        self._ic = ic
+
+    def __len__(self):
+        return len(self._ic.ops)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._ic.quad(k) for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("quad index out of range")
+        return self._ic.quad(i)
+
+    def __iter__(self):
+        for row in self._ic.rows():
+            yield Quad(*row)
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+
+def _format_quad(i, op, a1, a2, res):
+    if op in ['+', '-', '*', '/', '%', '>', '<', '>=', '<=', '==', '!=']:
+        return f"{i:03}. {res} = {a1} {op} {a2}"
+    elif op == '=':
+        return f"{i:03}. {res} = {a1}"
+    elif op == '=[]':
+        return f"{i:03}. {res} = {a1}[{a2}]"
+    elif op == '[]=':
+        return f"{i:03}. {res}[{a2}] = {a1}"
+    elif op == 'array':
+        return f"{i:03}. {res} = {'float' if type(a2) is float else 'int'}[{a1}]"
+    elif op == 'itof':
+        return f"{i:03}. {res} = float({a1})"
+    elif op == 'ftoi':
+        return f"{i:03}. {res} = int({a1})"
+    elif op == 'print':
+        return f"{i:03}. print {a1}"
+    elif op == 'scope_enter':
+        return f"{i:03}. {a1} enter"
+    elif op == 'scope_exit':
+        return f"{i:03}. {a1} exit"
+    elif op == 'if_false':
+        return f"{i:03}. {res} = {a1} if_false"
+    elif op == 'if_true':
+        return f"{i:03}. {res} = {a1} if_true"
+    elif op == 'goto':
+        return f"{i:03}. {res} = goto"
+    elif op == 'label':
+        return f"{i:03}. {res} = label"
+    else:
+        # fallback for unknown ops
+        parts = [str(x) for x in [res, a1, op, a2] if x]
+        return f"{i:03}. {' '.join(parts)}"
+
+
 class IntermediateCode:
+    """
+    Three-address code in struct-of-arrays form.
+
+    Each quad is one entry in four parallel arrays: the opcode number and
+    three operand ints.  Temps and labels are stored by their number
+    (t17 -> 17, L3 -> 3); every other operand (variable names, constants,
+    scope names) is interned once in self.values.  The `code` property
+    still gives consumers a sequence of dict-like quads, and assigning a
+    list of quads (or dicts) to it re-encodes them.
+
+    Passes that only change operands or drop quads edit the columns in
+    place instead: an interned operand is equal to another exactly when
+    their ints are, so they compare and copy the ints, and encode() and
+    keep() cover the rest.
+    """
+
     def __init__(self):
-        self.code = []
+        self.ops = array('B')
+        self.a1 = array('i')
+        self.a2 = array('i')
+        self.rs = array('i')
+        self.values = [""]              # interned operands; 0 is the empty operand
+        self._value_ids = {"": 0}      # operand (or (type, constant)) -> encoded int
+        self._temp_names = [""]
+        self._label_names = [""]
         self.temp_count = 0
         self.label_count = 0
 
@@ -8,41 +180,140 @@ class IntermediateCode:
         self.temp_count += 1
         return f"t{self.temp_count}"
 
+    @staticmethod
+    def is_temp(name):
+        """True for names produced by new_temp()."""
+        return isinstance(name, str) and name[:1] == 't' and name[1:].isdigit()
+
     def new_label(self):
         self.label_count += 1
         return f"L{self.label_count}"
 
+    # --- Operand encoding ---
+    def _encode(self, x, is_label=False):
+        key = x if type(x) is str else (type(x), x)
+        if not is_label:
+            # a name like L3 is a value here but a label id in label position
+            i = self._value_ids.get(key)
+            if i is not None:
+                return i
+        # only canonical names (t17, not t017) become ids, so decoding gives
+        # back the same string
+        if type(x) is str and x[1:].isdigit() and x[1:].isascii() and x[1] != '0':
+            if x[0] == 't' and not is_label:
+                n = int(x[1:])
+                if n > self.temp_count:
+                    self.temp_count = n
+                return n << 2 | TEMP
+            if x[0] == 'L' and is_label:
+                n = int(x[1:])
+                if n > self.label_count:
+                    self.label_count = n
+                return n << 2 | LABEL
+        i = len(self.values) << 2
+        self.values.append(x)
+        self._value_ids[key] = i
+        return i
+
+    def _tables(self):
+        """Decode tables indexed by operand kind; temp and label names are filled in up front."""
+        for names, count, prefix in ((self._temp_names, self.temp_count, 't'),
+                                     (self._label_names, self.label_count, 'L')):
+            names.extend(f"{prefix}{i}" for i in range(len(names), count + 1))
+        return (self.values, self._temp_names, self._label_names)
+
     def emit(self, op, arg1="", arg2="", res=""):
         """Add a new instruction to the intermediate code."""
-        self.code.append({'op': op, 'arg1': arg1, 'arg2': arg2, 'res': res})
+        is_label = op in LABEL_OPS
+        self.ops.append(_op_code(op))
+        self.a1.append(self._encode(arg1, op in ('label', 'goto')))
+        self.a2.append(self._encode(arg2))
+        self.rs.append(self._encode(res, is_label))
+
+    # --- Access ---
+    def __len__(self):
+        return len(self.ops)
+
+    def quad(self, i):
+        t = self._tables()
+        a1, a2, rs = self.a1[i], self.a2[i], self.rs[i]
+        return Quad(OPS[self.ops[i]], t[a1 & 3][a1 >> 2], t[a2 & 3][a2 >> 2], t[rs & 3][rs >> 2])
+
+    def rows(self):
+        """(op, arg1, arg2, res) tuples in order; the fastest way to walk the code."""
+        t = self._tables()
+        for op, a1, a2, rs in zip(self.ops, self.a1, self.a2, self.rs):
+            yield OPS[op], t[a1 & 3][a1 >> 2], t[a2 & 3][a2 >> 2], t[rs & 3][rs >> 2]
+
+    @property
+    def code(self):
+        return _CodeView(self)
+
+    @code.setter
+    def code(self, quads):
+        if isinstance(quads, _CodeView) and quads._ic is self:
+            return
+        # decode first: quads may be a view of this very object
+        rows = [(q['op'], q.get('arg1', ""), q.get('arg2', ""), q.get('res', "")) for q in quads]
+        self.ops = array('B')
+        self.a1 = array('i')
+        self.a2 = array('i')
+        self.rs = array('i')
+        for row in rows:
+            self.emit(*row)
+
+    # --- Editing in place ---
+    def detach(self):
+        """Give the columns arrays of their own if they are views of a loaded file."""
+        if not isinstance(self.ops, array):
+            self.ops = array('B', self.ops)
+        for name in ('a1', 'a2', 'rs'):
+            if not isinstance(getattr(self, name), array):
+                setattr(self, name, array('i', getattr(self, name)))
+
+    def encode(self, x):
+        """The int standing for operand x in a1, a2 or (for anything but a label) rs."""
+        return self._encode(x)
+
+    def keep(self, mask):
+        """Drop every quad whose entry in mask is false."""
+        self.ops = array('B', compress(self.ops, mask))
+        self.a1 = array('i', compress(self.a1, mask))
+        self.a2 = array('i', compress(self.a2, mask))
+        self.rs = array('i', compress(self.rs, mask))
+
+    def insert(self, before):
+        """
+        Add quads in front of existing ones: before maps a quad index to a
+        list of (op, arg1, arg2, res) rows.  The quads already there keep
+        their encoded operands.
+        """
+        self.detach()
+        ops, a1, a2, rs = self.ops, self.a1, self.a2, self.rs
+        self.ops, self.a1, self.a2, self.rs = array('B'), array('i'), array('i'), array('i')
+        start = 0
+        for i in sorted(before):
+            self.ops.extend(ops[start:i])
+            self.a1.extend(a1[start:i])
+            self.a2.extend(a2[start:i])
+            self.rs.extend(rs[start:i])
+            for row in before[i]:
+                self.emit(*row)
+            start = i
+        self.ops.extend(ops[start:])
+        self.a1.extend(a1[start:])
+        self.a2.extend(a2[start:])
+        self.rs.extend(rs[start:])
+
+    def as_dicts(self):
+        """Plain {'op', 'arg1', 'arg2', 'res'} dicts, e.g. for JSON."""
+        return [dict(zip(FIELDS, row)) for row in self.rows()]
 
     def display(self):
         """Return formatted intermediate code as a string."""
-        output = []
-        for i, inst in enumerate(self.code, start=1):
-            res = inst.get('res', '')
-            a1 = inst.get('arg1', '')
-            a2 = inst.get('arg2', '')
-            op = inst.get('op', '')
-
-            if op in ['+', '-', '*', '/', '%', '>', '<', '>=', '<=', '==', '!=']:
-                output.append(f"{i:03}. {res} = {a1} {op} {a2}")
-            elif op == '=':
-                output.append(f"{i:03}. {res} = {a1}")
-            elif op == 'print':
-                output.append(f"{i:03}. print {a1}")
-            elif op == 'scope_enter':
-                output.append(f"{i:03}. {a1} enter")
-            elif op == 'scope_exit':
-                output.append(f"{i:03}. {a1} exit")
-            elif op == 'if_false':
-                output.append(f"{i:03}. {res} = {a1} if_false")
-            elif op == 'goto':
-                output.append(f"{i:03}. {res} = goto")
-            elif op == 'label':
-                output.append(f"{i:03}. {res} = label")
-            else:
-                # fallback for unknown ops
-                parts = [str(x) for x in [res, a1, op, a2] if x]
-                output.append(f"{i:03}. {' '.join(parts)}")
-        return "\n".join(output)
+        return "\n".join(_format_quad(i, *row) for i, row in enumerate(self.rows(), start=1))
+
+    def line(self, i):
+        """Line i (0-based) of display(), formatted on its own."""
+        q = self.quad(i)
+        return _format_quad(i + 1, q.op, q.arg1, q.arg2, q.res)
@@ -1,4 +1,26 @@
-import ply.lex as lex
+"""
+Lexer for the mini language.
+
+All token rules are alternatives of one compiled master regex, tried in
+a single match() per token; identifiers are checked against the keyword
+table afterwards.  stream() is a generator, so tokens can be consumed as
+they are produced, and stream_chunks()/stream_file() read large inputs a
+piece at a time (optionally through mmap).  TokenStream wraps any token
+iterator in the token() interface PLY's parser calls, so the parser and
+the token view share one lexing pass.
+"""
+import codecs
+import mmap
+import re
+from collections import namedtuple
+
+
+class Token(namedtuple('Token', 'type value lineno lexpos')):
+    """One token: a plain tuple with named fields."""
+    __slots__ = ()
+    lexer = None    # PLY's parser sets this on error tokens unless it exists
+
+
 class MiniLexer:
     tokens = [
         'ID', 'NUMBER', 'STRING',          
@@ -46,77 +68,165 @@ class MiniLexer:
 }
     tokens += list(reserved.values())
 
+    # operator and punctuation text -> token type
+    operators = {
+        '+': 'PLUS', '-': 'MINUS', '*': 'TIMES', '/': 'DIVIDE', '%': 'MOD',
+        '=': 'ASSIGN',
+        '<=': 'LE', '<': 'LT', '>=': 'GE', '>': 'GT', '==': 'EQ', '!=': 'NE',
+        '(': 'LPAREN', ')': 'RPAREN', '{': 'LBRACE', '}': 'RBRACE',
+        '[': 'LBRACKET', ']': 'RBRACKET',
+        ';': 'SEMICOLON', ',': 'COMMA',
+    }
+
+    # Alternatives are tried left to right, so comments come before '/'
+    # and two-character operators before their one-character prefixes.
+    # Blanks in front of a token are part of its match, so ordinary code
+    # needs about half as many matches; the token starts at end(1).  Every
+    # group is optional, so the pattern matches (emptily) even at an illegal
+    # character and finditer() never skips text unseen.
+    master = re.compile(r"""
+        ([ \t]*)
+        (?:
+            (?P<ID>[A-Za-z_][A-Za-z0-9_]*)
+          | (?P<COMMENT_SINGLE>//[^\n]*)
+          | (?P<COMMENT_MULTI>/\*[\s\S]*?\*/)
+          | (?P<OP><=|>=|==|!=|[-+*/%=<>(){}\[\];,])
+          | (?P<NEWLINE>\n+)
+          | (?P<NUMBER>\d+(?:\.\d+)?)
+          | (?P<STRING>"(?:[^\\\n]|\\.)*?")
+        )?
+    """, re.VERBOSE)
+    # group numbers, for dispatching on m.lastindex
+    ID, COMMENT_SINGLE, COMMENT_MULTI, OP, NEWLINE, NUMBER, STRING = range(2, 9)
 
-    t_PLUS = r'\+'
-    t_MINUS = r'-'
-    t_TIMES = r'\*'
-    t_DIVIDE = r'/'
-    t_MOD = r'%'
-    t_ASSIGN = r'='
-    t_LE = r'<='
-    t_LT = r'<'
-    t_GE = r'>='
-    t_GT = r'>'
-    t_EQ = r'=='
-    t_NE = r'!='
-    t_LPAREN = r'\('
-    t_RPAREN = r'\)'
-    t_LBRACE = r'\{'
-    t_RBRACE = r'\}'
-    t_LBRACKET = r'\['
-    t_RBRACKET = r'\]'
-    t_SEMICOLON = r';'
-    t_COMMA = r','
-
-    t_ignore = ' \t'
-    
-     # Single-line comment
-    def t_COMMENT_SINGLE(self, t):
-        r'//.*'
-        pass
-
-    # Multi-line comment
-    def t_COMMENT_MULTI(self, t):
-        r'/\*[\s\S]*?\*/'
-        t.lexer.lineno += t.value.count('\n')
-        pass
-
-    # Numbers
-    def t_NUMBER(self, t):
-        r'\d+(\.\d+)?'
-        t.value = float(t.value) if '.' in t.value else int(t.value)
-        return t
-
-    # Strings
-    def t_STRING(self, t):
-        r'\"([^\\\n]|(\\.))*?\"'   
-        t.value = t.value[1:-1]    
-        return t
-
-    # Identifiers
-    def t_ID(self, t):
-        r'[A-Za-z_][A-Za-z0-9_]*'
-        t.type = self.reserved.get(t.value, 'ID')
-        return t
-
-    def t_newline(self, t):
-        r'\n+'
-        t.lexer.lineno += len(t.value)
-
-    def t_error(self, t):
-        t.lexer.error_list.append(f"Illegal character '{t.value[0]}' at line {t.lineno}")
-        t.lexer.skip(1)
+    def __init__(self):
+        self.errors = []
 
     def build(self):
-        self.lexer = lex.lex(module=self)
-        self.lexer.error_list = []
+        """Kept for callers of the PLY-based lexer; the regex is compiled at import."""
+        self.errors = []
+
+    # --- Streaming ---
+    def stream(self, data, lineno=1, base=0):
+        """
+        Tokens of one string, as a generator.  lineno and base are the line
+        and offset data starts at, when it is a piece of a larger source.
+        """
+        return self.stream_chunks((data,), lineno, base)
+
+    def stream_chunks(self, chunks, lineno=1, base=0):
+        """
+        Tokens of text arriving in pieces.  Only comments cross a newline,
+        so each piece is lexed up to its last newline and the rest is
+        carried over; so is a '/*' whose comment is not closed yet.
+        """
+        self.errors = []
+        scan = self.master.finditer
+        reserved = self.reserved
+        operators = self.operators
+        new = tuple.__new__
+        ID, OP, NEWLINE, NUMBER = self.ID, self.OP, self.NEWLINE, self.NUMBER
+        STRING, COMMENT_MULTI = self.STRING, self.COMMENT_MULTI
+        # base: offset of buf[0] in the whole input; line_start: offset of
+        # the current line, for the column of an error
+        line_start = base
+        pending = ''
+        final = False
+        chunks = iter(chunks)
+        while not final:
+            chunk = next(chunks, None)
+            final = chunk is None
+            buf = pending + chunk if chunk else pending
+            limit = len(buf) if final else buf.rfind('\n') + 1
+            end = 0
+            for m in scan(buf, 0, limit):
+                kind = m.lastindex
+                start = m.end(1)
+                end = m.end()
+                if kind == ID:
+                    text = buf[start:end]
+                    yield new(Token, (reserved.get(text, 'ID'), text, lineno, base + start))
+                elif kind == OP:
+                    if not final and buf.startswith('/*', start):
+                        end = start
+                        break       # an open comment; it may close in a later piece
+                    text = buf[start:end]
+                    yield new(Token, (operators[text], text, lineno, base + start))
+                elif kind == NEWLINE:
+                    lineno += end - start
+                    line_start = base + end
+                elif kind == NUMBER:
+                    text = buf[start:end]
+                    value = float(text) if '.' in text else int(text)
+                    yield new(Token, ('NUMBER', value, lineno, base + start))
+                elif kind == STRING:
+                    yield new(Token, ('STRING', buf[start + 1:end - 1], lineno, base + start))
+                elif kind == COMMENT_MULTI:
+                    lines = buf.count('\n', start, end)
+                    if lines:
+                        lineno += lines
+                        line_start = base + buf.rfind('\n', start, end) + 1
+                elif kind == 1 and m.start() == end < limit:
+                    # the empty match: nothing starts here, and finditer
+                    # resumes one character on
+                    self.errors.append(f"Illegal character '{buf[end]}' "
+                                       f"(line {lineno}, column {base + end - line_start + 1})")
+                    end += 1
+            pos = end
+            base += pos
+            pending = buf[pos:]
+
+    def stream_file(self, path, chunk_size=1 << 20, use_mmap=False):
+        """Tokens of a UTF-8 file, read chunk_size bytes or characters at a time."""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        with open(path, 'rb') as f:
+            if use_mmap:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:      # empty file
+                    return
+                with mm:
+                    pieces = (decoder.decode(mm[i:i + chunk_size], i + chunk_size >= len(mm))
+                              for i in range(0, len(mm), chunk_size))
+                    yield from self.stream_chunks(pieces)
+            else:
+                pieces = (decoder.decode(raw) for raw in iter(lambda: f.read(chunk_size), b''))
+                yield from self.stream_chunks(pieces)
 
     def tokenize(self, data):
-        self.lexer.input(data)
-        toks = []
-        while True:
-            tok = self.lexer.token()
-            if not tok:
-                break
-            toks.append(tok)
-        return toks, self.lexer.error_list
+        """All tokens of data as a list, plus the lexical errors."""
+        toks = list(self.stream(data))
+        return toks, self.errors
+
+
+class TokenStream:
+    """
+    The lexer object PLY's parser expects (token() returns the next token
+    or None) over any token iterator.  With keep=True every token handed
+    out is also collected in self.tokens, for the token view.
+    """
+
+    def __init__(self, tokens, keep=False):
+        self._next = iter(tokens).__next__
+        self.tokens = [] if keep else None
+        self.lineno = 1
+        self.lexpos = 0
+
+    def input(self, data):
+        raise TypeError("TokenStream already has its input; call parse(None, lexer=stream)")
+
+    def token(self):
+        try:
+            tok = self._next()
+        except StopIteration:
+            return None
+        if self.tokens is not None:
+            self.tokens.append(tok)
+        self.lineno = tok.lineno
+        self.lexpos = tok.lexpos
+        return tok
+
+    def drain(self):
+        """Read whatever the parser left unread, so the token view is complete."""
+        while self.token() is not None:
+            pass
@@ -0,0 +1,288 @@
+"""
+Loop optimizations over IntermediateCode.code, built on the CFG.
+
+hoist_invariants   moves quads whose operands are not written inside a
+                   loop into a preheader in front of the loop header.
+reduce_strength    replaces t = i * k, for a basic induction variable i
+                   (one update i = i +/- c per iteration) and a constant k,
+                   with a running sum s that is set in the preheader and
+                   bumped by c*k right after each update of i.
+rotate_loops       turns  label Lh; <cond>; if_false c Le; <body>; goto Lh
+                   into   label Lh; <cond>; if_false c Le;
+                          label Lb; <body>; <cond'>; if_true c' Lb
+                   so each iteration runs one conditional jump instead of
+                   the test at the top plus the jump back to it.
+
+Each function rewrites an IntermediateCode like the passes in
+optimizer.py, but through decoded quads, since it moves code between
+blocks; code without a backward jump is never decoded, and code a pass
+leaves alone is not encoded again.  Only temps are moved or created: the
+IC assigns each temp once, so a hoisted temp cannot be overwritten
+inside the loop.  The running sums of reduce_strength are the one
+exception and are never hoisted afterwards, since their definition
+count is two.
+"""
+import re
+from collections import Counter
+
+from cfg import build_cfg
+from register_allocator import uses_defs
+from intermediate_code import OP_CODES, IntermediateCode
+
+HOISTABLE = ('+', '-', '*', '/', '%', '<', '<=', '>', '>=', '==', '!=', '=', 'itof', 'ftoi')
+_LABEL_RE = re.compile(r'L(\d+)$')
+
+
+def _is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+class _Names:
+    """Fresh temp and label names that do not clash with the ones in code."""
+
+    def __init__(self, code):
+        self.temps = 0
+        self.labels = 0
+        for q in code:
+            for key in ('arg1', 'arg2', 'res'):
+                x = q.get(key)
+                if IntermediateCode.is_temp(x):
+                    self.temps = max(self.temps, int(x[1:]))
+                elif isinstance(x, str):
+                    m = _LABEL_RE.match(x)
+                    if m:
+                        self.labels = max(self.labels, int(m.group(1)))
+
+    def temp(self):
+        self.temps += 1
+        return f"t{self.temps}"
+
+    def label(self):
+        self.labels += 1
+        return f"L{self.labels}"
+
+
+def _quad(op, arg1="", arg2="", res=""):
+    return {'op': op, 'arg1': arg1, 'arg2': arg2, 'res': res}
+
+
+def _has_loop(ic):
+    """True if some jump goes back to a label at or before it, which every loop needs."""
+    label = OP_CODES['label']
+    jumps = {OP_CODES[op] for op in ('goto', 'if_false', 'if_true')}
+    seen = set()
+    for op, a1, rs in zip(ic.ops, ic.a1, ic.rs):
+        if op == label:
+            seen.add(rs or a1)
+        elif op in jumps and (rs or a1) in seen:
+            return True
+    return False
+
+
+def _with_preheaders(cfg, loops, pre, names):
+    """Linearize cfg with the quads in pre[header] placed in front of each header."""
+    by_header = {loop.header: loop for loop in loops}
+    code = []
+    for b in cfg.blocks:
+        hoisted = pre.get(b.id)
+        if hoisted:
+            loop = by_header[b.id]
+            prev = cfg.blocks[b.id - 1] if b.id > 0 else None
+            # a block inside the loop that fell into the header must now jump
+            if prev is not None and prev.id in loop.blocks and prev.fallthrough == b.id:
+                code.append(_quad('goto', res=b.label))
+            outside_jumps = [p for p in b.preds if p not in loop.blocks
+                             and cfg.blocks[p].terminator is not None]
+            if outside_jumps:
+                entry = names.label()
+                for p in outside_jumps:
+                    term = cfg.blocks[p].terminator
+                    if (term.get('res') or term.get('arg1')) == b.label:
+                        cfg.blocks[p].quads[-1] = dict(term, res=entry)
+                code.append(_quad('label', res=entry))
+            code.extend(hoisted)
+        code.extend(b.quads)
+    return code
+
+
+# --- Loop-invariant code motion ---
+def hoist_invariants(ic):
+    if not _has_loop(ic):
+        return
+    code = [dict(q) for q in ic.code]
+    cfg = build_cfg(code)
+    loops = cfg.loops()             # outermost first: hoist as far out as possible
+    names = _Names(code)
+    total_defs = Counter(uses_defs(q)[1] for q in code)
+    pre = {}
+
+    for loop in loops:
+        blocks = sorted(loop.blocks)
+        defs = Counter()
+        for b in blocks:
+            for q in cfg.blocks[b].quads:
+                d = uses_defs(q)[1]
+                if d is not None:
+                    defs[d] += 1
+        hoisted = pre.setdefault(loop.header, [])
+        for b in blocks:
+            kept = []
+            for q in cfg.blocks[b].quads:
+                if _invariant(q, defs, total_defs):
+                    hoisted.append(q)
+                    defs[q['res']] -= 1
+                else:
+                    kept.append(q)
+            cfg.blocks[b].quads = kept
+    if any(pre.values()):
+        ic.code = _with_preheaders(cfg, loops, pre, names)
+
+
+def _invariant(q, defs, total_defs):
+    op = q['op']
+    res = q.get('res')
+    if op not in HOISTABLE or not IntermediateCode.is_temp(res) or total_defs[res] != 1:
+        return False
+    # never hoist a division or a conversion that could fault when the loop
+    # does not run (loop rotation may still copy a conversion in a test)
+    if op in ('itof', 'ftoi'):
+        return False
+    args = (q.get('arg1'),) if op == '=' else (q.get('arg1'), q.get('arg2'))
+    for x in args:
+        if not _is_const(x) and defs[x] > 0:
+            return False
+    if op in ('/', '%') and not (_is_const(q.get('arg2')) and q.get('arg2') != 0):
+        return False
+    return True
+
+
+# --- Strength reduction ---
+def _induction_step(loop, cfg, var):
+    """Step c if var's only update in the loop is var = var +/- c; else None."""
+    updates = []
+    temp_defs = {}
+    for b in loop.blocks:
+        for idx, q in enumerate(cfg.blocks[b].quads):
+            d = uses_defs(q)[1]
+            if d == var:
+                updates.append((b, idx, q))
+            elif d is not None:
+                temp_defs[d] = q
+    if len(updates) != 1:
+        return None
+    b, idx, q = updates[0]
+    step_q = q
+    if q['op'] == '=' and q.get('arg1') in temp_defs:
+        step_q = temp_defs[q['arg1']]
+    op, a1, a2 = step_q['op'], step_q.get('arg1'), step_q.get('arg2')
+    if op == '+' and a1 == var and type(a2) is int:
+        return a2, (b, idx)
+    if op == '+' and a2 == var and type(a1) is int:
+        return a1, (b, idx)
+    if op == '-' and a1 == var and type(a2) is int:
+        return -a2, (b, idx)
+    return None
+
+
+def reduce_strength(ic):
+    if not _has_loop(ic):
+        return
+    code = [dict(q) for q in ic.code]
+    cfg = build_cfg(code)
+    loops = cfg.loops()
+    names = _Names(code)
+    total_defs = Counter(uses_defs(q)[1] for q in code)
+    pre = {}
+
+    for loop in reversed(loops):    # innermost first
+        steps = {}
+        sums = {}                   # (var, k) -> running-sum temp
+        bumps = {}                  # (block, index) -> quads to add after it
+        for b in sorted(loop.blocks):
+            for q in cfg.blocks[b].quads:
+                if q['op'] != '*' or not IntermediateCode.is_temp(q['res']) or total_defs[q['res']] != 1:
+                    continue
+                a1, a2 = q.get('arg1'), q.get('arg2')
+                var, k = (a1, a2) if type(a2) is int else (a2, a1)
+                if type(k) is not int or not isinstance(var, str) or IntermediateCode.is_temp(var):
+                    continue
+                if var not in steps:
+                    steps[var] = _induction_step(loop, cfg, var)
+                if steps[var] is None:
+                    continue
+                step, where = steps[var]
+                key = (var, k)
+                if key not in sums:
+                    s = sums[key] = names.temp()
+                    pre.setdefault(loop.header, []).append(_quad('*', var, k, s))
+                    bumps.setdefault(where, []).append(_quad('+', s, step * k, s))
+                res = q['res']
+                q.clear()
+                q.update(_quad('=', arg1=sums[key], res=res))
+        # insert the running-sum updates right after the induction update,
+        # back to front so earlier indices stay valid
+        for (b, idx) in sorted(bumps, reverse=True):
+            quads = cfg.blocks[b].quads
+            cfg.blocks[b].quads = quads[:idx + 1] + bumps[(b, idx)] + quads[idx + 1:]
+    if pre:
+        ic.code = _with_preheaders(cfg, loops, pre, names)
+
+
+# --- Loop rotation ---
+def rotate_loops(ic):
+    if not _has_loop(ic):
+        return
+    code = [dict(q) for q in ic.code]
+    cfg = build_cfg(code)
+    names = _Names(code)
+    rotated = {}                    # header block -> body label
+    tails = {}                      # latch block -> quads replacing its goto
+
+    for loop in cfg.loops():
+        h = loop.header
+        header = cfg.blocks[h]
+        test = header.terminator
+        if header.label is None or test is None or test['op'] != 'if_false':
+            continue
+        cond = header.quads[1:-1]
+        if any(q['op'] not in HOISTABLE for q in cond):
+            continue
+        exit_block = cfg.label_block.get(test['res'])
+        # the single latch must be the block laid out right before the exit,
+        # with the whole body in between
+        if len(loop.latches) != 1 or exit_block is None:
+            continue
+        latch = loop.latches[0]
+        term = cfg.blocks[latch].terminator
+        if (latch + 1 != exit_block or latch == h or term is None or term['op'] != 'goto'
+                or set(range(h, latch + 1)) != loop.blocks):
+            continue
+
+        # the copied test gets its own temps so every temp keeps one definition
+        rename = {}
+        copy = []
+        for q in cond:
+            q = dict(q)
+            for key in ('arg1', 'arg2'):
+                if q.get(key) in rename:
+                    q[key] = rename[q[key]]
+            if IntermediateCode.is_temp(q['res']):
+                rename[q['res']] = names.temp()
+                q['res'] = rename[q['res']]
+            copy.append(q)
+        c = test.get('arg1')
+        body_label = names.label()
+        rotated[h] = body_label
+        tails[latch] = copy + [_quad('if_true', arg1=rename.get(c, c), res=body_label)]
+
+    if not rotated:
+        return
+    out = []
+    for b in cfg.blocks:
+        quads = b.quads
+        if b.id in tails:
+            quads = quads[:-1] + tails[b.id]
+        out.extend(quads)
+        if b.id in rotated:
+            out.append(_quad('label', res=rotated[b.id]))
+    ic.code = out
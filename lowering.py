@@ -0,0 +1,156 @@
+"""
+Lowering of the syntax tree to intermediate code.
+
+Quads come out in execution order:
+
+    if (c) { A } else { B }     <c>; if_false c Lf; A; goto Le; label Lf; B; label Le
+    while (c) { A }             label Ls; <c>; if_false c Le; A; goto Ls; label Le
+    int a[n];                   array n 0 a         (0.0 for a float array)
+    a[i] = v                    <i>; <v>; []= v i a
+    a[i]                        <i>; =[] a i t
+
+with each block's body between scope_enter and scope_exit quads.  Temps
+are numbered in evaluation order (left operand, right operand, then the
+operation), which is the order the parser used to emit them in.  A
+variable is stored under its symbol's ic_name, so a name declared again
+in an inner or a sibling block does not share the first one's value.
+"""
+from intermediate_code import IntermediateCode
+from syntax_tree import BinOp, Num, Var, Visitor
+
+
+class Lowering(Visitor):
+    def __init__(self, ic, symtab=None):
+        self.ic = ic
+        self.symtab = symtab
+        # only names declared more than once are stored under other names
+        self.renamed = set() if symtab is None else {
+            sym.name for sym in symtab.symbols if sym.ic_name != sym.name}
+        self.bindings = {}          # renamed name -> [ic_name, ...], innermost last
+        self.scope = 'global'
+        self.declared = []          # renamed names declared in the current scope
+
+    def ref(self, name):
+        """The IC name a use of name in the current scope stands for."""
+        stack = self.bindings.get(name)
+        return stack[-1] if stack else name
+
+    def body(self, stmts, scope=None):
+        if scope is not None:
+            self.ic.emit('scope_enter', arg1=scope)
+            outer = self.scope, self.declared
+            self.scope, self.declared = scope, []
+        for stmt in stmts:
+            self.visit(stmt)
+        if scope is not None:
+            for name in self.declared:
+                self.bindings[name].pop()
+            self.scope, self.declared = outer
+            self.ic.emit('scope_exit', arg1=scope)
+
+    # --- Statements ---
+    def visit_Program(self, node):
+        self.body(node.body)
+
+    def visit_Block(self, node):
+        self.body(node.body, node.scope)
+
+    def visit_Decl(self, node):
+        # scalar declarations only fill the symbol table; an array is
+        # allocated, zero-filled, each time its declaration runs
+        size = self.ref(node.size) if type(node.size) is str else node.size
+        name = node.name
+        if name in self.renamed:
+            sym = self.symtab.scope(self.scope).symbols.get(name)
+            self.bindings.setdefault(name, []).append(sym.ic_name if sym else name)
+            self.declared.append(name)
+        if size is not None:
+            fill = 0.0 if node.type == 'float' else 0
+            self.ic.emit('array', arg1=size, arg2=fill, res=self.ref(name))
+
+    def visit_Assign(self, node):
+        self.ic.emit('=', arg1=self.visit(node.value), res=self.ref(node.name))
+
+    def visit_IndexAssign(self, node):
+        index = self.visit(node.index)
+        self.ic.emit('[]=', arg1=self.visit(node.value), arg2=index, res=self.ref(node.name))
+
+    def visit_Print(self, node):
+        self.ic.emit('print', arg1=self.visit(node.value))
+
+    def visit_If(self, node):
+        ic = self.ic
+        cond = self.visit(node.cond)
+        l_false = ic.new_label()
+        ic.emit('if_false', arg1=cond, res=l_false)
+        self.body(node.then_body, node.then_scope)
+        if node.else_body is None:
+            ic.emit('label', res=l_false)
+        else:
+            l_end = ic.new_label()
+            ic.emit('goto', res=l_end)
+            ic.emit('label', res=l_false)
+            self.body(node.else_body, node.else_scope)
+            ic.emit('label', res=l_end)
+
+    def visit_While(self, node):
+        ic = self.ic
+        l_start = ic.new_label()
+        l_end = ic.new_label()
+        ic.emit('label', res=l_start)
+        cond = self.visit(node.cond)
+        ic.emit('if_false', arg1=cond, res=l_end)
+        self.body(node.body, node.scope)
+        ic.emit('goto', res=l_start)
+        ic.emit('label', res=l_end)
+
+    # --- Expressions: each returns the operand holding the value ---
+    def visit_Num(self, node):
+        return node.value
+
+    def visit_Var(self, node):
+        return self.ref(node.name)
+
+    def visit_Index(self, node):
+        index = self.visit(node.index)
+        t = self.ic.new_temp()
+        self.ic.emit('=[]', arg1=self.ref(node.name), arg2=index, res=t)
+        return t
+
+    def visit_BinOp(self, node):
+        # iterative post-order: left-nested chains are as deep as they are long
+        ic = self.ic
+        values = []
+        todo = [(node, False)]
+        while todo:
+            n, ready = todo.pop()
+            cls = type(n)
+            if cls is Num:
+                values.append(n.value)
+            elif cls is Var:
+                values.append(self.ref(n.name))
+            elif cls is not BinOp:
+                values.append(self.visit(n))
+            elif ready:
+                right = values.pop()
+                left = values.pop()
+                t = ic.new_temp()
+                ic.emit(n.op, arg1=left, arg2=right, res=t)
+                values.append(t)
+            else:
+                todo.append((n, True))
+                todo.append((n.right, False))
+                todo.append((n.left, False))
+        return values[0]
+
+
+def lower(tree, ic=None, symtab=None):
+    """
+    Intermediate code for a syntax tree, emitted into ic (or a new
+    IntermediateCode).  symtab is the table semantics.check() filled from
+    the tree; without it every variable is stored under its own name.
+    """
+    if ic is None:
+        ic = IntermediateCode()
+    Lowering(ic, symtab).visit(tree)
+    return ic
@@ -0,0 +1,237 @@
+"""
+Optimization passes over IntermediateCode.
+
+Each pass rewrites the IC in place and looks only at straight-line code;
+facts are dropped at every label.  The loop passes are in
+loop_optimizer.py.  Optimizer runs the passes of a level (-O0/-O1/-O2)
+and reports the quad count before and after each.
+"""
+from contextlib import nullcontext
+
+from runtime import ExecutionError, c_div, c_mod, ftoi, itof
+from intermediate_code import CONVERSIONS, OP_CODES, OPS, TEMP, VALUE
+from loop_optimizer import hoist_invariants, reduce_strength, rotate_loops
+
+FOLD = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': c_div,
+    '%': c_mod,
+    '<': lambda a, b: int(a < b),
+    '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+}
+CONVERT = {'itof': itof, 'ftoi': ftoi}
+COMMUTATIVE = ('+', '*', '==', '!=')
+# x op k == x for these integer k (an int identity never changes x's type)
+IDENTITY = {'+': 0, '-': 0, '*': 1, '/': 1}
+VALUE_OPS = tuple(FOLD) + CONVERSIONS + ('=',)
+DEFINING_OPS = VALUE_OPS + ('=[]',)     # every op that writes a scalar res
+
+
+def is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _is_int(x, value):
+    return type(x) is int and x == value
+
+
+def _reads(op):
+    """Whether op reads a value from arg1 and from arg2."""
+    if op in FOLD:
+        return True, True
+    if op in ('=', 'print', 'if_false', 'if_true', 'array') or op in CONVERT:
+        return True, False
+    if op == '=[]':
+        return False, True
+    if op == '[]=':
+        return True, True
+    return False, False
+
+
+# Operands below are the IC's encoded ints: two are the same name or
+# constant exactly when the ints are equal.
+def _constant(x, values):
+    """The constant operand x stands for, or None."""
+    if x & 3 == VALUE:
+        value = values[x >> 2]
+        if is_const(value):
+            return value
+    return None
+
+
+# --- Passes ---
+def constant_folding(ic):
+    """Propagate known constants and evaluate operators on constants."""
+    ic.detach()
+    ops, a1, a2, rs, values = ic.ops, ic.a1, ic.a2, ic.rs, ic.values
+    assign = OP_CODES['=']
+    reads = [_reads(op) for op in OPS]
+    known = {}
+    for i in range(len(ops)):
+        op = OPS[ops[i]]
+        if op == 'label':
+            known = {}
+        reads1, reads2 = reads[ops[i]]
+        if reads1 and a1[i] in known:
+            a1[i] = known[a1[i]]
+        if reads2 and a2[i] in known:
+            a2[i] = known[a2[i]]
+        if op in FOLD:
+            x, y = _constant(a1[i], values), _constant(a2[i], values)
+            if x is not None and y is not None:
+                try:
+                    value = FOLD[op](x, y)
+                except ExecutionError:
+                    pass                # leave division by zero to run time
+                else:
+                    ops[i], a1[i], a2[i], op = assign, ic.encode(value), 0, '='
+            elif op in IDENTITY and _is_int(y, IDENTITY[op]):
+                ops[i], a2[i], op = assign, 0, '='
+            elif op in COMMUTATIVE and op in IDENTITY and _is_int(x, IDENTITY[op]):
+                ops[i], a1[i], a2[i], op = assign, a2[i], 0, '='
+        elif op in CONVERT:
+            x = _constant(a1[i], values)
+            if x is not None:
+                try:
+                    value = CONVERT[op](x)
+                except ExecutionError:
+                    pass                # an inf or huge value fails at run time
+                else:
+                    ops[i], a1[i], op = assign, ic.encode(value), '='
+        if op in DEFINING_OPS:
+            if op == '=' and _constant(a1[i], values) is not None:
+                known[rs[i]] = a1[i]
+            else:
+                known.pop(rs[i], None)
+
+
+def copy_propagation(ic):
+    """Replace uses of x after 'x = y' with y while neither is redefined."""
+    ic.detach()
+    ops, a1, a2, rs, values = ic.ops, ic.a1, ic.a2, ic.rs, ic.values
+    reads = [_reads(op) for op in OPS]
+    keep = bytearray(b'\1') * len(ops)
+    copies = {}                         # x -> y
+    for i in range(len(ops)):
+        op = OPS[ops[i]]
+        if op == 'label':
+            copies = {}
+        reads1, reads2 = reads[ops[i]]
+        if reads1 and a1[i] in copies:
+            a1[i] = copies[a1[i]]
+        if reads2 and a2[i] in copies:
+            a2[i] = copies[a2[i]]
+        if op in DEFINING_OPS:
+            res = rs[i]
+            copies.pop(res, None)
+            for x in [x for x, y in copies.items() if y == res]:
+                del copies[x]
+            if op == '=' and _constant(a1[i], values) is None and a1[i] != res:
+                copies[res] = a1[i]
+        if op == '=' and a1[i] == rs[i]:
+            keep[i] = 0                 # x = x
+    if 0 in keep:
+        ic.keep(keep)
+
+
+def common_subexpressions(ic):
+    """Reuse the result of an identical earlier operation in the same block."""
+    ic.detach()
+    ops, a1, a2, rs = ic.ops, ic.a1, ic.a2, ic.rs
+    assign = OP_CODES['=']
+    available = {}                      # (op, a, b) -> name holding the value
+    for i in range(len(ops)):
+        op = OPS[ops[i]]
+        if op == 'label':
+            available = {}
+        if op in FOLD or op in CONVERT:
+            a, b = a1[i], a2[i]
+            if op in COMMUTATIVE and b < a:
+                a, b = b, a
+            key = (op, a, b)
+            prev = available.get(key)
+            res = rs[i]
+            if prev is not None and prev != res:
+                ops[i], a1[i], a2[i] = assign, prev, 0
+            _kill(available, res)
+            if prev is None and res not in (a, b):
+                available[key] = res
+        elif op in ('=', '=[]'):
+            _kill(available, rs[i])
+
+
+def _kill(available, name):
+    for key in [k for k, v in available.items() if v == name or name in (k[1], k[2])]:
+        del available[key]
+
+
+def dead_temps(ic):
+    """Drop quads that compute temps nobody reads."""
+    ic.detach()
+    reads = [_reads(op) for op in OPS]
+    defines = [op in VALUE_OPS for op in OPS]
+    while True:
+        used = set()
+        for op, x, y in zip(ic.ops, ic.a1, ic.a2):
+            reads1, reads2 = reads[op]
+            if reads1:
+                used.add(x)
+            if reads2:
+                used.add(y)
+        keep = [not (defines[op] and res & 3 == TEMP and res not in used)
+                for op, res in zip(ic.ops, ic.rs)]
+        if all(keep):
+            return
+        ic.keep(keep)
+
+
+PASSES = {
+    'constant-folding': constant_folding,
+    'copy-propagation': copy_propagation,
+    'cse': common_subexpressions,
+    'dead-temps': dead_temps,
+    'licm': hoist_invariants,
+    'strength-reduction': reduce_strength,
+    'loop-rotation': rotate_loops,
+}
+
+LEVELS = {
+    0: [],
+    1: ['constant-folding', 'copy-propagation', 'dead-temps'],
+    2: ['constant-folding', 'copy-propagation', 'cse', 'copy-propagation',
+        'constant-folding', 'licm', 'strength-reduction', 'copy-propagation',
+        'dead-temps', 'loop-rotation'],
+}
+
+
+class Optimizer:
+    def __init__(self, level=1, disabled=(), passes=None):
+        self.level = level
+        self.passes = [p for p in (passes or LEVELS[level]) if p not in disabled]
+        self.report = []                # (pass name, quads before, quads after)
+
+    def run(self, ic, phase=None):
+        """
+        Optimize ic.code in place; returns the per-pass report.  phase(name),
+        if given, returns a context manager to time each pass with.
+        """
+        self.report = []
+        phase = phase or (lambda name: nullcontext())
+        for name in self.passes:
+            before = len(ic)
+            with phase(name):
+                PASSES[name](ic)
+            self.report.append((name, before, len(ic)))
+        return self.report
+
+    def format_report(self):
+        lines = [f"; -O{self.level}"]
+        for name, before, after in self.report:
+            lines.append(f"; {name:<18} {before:6} -> {after:6} quads")
+        return "\n".join(lines)
@@ -1,8 +1,23 @@
+from itertools import chain
+
 import ply.yacc as yacc
-from lexer import MiniLexer
+from lexer import MiniLexer, Token, TokenStream
+from syntax_tree import (Assign, BinOp, Block, Decl, If, Index, IndexAssign, Num, Print, Program,
+                         Var, While)
 
 class MiniParser:
-    tokens = MiniLexer.tokens
+    """
+    Syntax errors do not end the parse.  A statement that does not parse is
+    skipped up to its ';', and the rest of a block up to its '}', with PLY's
+    error token; a condition that does not parse is skipped up to its ')'.
+    The statements around them still make it into the tree, so one pass
+    reports every syntax error and semantics.check() can go on to the rest.
+
+    The parser reads an EOF token after the input, one more for each block
+    left open: PLY gives up on an error at its own end marker, but an error
+    at EOF is recovered from like any other.
+    """
+    tokens = MiniLexer.tokens + ['EOF']
 
     precedence = (
         ('left', 'PLUS', 'MINUS'),
@@ -10,21 +25,41 @@ class MiniParser:
         ('nonassoc', 'LT', 'LE', 'GT', 'GE', 'EQ', 'NE'),
     )
 
-    def __init__(self, symtab, ic):
-        self.symtab = symtab
-        self.ic = ic
+    def __init__(self):
         self.errors = []
+        self.source = None          # text the tokens come from, for error columns
+        self._ended = 0             # EOF tokens taken up by the grammar
+        self._done = False
+        self._eof = None
+        self._eof_error = False
 
     # --- Grammar Rules ---
 
     def p_program(self, p):
-        'program : statement_list'
-        p[0] = ('program', p[1])
+        '''program : statement_list EOF
+                   | statement_list error EOF'''
+        self._ended += 1
+        self._done = True
+        p[0] = Program(p[1])
+
+    def p_program_error(self, p):
+        'program : error EOF'
+        self._ended += 1
+        self._done = True
+        p[0] = Program([])
 
     def p_statement_list(self, p):
         '''statement_list : statement
                           | statement_list statement'''
-        p[0] = [p[1]] if len(p) == 2 else p[1] + [p[2]]
+        # extend the list in place: copying it on every reduction made
+        # parsing quadratic in the number of statements; statements that
+        # did not parse are None and left out
+        if len(p) == 2:
+            p[0] = [p[1]] if p[1] is not None else []
+        else:
+            if p[2] is not None:
+                p[1].append(p[2])
+            p[0] = p[1]
 
     def p_statement(self, p):
         '''statement : declaration SEMICOLON
@@ -35,31 +70,55 @@ class MiniParser:
                      | block'''
         p[0] = p[1]
 
+    def p_statement_error(self, p):
+        'statement : error SEMICOLON'
+        p[0] = None
+
     # --- Scopes ---
+    # scope_enter/scope_exit mark where blocks open and close; the scopes
+    # themselves are named by semantics.Checker.
     def p_block(self, p):
-        'block : LBRACE scope_enter statement_list scope_exit RBRACE'
-        p[0] = ('block', p[3])
+        'block : body'
+        p[0] = Block(p[1], None)
+
+    def p_body(self, p):
+        'body : LBRACE scope_enter statements scope_exit RBRACE'
+        p[0] = p[3]
+
+    def p_body_unclosed(self, p):
+        'body : LBRACE scope_enter statements scope_exit EOF'
+        self._ended += 1
+        if not self._eof_error:     # which already names the missing bracket
+            self._error("Syntax error at end of input: '{' is never closed",
+                        p.lineno(1), p.lexpos(1))
+        p[0] = p[3]
+
+    def p_statements(self, p):
+        '''statements : statement_list
+                      | statement_list error'''
+        p[0] = p[1]
+
+    def p_statements_error(self, p):
+        'statements : error'
+        p[0] = []
 
     def p_scope_enter(self, p):
         'scope_enter :'
-        new = self.symtab.enter_scope()
-        self.ic.emit('scope_enter', arg1=new)
-        p[0] = new
+        p[0] = None
 
     def p_scope_exit(self, p):
         'scope_exit :'
-        old = self.symtab.exit_scope()
-        self.ic.emit('scope_exit', arg1=old)
-        p[0] = old
+        p[0] = None
 
     # --- Declarations ---
     def p_declaration(self, p):
         'declaration : type ID'
-        typ, name = p[1], p[2]
-        err = self.symtab.add_symbol(name, typ)
-        if err:
-            self.errors.append(err)
-        p[0] = ('decl', typ, name)
+        p[0] = Decl(p[1], p[2], p.lineno(2), None, self._column(p.lexpos(2)))
+
+    def p_declaration_array(self, p):
+        '''declaration : type ID LBRACKET NUMBER RBRACKET
+                       | type ID LBRACKET ID RBRACKET'''
+        p[0] = Decl(p[1], p[2], p.lineno(2), p[4], self._column(p.lexpos(2)))
 
     def p_type(self, p):
         '''type : INT
@@ -69,61 +128,38 @@ class MiniParser:
     # --- Assignments ---
     def p_assignment(self, p):
         'assignment : ID ASSIGN expression'
-        name = p[1]
-        if not self.symtab.lookup(name):
-            self.errors.append(f"Undeclared variable '{name}'")
-        self.ic.emit('=', arg1=p[3], res=name)
-        p[0] = ('assign', name, p[3])
+        p[0] = Assign(p[1], p[3], p.lineno(1), self._column(p.lexpos(1)))
+
+    def p_assignment_index(self, p):
+        'assignment : ID LBRACKET expression RBRACKET ASSIGN expression'
+        p[0] = IndexAssign(p[1], p[3], p[6], p.lineno(1), self._column(p.lexpos(1)))
 
     # --- Print ---
     def p_print(self, p):
         'print_stmt : PRINT LPAREN expression RPAREN'
-        self.ic.emit('print', arg1=p[3])
-        p[0] = ('print', p[3])
+        p[0] = Print(p[3], p.lineno(1))
 
     # --- If Statements ---
     def p_if_stmt(self, p):
-        '''if_stmt : IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE
-                   | IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE ELSE LBRACE scope_enter statement_list scope_exit RBRACE'''
-        cond = p[3]
-        Lfalse = self.ic.new_label()
-        Lend = self.ic.new_label() if len(p) == 16 else None
-
-        # emit if_false
-        self.ic.emit('if_false', arg1=cond, res=Lfalse)
-
-        # THEN block (entered/exited already)
-        for stmt in p[7]:
-            self._emit_statement(stmt)
-
-        if len(p) == 10:  # IF without ELSE
-            self.ic.emit('label', res=Lfalse)
-        else:  # IF-ELSE
-            self.ic.emit('goto', res=Lend)
-            self.ic.emit('label', res=Lfalse)
-            # ELSE block
-            for stmt in p[14]:
-                self._emit_statement(stmt)
-            self.ic.emit('label', res=Lend)
-
-        p[0] = ('if', cond)
+        '''if_stmt : IF condition body
+                   | IF condition body ELSE body'''
+        if len(p) == 4:
+            p[0] = If(p[2], p[3], None, line=p.lineno(1))
+        else:
+            p[0] = If(p[2], p[3], None, p[5], None, line=p.lineno(1))
 
     # --- While Statements ---
     def p_while_stmt(self, p):
-        'while_stmt : WHILE LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE'
-        Lstart = self.ic.new_label()
-        Lend = self.ic.new_label()
-
-        self.ic.emit('label', res=Lstart)
-        cond = p[3]
-        self.ic.emit('if_false', arg1=cond, res=Lend)
+        'while_stmt : WHILE condition body'
+        p[0] = While(p[2], p[3], None, p.lineno(1))
 
-        for stmt in p[7]:
-            self._emit_statement(stmt)
+    def p_condition(self, p):
+        'condition : LPAREN expression RPAREN'
+        p[0] = p[2]
 
-        self.ic.emit('goto', res=Lstart)
-        self.ic.emit('label', res=Lend)
-        p[0] = ('while', cond)
+    def p_condition_error(self, p):
+        'condition : LPAREN error RPAREN'
+        p[0] = Num(0)               # stands in for the condition that did not parse
 
     # --- Expressions ---
     def p_expression_binop(self, p):
@@ -132,9 +168,7 @@ class MiniParser:
                       | expression TIMES expression
                       | expression DIVIDE expression
                       | expression MOD expression'''
-        t = self.ic.new_temp()
-        self.ic.emit(p[2], arg1=p[1], arg2=p[3], res=t)
-        p[0] = t
+        p[0] = BinOp(p[2], p[1], p[3])
 
     def p_expression_relop(self, p):
         '''expression : expression LT expression
@@ -143,9 +177,7 @@ class MiniParser:
                       | expression GE expression
                       | expression EQ expression
                       | expression NE expression'''
-        t = self.ic.new_temp()
-        self.ic.emit(p[2], arg1=p[1], arg2=p[3], res=t)
-        p[0] = t
+        p[0] = BinOp(p[2], p[1], p[3])
 
     def p_expression_paren(self, p):
         'expression : LPAREN expression RPAREN'
@@ -153,35 +185,79 @@ class MiniParser:
 
     def p_expression_number(self, p):
         'expression : NUMBER'
-        p[0] = p[1]
+        p[0] = Num(p[1])
 
     def p_expression_id(self, p):
         'expression : ID'
-        name = p[1]
-        if not self.symtab.lookup(name):
-            self.errors.append(f"Undeclared variable '{name}'")
-        p[0] = name
+        tok = p.slice[1]            # the most common reduction: one lookup, not three
+        p[0] = Var(tok.value, tok.lineno, self._column(tok.lexpos))
+
+    def p_expression_index(self, p):
+        'expression : ID LBRACKET expression RBRACKET'
+        p[0] = Index(p[1], p[3], p.lineno(1), self._column(p.lexpos(1)))
 
     # --- Error Handling ---
+    # PLY calls p_error for the first error and again only once three tokens
+    # have been shifted since, so one mistake is not reported over and over.
     def p_error(self, p):
-        if p:
-            self.errors.append(f"Syntax error at '{p.value}' (line {p.lineno})")
+        if p is not None and p.type != 'EOF':
+            self._error(f"Syntax error at '{p.value}'", p.lineno, p.lexpos)
         else:
-            self.errors.append("Syntax error at EOF — likely causes: missing semicolon, missing closing bracket, or missing parenthesis")
-
-    # --- Helpers ---
-    def _emit_statement(self, stmt):
-        if isinstance(stmt, tuple) and stmt[0] == 'block':
-            for s in stmt[1]:
-                self._emit_statement(s)
+            self._eof_error = True
+            self._error("Syntax error at end of input — likely causes: missing semicolon, "
+                        "missing closing bracket, or missing parenthesis",
+                        self._eof.lineno, self._eof.lexpos)
+
+    def _error(self, message, lineno, lexpos):
+        self.errors.append(f"{message} (line {lineno}, column {self._column(lexpos)})")
+
+    def _column(self, lexpos):
+        source = self.source
+        return lexpos - source.rfind('\n', 0, lexpos) if source is not None else 0
+
+    def _end(self, lexer):
+        """
+        EOF tokens for after the input: one for the program and one for each
+        block left open.  The rule an EOF ends is reduced by the time the
+        token after it is read; once error recovery throws one away, it
+        would throw away every one after it, so that ends them.
+        """
+        if self.source is not None:
+            pos = len(self.source)
+            line = lexer.lineno + self.source.count('\n', lexer.lexpos)
         else:
-            pass
+            pos, line = lexer.lexpos, lexer.lineno
+        self._eof = Token('EOF', '', line, pos)
+        given = 0
+        while not self._done and given - self._ended < 2:
+            given += 1
+            yield self._eof
+        while True:
+            yield None
 
     # --- Build and Parse ---
     def build(self):
-        self.parser = yacc.yacc(module=self, start='program')
-
-    def parse(self, data):
+        # Tables come from parsetab.py when its signature matches; nothing is
+        # written back and no parser.out is produced.
+        self.parser = yacc.yacc(module=self, start='program', debug=False, write_tables=False)
+
+    def parse(self, data, lexer=None, source=None):
+        """
+        Parse source text, or the tokens of lexer (a TokenStream) when data
+        is None; source is then the text they come from, if the errors and
+        the tree should have columns.  Returns the syntax tree and the error
+        list.  After syntax errors the tree holds the statements that did
+        parse; it is None only when nothing could be recovered.
+        lowering.lower() turns the tree into IC.
+        """
         self.errors = []
-        result = self.parser.parse(data, tracking=True)
+        if lexer is None:
+            lexer, source = TokenStream(MiniLexer().stream(data)), data
+        self.source = source
+        self._ended = 0
+        self._done = False
+        self._eof = None
+        self._eof_error = False
+        tokens = chain(iter(lexer.token, None), self._end(lexer)).__next__
+        result = self.parser.parse(None, lexer=lexer, tokenfunc=tokens)
         return result, self.errors
@@ -6,9 +6,9 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'programleftPLUSMINUSleftTIMESDIVIDEMODnonassocLTLEGTGEEQNEASSIGN AUTO BREAK CASE CHAR COMMA CONST CONTINUE DEFAULT DIVIDE DO DOUBLE ELSE ENUM EQ EXTERN FLOAT FOR GE GOTO GT ID IF INT LBRACE LBRACKET LE LONG LPAREN LT MINUS MOD NE NUMBER PLUS PRINT RBRACE RBRACKET REGISTER RETURN RPAREN SEMICOLON SHORT SIGNED SIZEOF STATIC STRING STRUCT SWITCH TIMES TYPEDEF UNION UNSIGNED VOID VOLATILE WHILEprogram : statement_liststatement_list : statement\n                          | statement_list statementstatement : declaration SEMICOLON\n                     | assignment SEMICOLON\n                     | print_stmt SEMICOLON\n                     | if_stmt\n                     | while_stmt\n                     | blockblock : LBRACE scope_enter statement_list scope_exit RBRACEscope_enter :scope_exit :declaration : type IDtype : INT\n                | FLOATassignment : ID ASSIGN expressionprint_stmt : PRINT LPAREN expression RPARENif_stmt : IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE\n                   | IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE ELSE LBRACE scope_enter statement_list scope_exit RBRACEwhile_stmt : WHILE LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACEexpression : expression PLUS expression\n                      | expression MINUS expression\n                      | expression TIMES expression\n                      | expression DIVIDE expression\n                      | expression MOD expressionexpression : expression LT expression\n                      | expression LE expression\n                      | expression GT expression\n                      | expression GE expression\n                      | expression EQ expression\n                      | expression NE expressionexpression : LPAREN expression RPARENexpression : NUMBERexpression : ID'
+_lr_signature = 'programleftPLUSMINUSleftTIMESDIVIDEMODnonassocLTLEGTGEEQNEASSIGN AUTO BREAK CASE CHAR COMMA CONST CONTINUE DEFAULT DIVIDE DO DOUBLE ELSE ENUM EOF EQ EXTERN FLOAT FOR GE GOTO GT ID IF INT LBRACE LBRACKET LE LONG LPAREN LT MINUS MOD NE NUMBER PLUS PRINT RBRACE RBRACKET REGISTER RETURN RPAREN SEMICOLON SHORT SIGNED SIZEOF STATIC STRING STRUCT SWITCH TIMES TYPEDEF UNION UNSIGNED VOID VOLATILE WHILEprogram : statement_list EOF\n                   | statement_list error EOFprogram : error EOFstatement_list : statement\n                          | statement_list statementstatement : declaration SEMICOLON\n                     | assignment SEMICOLON\n                     | print_stmt SEMICOLON\n                     | if_stmt\n                     | while_stmt\n                     | blockstatement : error SEMICOLONblock : bodybody : LBRACE scope_enter statements scope_exit RBRACEbody : LBRACE scope_enter statements scope_exit EOFstatements : statement_list\n                      | statement_list errorstatements : errorscope_enter :scope_exit :declaration : type IDdeclaration : type ID LBRACKET NUMBER RBRACKET\n                       | type ID LBRACKET ID RBRACKETtype : INT\n                | FLOATassignment : ID ASSIGN expressionassignment : ID LBRACKET expression RBRACKET ASSIGN expressionprint_stmt : PRINT LPAREN expression RPARENif_stmt : IF condition body\n                   | IF condition body ELSE bodywhile_stmt : WHILE condition bodycondition : LPAREN expression RPARENcondition : LPAREN error RPARENexpression : expression PLUS expression\n                      | expression MINUS expression\n                      | expression TIMES expression\n                      | expression DIVIDE expression\n                      | expression MOD expressionexpression : expression LT expression\n                      | expression LE expression\n                      | expression GT expression\n                      | expression GE expression\n                      | expression EQ expression\n                      | expression NE expressionexpression : LPAREN expression RPARENexpression : NUMBERexpression : IDexpression : ID LBRACKET expression RBRACKET'
     
-_lr_action_items = {'ID':([0,2,3,7,8,9,10,14,16,17,18,19,20,21,23,24,25,26,27,30,34,36,37,38,39,40,41,42,43,44,45,46,64,65,66,67,68,69,70,73,74,76,77,78,80,],[11,11,-2,-7,-8,-9,22,-11,-14,-15,-3,-4,-5,-6,28,28,28,11,28,28,11,28,28,28,28,28,28,28,28,28,28,28,-11,-10,-11,11,11,11,11,-18,-20,-11,11,11,-19,]),'PRINT':([0,2,3,7,8,9,14,18,19,20,21,26,34,64,65,66,67,68,69,70,73,74,76,77,78,80,],[12,12,-2,-7,-8,-9,-11,-3,-4,-5,-6,12,12,-11,-10,-11,12,12,12,12,-18,-20,-11,12,12,-19,]),'IF':([0,2,3,7,8,9,14,18,19,20,21,26,34,64,65,66,67,68,69,70,73,74,76,77,78,80,],[13,13,-2,-7,-8,-9,-11,-3,-4,-5,-6,13,13,-11,-10,-11,13,13,13,13,-18,-20,-11,13,13,-19,]),'WHILE':([0,2,3,7,8,9,14,18,19,20,21,26,34,64,65,66,67,68,69,70,73,74,76,77,78,80,],[15,15,-2,-7,-8,-9,-11,-3,-4,-5,-6,15,15,-11,-10,-11,15,15,15,15,-18,-20,-11,15,15,-19,]),'LBRACE':([0,2,3,7,8,9,14,18,19,20,21,26,34,49,51,64,65,66,67,68,69,70,73,74,75,76,77,78,80,],[14,14,-2,-7,-8,-9,-11,-3,-4,-5,-6,14,14,64,66,-11,-10,-11,14,14,14,14,-18,-20,76,-11,14,14,-19,]),'INT':([0,2,3,7,8,9,14,18,19,20,21,26,34,64,65,66,67,68,69,70,73,74,76,77,78,80,],[16,16,-2,-7,-8,-9,-11,-3,-4,-5,-6,16,16,-11,-10,-11,16,16,16,16,-18,-20,-11,16,16,-19,]),'FLOAT':([0,2,3,7,8,9,14,18,19,20,21,26,34,64,65,66,67,68,69,70,73,74,76,77,78,80,],[17,17,-2,-7,-8,-9,-11,-3,-4,-5,-6,17,17,-11,-10,-11,17,17,17,17,-18,-20,-11,17,17,-19,]),'$end':([1,2,3,7,8,9,18,19,20,21,65,73,74,80,],[0,-1,-2,-7,-8,-9,-3,-4,-5,-6,-10,-18,-20,-19,]),'RBRACE':([3,7,8,9,18,19,20,21,34,50,65,69,70,71,72,73,74,78,79,80,],[-2,-7,-8,-9,-3,-4,-5,-6,-12,65,-10,-12,-12,73,74,-18,-20,-12,80,-19,]),'SEMICOLON':([4,5,6,22,28,29,31,48,52,53,54,55,56,57,58,59,60,61,62,63,],[19,20,21,-13,-34,-16,-33,-17,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'ASSIGN':([11,],[23,]),'LPAREN':([12,13,15,23,24,25,27,30,36,37,38,39,40,41,42,43,44,45,46,],[24,25,27,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,]),'NUMBER':([23,24,25,27,30,36,37,38,39,40,41,42,43,44,45,46,],[31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,31,]),'PLUS':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,36,-33,36,36,36,36,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'MINUS':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,37,-33,37,37,37,37,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'TIMES':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,38,-33,38,38,38,38,38,38,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'DIVIDE':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,39,-33,39,39,39,39,39,39,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'MOD':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,40,-33,40,40,40,40,40,40,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'LT':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,41,-33,41,41,41,41,41,41,41,41,41,None,None,None,None,None,None,-32,]),'LE':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,42,-33,42,42,42,42,42,42,42,42,42,None,None,None,None,None,None,-32,]),'GT':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,43,-33,43,43,43,43,43,43,43,43,43,None,None,None,None,None,None,-32,]),'GE':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,44,-33,44,44,44,44,44,44,44,44,44,None,None,None,None,None,None,-32,]),'EQ':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,45,-33,45,45,45,45,45,45,45,45,45,None,None,None,None,None,None,-32,]),'NE':([28,29,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,46,-33,46,46,46,46,46,46,46,46,46,None,None,None,None,None,None,-32,]),'RPAREN':([28,31,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,63,],[-34,-33,48,49,51,63,-21,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,]),'ELSE':([73,],[75,]),}
+_lr_action_items = {'error':([0,2,4,8,9,10,15,19,22,24,25,26,27,33,35,44,47,49,89,90,91,],[3,21,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,46,50,-29,-31,72,-30,-14,-15,]),'ID':([0,2,4,8,9,10,11,15,17,18,19,22,24,25,26,27,29,30,31,33,35,37,40,44,47,49,53,54,55,56,57,58,59,60,61,62,63,64,88,89,90,91,],[12,12,-4,-9,-10,-11,28,-13,-24,-25,-19,-5,-12,-6,-7,-8,38,38,38,38,12,51,38,-29,-31,12,38,38,38,38,38,38,38,38,38,38,38,38,38,-30,-14,-15,]),'PRINT':([0,2,4,8,9,10,15,19,22,24,25,26,27,35,44,47,49,89,90,91,],[13,13,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,13,-29,-31,13,-30,-14,-15,]),'IF':([0,2,4,8,9,10,15,19,22,24,25,26,27,35,44,47,49,89,90,91,],[14,14,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,14,-29,-31,14,-30,-14,-15,]),'WHILE':([0,2,4,8,9,10,15,19,22,24,25,26,27,35,44,47,49,89,90,91,],[16,16,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,16,-29,-31,16,-30,-14,-15,]),'INT':([0,2,4,8,9,10,15,19,22,24,25,26,27,35,44,47,49,89,90,91,],[17,17,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,17,-29,-31,17,-30,-14,-15,]),'FLOAT':([0,2,4,8,9,10,15,19,22,24,25,26,27,35,44,47,49,89,90,91,],[18,18,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,18,-29,-31,18,-30,-14,-15,]),'LBRACE':([0,2,4,8,9,10,15,19,22,24,25,26,27,32,34,35,44,47,49,68,69,70,89,90,91,],[19,19,-4,-9,-10,-11,-13,-19,-5,-12,-6,-7,-8,19,19,19,-29,-31,19,19,-32,-33,-30,-14,-15,]),'$end':([1,20,23,36,],[0,-1,-3,-2,]),'EOF':([2,3,4,8,9,10,15,21,22,24,25,26,27,44,47,48,49,50,71,72,89,90,91,],[20,23,-4,-9,-10,-11,-13,36,-5,-12,-6,-7,-8,-29,-31,-20,-16,-18,91,-17,-30,-14,-15,]),'SEMICOLON':([3,5,6,7,21,28,38,39,41,50,67,72,73,74,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[24,25,26,27,24,-21,-47,-26,-46,24,-28,24,-23,-22,-34,-35,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,-27,]),'RBRACE':([4,8,9,10,15,22,24,25,26,27,44,47,48,49,50,71,72,89,90,91,],[-4,-9,-10,-11,-13,-5,-12,-6,-7,-8,-29,-31,-20,-16,-18,90,-17,-30,-14,-15,]),'ASSIGN':([12,66,],[29,88,]),'LBRACKET':([12,28,38,],[30,37,53,]),'LPAREN':([13,14,16,29,30,31,33,40,53,54,55,56,57,58,59,60,61,62,63,64,88,],[31,33,33,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'NUMBER':([29,30,31,33,37,40,53,54,55,56,57,58,59,60,61,62,63,64,88,],[41,41,41,41,52,41,41,41,41,41,41,41,41,41,41,41,41,41,41,]),'PLUS':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,54,-46,54,54,54,54,54,-34,-35,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,54,]),'MINUS':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,55,-46,55,55,55,55,55,-34,-35,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,55,]),'TIMES':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,56,-46,56,56,56,56,56,56,56,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,56,]),'DIVIDE':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,57,-46,57,57,57,57,57,57,57,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,57,]),'MOD':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,58,-46,58,58,58,58,58,58,58,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,58,]),'LT':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,59,-46,59,59,59,59,59,59,59,59,59,59,None,None,None,None,None,None,-45,-48,59,]),'LE':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,60,-46,60,60,60,60,60,60,60,60,60,60,None,None,None,None,None,None,-45,-48,60,]),'GT':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,61,-46,61,61,61,61,61,61,61,61,61,61,None,None,None,None,None,None,-45,-48,61,]),'GE':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,62,-46,62,62,62,62,62,62,62,62,62,62,None,None,None,None,None,None,-45,-48,62,]),'EQ':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,63,-46,63,63,63,63,63,63,63,63,63,63,None,None,None,None,None,None,-45,-48,63,]),'NE':([38,39,41,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,87,92,93,],[-47,64,-46,64,64,64,64,64,64,64,64,64,64,None,None,None,None,None,None,-45,-48,64,]),'RBRACKET':([38,41,42,51,52,75,76,77,78,79,80,81,82,83,84,85,86,87,92,],[-47,-46,66,73,74,92,-34,-35,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,]),'RPAREN':([38,41,43,45,46,65,76,77,78,79,80,81,82,83,84,85,86,87,92,],[-47,-46,67,69,70,87,-34,-35,-36,-37,-38,-39,-40,-41,-42,-43,-44,-45,-48,]),'ELSE':([44,90,91,],[68,-14,-15,]),}
 
 _lr_action = {}
 for _k, _v in _lr_action_items.items():
@@ -17,7 +17,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'program':([0,],[1,]),'statement_list':([0,26,67,68,77,],[2,34,69,70,78,]),'statement':([0,2,26,34,67,68,69,70,77,78,],[3,18,3,18,3,3,18,18,3,18,]),'declaration':([0,2,26,34,67,68,69,70,77,78,],[4,4,4,4,4,4,4,4,4,4,]),'assignment':([0,2,26,34,67,68,69,70,77,78,],[5,5,5,5,5,5,5,5,5,5,]),'print_stmt':([0,2,26,34,67,68,69,70,77,78,],[6,6,6,6,6,6,6,6,6,6,]),'if_stmt':([0,2,26,34,67,68,69,70,77,78,],[7,7,7,7,7,7,7,7,7,7,]),'while_stmt':([0,2,26,34,67,68,69,70,77,78,],[8,8,8,8,8,8,8,8,8,8,]),'block':([0,2,26,34,67,68,69,70,77,78,],[9,9,9,9,9,9,9,9,9,9,]),'type':([0,2,26,34,67,68,69,70,77,78,],[10,10,10,10,10,10,10,10,10,10,]),'scope_enter':([14,64,66,76,],[26,67,68,77,]),'expression':([23,24,25,27,30,36,37,38,39,40,41,42,43,44,45,46,],[29,32,33,35,47,52,53,54,55,56,57,58,59,60,61,62,]),'scope_exit':([34,69,70,78,],[50,71,72,79,]),}
+_lr_goto_items = {'program':([0,],[1,]),'statement_list':([0,35,],[2,49,]),'statement':([0,2,35,49,],[4,22,4,22,]),'declaration':([0,2,35,49,],[5,5,5,5,]),'assignment':([0,2,35,49,],[6,6,6,6,]),'print_stmt':([0,2,35,49,],[7,7,7,7,]),'if_stmt':([0,2,35,49,],[8,8,8,8,]),'while_stmt':([0,2,35,49,],[9,9,9,9,]),'block':([0,2,35,49,],[10,10,10,10,]),'type':([0,2,35,49,],[11,11,11,11,]),'body':([0,2,32,34,35,49,68,],[15,15,44,47,15,15,89,]),'condition':([14,16,],[32,34,]),'scope_enter':([19,],[35,]),'expression':([29,30,31,33,40,53,54,55,56,57,58,59,60,61,62,63,64,88,],[39,42,43,45,65,75,76,77,78,79,80,81,82,83,84,85,86,93,]),'statements':([35,],[48,]),'scope_exit':([48,],[71,]),}
 
 _lr_goto = {}
 for _k, _v in _lr_goto_items.items():
@@ -27,38 +27,52 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> program","S'",1,None,None,None),
-  ('program -> statement_list','program',1,'p_program','parser.py',21),
-  ('statement_list -> statement','statement_list',1,'p_statement_list','parser.py',25),
-  ('statement_list -> statement_list statement','statement_list',2,'p_statement_list','parser.py',26),
-  ('statement -> declaration SEMICOLON','statement',2,'p_statement','parser.py',30),
-  ('statement -> assignment SEMICOLON','statement',2,'p_statement','parser.py',31),
-  ('statement -> print_stmt SEMICOLON','statement',2,'p_statement','parser.py',32),
-  ('statement -> if_stmt','statement',1,'p_statement','parser.py',33),
-  ('statement -> while_stmt','statement',1,'p_statement','parser.py',34),
-  ('statement -> block','statement',1,'p_statement','parser.py',35),
-  ('block -> LBRACE scope_enter statement_list scope_exit RBRACE','block',5,'p_block','parser.py',40),
-  ('scope_enter -> <empty>','scope_enter',0,'p_scope_enter','parser.py',44),
-  ('scope_exit -> <empty>','scope_exit',0,'p_scope_exit','parser.py',50),
-  ('declaration -> type ID','declaration',2,'p_declaration','parser.py',57),
-  ('type -> INT','type',1,'p_type','parser.py',65),
-  ('type -> FLOAT','type',1,'p_type','parser.py',66),
-  ('assignment -> ID ASSIGN expression','assignment',3,'p_assignment','parser.py',71),
-  ('print_stmt -> PRINT LPAREN expression RPAREN','print_stmt',4,'p_print','parser.py',80),
-  ('if_stmt -> IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE','if_stmt',9,'p_if_stmt','parser.py',86),
-  ('if_stmt -> IF LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE ELSE LBRACE scope_enter statement_list scope_exit RBRACE','if_stmt',15,'p_if_stmt','parser.py',87),
-  ('while_stmt -> WHILE LPAREN expression RPAREN LBRACE scope_enter statement_list scope_exit RBRACE','while_stmt',9,'p_while_stmt','parser.py',113),
-  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','parser.py',130),
-  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','parser.py',131),
-  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','parser.py',132),
-  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','parser.py',133),
-  ('expression -> expression MOD expression','expression',3,'p_expression_binop','parser.py',134),
-  ('expression -> expression LT expression','expression',3,'p_expression_relop','parser.py',140),
-  ('expression -> expression LE expression','expression',3,'p_expression_relop','parser.py',141),
-  ('expression -> expression GT expression','expression',3,'p_expression_relop','parser.py',142),
-  ('expression -> expression GE expression','expression',3,'p_expression_relop','parser.py',143),
-  ('expression -> expression EQ expression','expression',3,'p_expression_relop','parser.py',144),
-  ('expression -> expression NE expression','expression',3,'p_expression_relop','parser.py',145),
-  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_paren','parser.py',151),
-  ('expression -> NUMBER','expression',1,'p_expression_number','parser.py',155),
-  ('expression -> ID','expression',1,'p_expression_id','parser.py',159),
+  ('program -> statement_list EOF','program',2,'p_program','parser.py',37),
+  ('program -> statement_list error EOF','program',3,'p_program','parser.py',38),
+  ('program -> error EOF','program',2,'p_program_error','parser.py',44),
+  ('statement_list -> statement','statement_list',1,'p_statement_list','parser.py',50),
+  ('statement_list -> statement_list statement','statement_list',2,'p_statement_list','parser.py',51),
+  ('statement -> declaration SEMICOLON','statement',2,'p_statement','parser.py',63),
+  ('statement -> assignment SEMICOLON','statement',2,'p_statement','parser.py',64),
+  ('statement -> print_stmt SEMICOLON','statement',2,'p_statement','parser.py',65),
+  ('statement -> if_stmt','statement',1,'p_statement','parser.py',66),
+  ('statement -> while_stmt','statement',1,'p_statement','parser.py',67),
+  ('statement -> block','statement',1,'p_statement','parser.py',68),
+  ('statement -> error SEMICOLON','statement',2,'p_statement_error','parser.py',72),
+  ('block -> body','block',1,'p_block','parser.py',79),
+  ('body -> LBRACE scope_enter statements scope_exit RBRACE','body',5,'p_body','parser.py',83),
+  ('body -> LBRACE scope_enter statements scope_exit EOF','body',5,'p_body_unclosed','parser.py',87),
+  ('statements -> statement_list','statements',1,'p_statements','parser.py',93),
+  ('statements -> statement_list error','statements',2,'p_statements','parser.py',94),
+  ('statements -> error','statements',1,'p_statements_error','parser.py',98),
+  ('scope_enter -> <empty>','scope_enter',0,'p_scope_enter','parser.py',102),
+  ('scope_exit -> <empty>','scope_exit',0,'p_scope_exit','parser.py',106),
+  ('declaration -> type ID','declaration',2,'p_declaration','parser.py',111),
+  ('declaration -> type ID LBRACKET NUMBER RBRACKET','declaration',5,'p_declaration_array','parser.py',115),
+  ('declaration -> type ID LBRACKET ID RBRACKET','declaration',5,'p_declaration_array','parser.py',116),
+  ('type -> INT','type',1,'p_type','parser.py',120),
+  ('type -> FLOAT','type',1,'p_type','parser.py',121),
+  ('assignment -> ID ASSIGN expression','assignment',3,'p_assignment','parser.py',126),
+  ('assignment -> ID LBRACKET expression RBRACKET ASSIGN expression','assignment',6,'p_assignment_index','parser.py',130),
+  ('print_stmt -> PRINT LPAREN expression RPAREN','print_stmt',4,'p_print','parser.py',135),
+  ('if_stmt -> IF condition body','if_stmt',3,'p_if_stmt','parser.py',140),
+  ('if_stmt -> IF condition body ELSE body','if_stmt',5,'p_if_stmt','parser.py',141),
+  ('while_stmt -> WHILE condition body','while_stmt',3,'p_while_stmt','parser.py',149),
+  ('condition -> LPAREN expression RPAREN','condition',3,'p_condition','parser.py',153),
+  ('condition -> LPAREN error RPAREN','condition',3,'p_condition_error','parser.py',157),
+  ('expression -> expression PLUS expression','expression',3,'p_expression_binop','parser.py',162),
+  ('expression -> expression MINUS expression','expression',3,'p_expression_binop','parser.py',163),
+  ('expression -> expression TIMES expression','expression',3,'p_expression_binop','parser.py',164),
+  ('expression -> expression DIVIDE expression','expression',3,'p_expression_binop','parser.py',165),
+  ('expression -> expression MOD expression','expression',3,'p_expression_binop','parser.py',166),
+  ('expression -> expression LT expression','expression',3,'p_expression_relop','parser.py',170),
+  ('expression -> expression LE expression','expression',3,'p_expression_relop','parser.py',171),
+  ('expression -> expression GT expression','expression',3,'p_expression_relop','parser.py',172),
+  ('expression -> expression GE expression','expression',3,'p_expression_relop','parser.py',173),
+  ('expression -> expression EQ expression','expression',3,'p_expression_relop','parser.py',174),
+  ('expression -> expression NE expression','expression',3,'p_expression_relop','parser.py',175),
+  ('expression -> LPAREN expression RPAREN','expression',3,'p_expression_paren','parser.py',179),
+  ('expression -> NUMBER','expression',1,'p_expression_number','parser.py',183),
+  ('expression -> ID','expression',1,'p_expression_id','parser.py',187),
+  ('expression -> ID LBRACKET expression RBRACKET','expression',4,'p_expression_index','parser.py',191),
 ]
@@ -0,0 +1,379 @@
+"""
+Peephole optimizer over the assembly CodeGenerator emits.
+
+The text is split into lines (instructions, labels and comments) and a
+window slides over them; at each position the rules in RULES are tried
+in order and the first one that matches replaces the lines it covers.
+Sweeps repeat until no rule fires.  Every rule only looks at a few
+instructions ahead and never past the end of a basic block, except jump
+threading and unused-label removal, which need the label table.
+
+The scratch registers (temp, temp2) are written and read within the
+code for a single quad, so they are dead at every label and jump; this
+is what lets a MOV into them be dropped once its value has been folded
+into the instructions that read it.
+
+    python peephole.py program.asm
+"""
+import sys
+from collections import Counter
+
+from vm import AssemblyError, assemble
+
+BINOPS = ('ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'SLT', 'SLE', 'SGT', 'SGE', 'SEQ', 'SNE',
+          'IADD', 'ISUB', 'IMUL', 'IDIV', 'IMOD', 'FADD', 'FSUB', 'FMUL', 'FDIV', 'FMOD')
+MOVES = ('MOV', 'LOAD', 'STORE', 'ALLOC', 'ITOF', 'FTOI')     # d, s, ...: write d, read s
+JUMPS = ('JMP', 'JE', 'JNE')
+WINDOW = 4          # instructions a rule may look ahead
+
+
+class Line:
+    __slots__ = ('kind', 'op', 'args', 'text')
+
+    def __init__(self, kind, op=None, args=(), text=''):
+        self.kind = kind            # 'ins', 'label' or 'comment'
+        self.op = op                # mnemonic, or the label name
+        self.args = list(args)
+        self.text = text            # comment text, kept verbatim
+
+    @classmethod
+    def parse(cls, raw):
+        line = raw.strip()
+        if not line or line.startswith(';'):
+            return cls('comment', text=raw)
+        code = line.split(';', 1)[0].strip()
+        if code.endswith(':'):
+            return cls('label', code[:-1].strip())
+        mnemonic, _, rest = code.partition(' ')
+        args = [a.strip() for a in rest.split(',')] if rest.strip() else []
+        return cls('ins', mnemonic.upper(), args)
+
+    def with_args(self, *args):
+        return Line('ins', self.op, args)
+
+    def reads(self):
+        """Operands whose value the instruction uses."""
+        if self.op in MOVES:
+            return self.args[1:2]
+        if self.op == 'LDX':
+            return self.args[1:3]
+        if self.op == 'STX':
+            return self.args[:3]
+        if self.op in BINOPS or self.op == 'CMP':
+            return self.args[:2]
+        if self.op == 'OUT':
+            return self.args[:1]
+        return []
+
+    def writes(self):
+        if self.op in MOVES or self.op == 'LDX' or self.op in BINOPS:
+            return self.args[0]
+        return None
+
+    def __str__(self):
+        if self.kind == 'label':
+            return f"{self.op}:"
+        if self.kind == 'comment':
+            return self.text
+        return f"    {self.op} {', '.join(self.args)}"
+
+
+def _is_imm(x):
+    return x.startswith('#') or x[:1].isdigit() or x[:1] == '-'
+
+
+def _imm_value(x):
+    x = x.lstrip('#')
+    return float(x) if '.' in x else int(x)
+
+
+class _Context:
+    """Label table of the current sweep."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.labels = {l.op: i for i, l in enumerate(lines) if l.kind == 'label'}
+        self.refs = Counter(l.args[0] for l in lines if l.kind == 'ins' and l.op in JUMPS)
+
+    def first_ins(self, label):
+        """The instruction control reaches first after jumping to label."""
+        i = self.labels[label]
+        while i < len(self.lines) and self.lines[i].kind != 'ins':
+            i += 1
+        return self.lines[i] if i < len(self.lines) else None
+
+
+def _ahead(lines, i):
+    """(index, line) of the instructions after i up to the end of the block."""
+    seen = 0
+    for j in range(i + 1, len(lines)):
+        l = lines[j]
+        if l.kind == 'label':
+            return
+        if l.kind == 'ins':
+            yield j, l
+            seen += 1
+            if l.op in JUMPS or seen == WINDOW:
+                return
+
+
+# --- Rules ---
+# Each rule gets (lines, i, ctx, scratch) and returns None or
+# (number of lines consumed from i, replacement lines).
+
+def self_move(lines, i, ctx, scratch):
+    l = lines[i]
+    if l.kind == 'ins' and l.op == 'MOV' and l.args[0] == l.args[1]:
+        return 1, []
+
+
+def immediate_operand(lines, i, ctx, scratch):
+    """MOV s, #k / ... / OP d, s  ->  ... / OP d, #k  for a scratch s."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op != 'MOV' or l.args[0] not in scratch or not _is_imm(l.args[1]):
+        return None
+    s, k = l.args
+    out = []
+    last = None
+    ended = False
+    for j, ins in _ahead(lines, i):
+        if s in ins.reads():
+            # the destination of an instruction cannot be an immediate
+            if ins.writes() == s:
+                return None
+            ins = ins.with_args(*[k if a == s else a for a in ins.args])
+            last = j
+        elif ins.writes() == s:
+            ended = True
+        out.append((j, ins))
+        if ended or ins.op in JUMPS:
+            ended = True
+            break
+    else:
+        # fell off the window: fine only if it stopped at the end of the block
+        ended = not any(True for _ in _ahead(lines, out[-1][0])) if out else True
+    if last is None or not ended:
+        return None
+    new = [lines[j] for j in range(i + 1, last + 1)]
+    for j, ins in out:
+        if j <= last:
+            new[j - i - 1] = ins
+    return last - i + 1, new
+
+
+def dead_move(lines, i, ctx, scratch):
+    """A MOV/LOAD whose destination is overwritten, or dead, before it is read."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op not in ('MOV', 'LOAD'):
+        return None
+    d = l.args[0]
+    count = 0
+    for j, ins in _ahead(lines, i):
+        count += 1
+        if d in ins.reads() or (ins.op in BINOPS and ins.args[0] == d):
+            return None
+        if ins.writes() == d:
+            return 1, []
+        if ins.op in JUMPS:
+            break
+    else:
+        if count == WINDOW:
+            return None
+    return (1, []) if d in scratch else None
+
+
+def constant_branch(lines, i, ctx, scratch):
+    """CMP #a, #b / JE L  ->  JMP L or nothing."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op != 'CMP' or not all(_is_imm(a) for a in l.args):
+        return None
+    if i + 1 >= len(lines) or lines[i + 1].kind != 'ins' or lines[i + 1].op not in ('JE', 'JNE'):
+        return None
+    jump = lines[i + 1]
+    equal = _imm_value(l.args[0]) == _imm_value(l.args[1])
+    if equal == (jump.op == 'JE'):
+        return 2, [Line('ins', 'JMP', jump.args)]
+    return 2, []
+
+
+def jump_threading(lines, i, ctx, scratch):
+    """A jump to a label whose first instruction is JMP M goes to M directly."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op not in JUMPS:
+        return None
+    target = l.args[0]
+    seen = {target}
+    while True:
+        first = ctx.first_ins(target)
+        if first is None or first.op != 'JMP':
+            break
+        target = first.args[0]
+        if target in seen:
+            return None             # a cycle of jumps; leave it alone
+        seen.add(target)
+    if target == l.args[0]:
+        return None
+    return 1, [l.with_args(target)]
+
+
+def jump_to_next(lines, i, ctx, scratch):
+    """JMP L where L is the next label; only labels and comments in between."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op != 'JMP':
+        return None
+    for j in range(i + 1, len(lines)):
+        nxt = lines[j]
+        if nxt.kind == 'label' and nxt.op == l.args[0]:
+            return 1, []
+        if nxt.kind == 'ins':
+            return None
+    return None
+
+
+def unreachable(lines, i, ctx, scratch):
+    """Instructions between a JMP and the next label never run."""
+    l = lines[i]
+    if l.kind != 'ins' or l.op != 'JMP':
+        return None
+    j = i + 1
+    kept = [l]
+    while j < len(lines) and lines[j].kind != 'label':
+        if lines[j].kind == 'comment':
+            kept.append(lines[j])
+        j += 1
+    if len(kept) == j - i:
+        return None
+    return j - i, kept
+
+
+def unused_label(lines, i, ctx, scratch):
+    """Labels nothing jumps to; dropping them lets the assembler fuse across them."""
+    l = lines[i]
+    if l.kind == 'label' and not ctx.refs[l.op]:
+        return 1, []
+
+
+def _scope_event(line):
+    if line.kind != 'comment':
+        return None
+    text = line.text.strip()
+    if not text.startswith('; --'):
+        return None
+    events = []
+    for part in text[4:].split(','):
+        words = part.split()
+        if len(words) != 3 or words[0] not in ('enter', 'exit') or words[1] != 'scope':
+            return None
+        events.append((words[0], words[2]))
+    return events
+
+
+def scope_comments(lines, i, ctx, scratch):
+    """
+    Back-to-back scope comments become one line, and an 'enter scope n'
+    directly followed by 'exit scope n' (an empty block) disappears.
+    """
+    events = _scope_event(lines[i])
+    if events is None:
+        return None
+    j = i + 1
+    while j < len(lines) and _scope_event(lines[j]) is not None:
+        events += _scope_event(lines[j])
+        j += 1
+    kept = []
+    for ev in events:
+        if kept and kept[-1][0] == 'enter' and ev == ('exit', kept[-1][1]):
+            kept.pop()
+        else:
+            kept.append(ev)
+    if j - i == 1 and len(kept) == len(events):
+        return None
+    if not kept:
+        return j - i, []
+    text = '; -- ' + ', '.join(f"{kind} scope {n}" for kind, n in kept)
+    return j - i, [Line('comment', text=text)]
+
+
+RULES = [
+    ('self-move', self_move),
+    ('constant-branch', constant_branch),
+    ('immediate-operand', immediate_operand),
+    ('dead-move', dead_move),
+    ('jump-threading', jump_threading),
+    ('jump-to-next', jump_to_next),
+    ('unreachable', unreachable),
+    ('unused-label', unused_label),
+    ('scope-comments', scope_comments),
+]
+
+
+class Peephole:
+    def __init__(self, rules=None, scratch=('temp', 'temp2'), max_sweeps=20):
+        self.rules = [(name, fn) for name, fn in RULES if rules is None or name in rules]
+        self.scratch = frozenset(scratch)
+        self.max_sweeps = max_sweeps
+        self.counts = Counter()     # rule -> times it fired
+        self.before = 0             # instructions in / out of the last run
+        self.after = 0
+
+    def run(self, asm):
+        """Optimized copy of the assembly text."""
+        lines = [Line.parse(raw) for raw in asm.split('\n')]
+        self.counts = Counter()
+        self.before = sum(1 for l in lines if l.kind == 'ins')
+        for _ in range(self.max_sweeps):
+            lines, changed = self._sweep(lines)
+            if not changed:
+                break
+        self.after = sum(1 for l in lines if l.kind == 'ins')
+        return '\n'.join(str(l) for l in lines)
+
+    def _sweep(self, lines):
+        ctx = _Context(lines)
+        out = []
+        changed = False
+        i = 0
+        while i < len(lines):
+            for name, rule in self.rules:
+                hit = rule(lines, i, ctx, self.scratch)
+                if hit is not None:
+                    used, new = hit
+                    self.counts[name] += 1
+                    out.extend(new)
+                    i += used
+                    changed = True
+                    break
+            else:
+                out.append(lines[i])
+                i += 1
+        return out, changed
+
+    def format_report(self):
+        lines = [f"; peephole: {self.before} -> {self.after} instructions"]
+        for name, _ in self.rules:
+            if self.counts[name]:
+                lines.append(f"; {name:<18} {self.counts[name]:6}x")
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python peephole.py program.asm", file=sys.stderr)
+        return 2
+    with open(argv[0], encoding='utf-8') as f:
+        text = f.read()
+    opt = Peephole()
+    out = opt.run(text)
+    try:
+        assemble(out)
+    except AssemblyError as e:
+        print(f"Assembly error: {e}", file=sys.stderr)
+        return 1
+    print(out)
+    print(opt.format_report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
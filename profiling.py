@@ -0,0 +1,134 @@
+"""
+Per-phase timings and counters for one compile.
+
+CompilerSession.profile(code) times every phase and counts what each one
+produced.  memory=True adds tracemalloc peaks and cprofile=True the top
+functions by cumulative time.  to_record() is the JSON form (batch.py
+--profile), format() the text of the GUI's Profile tab.
+
+    python profiling.py program.mc [--memory] [--cprofile]
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+TOP_FUNCTIONS = 25      # cProfile rows kept in a report
+
+
+class Profile:
+    def __init__(self, cprofile=False, memory=False):
+        self.phases = []            # (phase, seconds, peak traced bytes or None)
+        self.counters = {}
+        self.memory = memory
+        self.peak_memory = None     # bytes, with memory=True
+        self.functions = []         # cProfile rows, with cprofile=True
+        self._profiler = cProfile.Profile() if cprofile else None
+        self._own_trace = False
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds, _ in self.phases)
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_trace = True
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.functions = _top_functions(self._profiler)
+            self._profiler = None
+        if self.memory:
+            peaks = [peak for _, _, peak in self.phases if peak is not None]
+            self.peak_memory = max(peaks, default=0)
+            if self._own_trace:
+                tracemalloc.stop()
+                self._own_trace = False
+
+    @contextmanager
+    def phase(self, name):
+        if self.memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] if self.memory else None
+            self.phases.append((name, seconds, peak))
+
+    def count(self, **counters):
+        self.counters.update(counters)
+
+    def to_record(self):
+        return {
+            'total_seconds': self.total,
+            'phases': [{'phase': name, 'seconds': seconds, 'peak_bytes': peak}
+                       for name, seconds, peak in self.phases],
+            'counters': dict(self.counters),
+            'peak_memory': self.peak_memory,
+            'functions': self.functions,
+        }
+
+    def format(self):
+        total = self.total or 1e-12
+        lines = [f"{'phase':<28} {'ms':>10} {'%':>6}" + ("  peak KiB" if self.memory else "")]
+        for name, seconds, peak in self.phases:
+            line = f"{name:<28} {seconds * 1000:10.2f} {100 * seconds / total:6.1f}"
+            if peak is not None:
+                line += f"  {peak / 1024:8.0f}"
+            lines.append(line)
+        lines.append(f"{'total':<28} {self.total * 1000:10.2f}")
+        lines.append("")
+        lines.extend(f"{name:<28} {value}" for name, value in self.counters.items())
+        if self.peak_memory is not None:
+            lines.append(f"{'peak memory (KiB)':<28} {self.peak_memory / 1024:.0f}")
+        if self.functions:
+            lines.append("")
+            lines.append(f"{'calls':>10} {'tottime':>9} {'cumtime':>9}  function")
+            for f in self.functions:
+                lines.append(f"{f['calls']:>10} {f['tottime']:9.4f} {f['cumtime']:9.4f}  {f['function']}")
+        return "\n".join(lines)
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (path, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({'function': f"{func} ({path}:{line})", 'calls': calls,
+                     'tottime': tottime, 'cumtime': cumtime})
+    rows.sort(key=lambda r: r['cumtime'], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Profile one compile, phase by phase.")
+    ap.add_argument('source', help="source file")
+    ap.add_argument('-O', dest='opt_level', type=int, default=0, help="optimization level")
+    ap.add_argument('--memory', action='store_true', help="trace peak memory per phase")
+    ap.add_argument('--cprofile', action='store_true', help="keep the top functions from cProfile")
+    ap.add_argument('--json', action='store_true', help="print the JSON report instead of text")
+    args = ap.parse_args(argv)
+
+    from session import CompilerSession
+    with open(args.source, encoding='utf-8') as f:
+        code = f.read()
+    _, profile = CompilerSession(opt_level=args.opt_level).profile(code, args.cprofile, args.memory)
+    if args.json:
+        json.dump(profile.to_record(), sys.stdout, indent=2)
+        print()
+    else:
+        print(profile.format())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""
+Python backend: turns the intermediate code of a whole program into Python
+source and lets CPython's compiler do the rest.
+
+The label/if_false/goto patterns lowering.py produces are rebuilt into
+structured code:
+
+    label Ls; <cond>; if_false c Le; <body>; goto Ls; label Le
+        -> while True: <cond>; if not c: break; <body>
+    if_false c Lf; <then>; goto Le; label Lf; <else>; label Le
+        -> if c: <then> else: <else>
+    if_false c Lf; <then>; label Lf
+        -> if c: <then>
+    label Lb; <body>; if_true c Lb          (a rotated loop)
+        -> while True: <body>; if not c: break
+
+Every variable is a local of one generated function, and temps that are
+used exactly once by the next quad are folded into that quad's expression.
+Division and remainder are int or float versions picked with
+ic_types.infer(), with plain // and % for an int divided by a positive
+constant.
+A loop vectorize.py can run as whole-array operations is tried that way
+first, with the loop itself as the fallback.
+Code that does not match these shapes (or nests deeper than CPython
+allows) falls back to a block-dispatch loop.  Compiled code objects are
+cached per program by a hash of the generated source.
+
+    python python_generator.py program.mc
+"""
+import hashlib
+import sys
+from collections import OrderedDict
+
+from ic_types import infer
+from runtime import (ExecutionError, RunResult, fdiv, fmod, ftoi, idiv, imod, itof, load,
+                     new_array, store)
+from intermediate_code import CONVERSIONS, IntermediateCode
+from vectorize import find_loops
+
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+BIN_EXPR = {
+    '+': '{a} + {b}',
+    '-': '{a} - {b}',
+    '*': '{a} * {b}',
+    '/': 'idiv({a}, {b})',
+    '%': 'imod({a}, {b})',
+}
+FLOAT_BIN_EXPR = dict(BIN_EXPR, **{'/': 'fdiv({a}, {b})', '%': 'fmod({a}, {b})'})
+# an int name divided by a positive constant; {a} appears twice, so never an expression
+CONST_DIV_EXPR = {
+    '/': '{a} // {b} if {a} >= 0 else -(-{a} // {b})',
+    '%': '{a} % {b} if {a} >= 0 else -(-{a} % {b})',
+}
+
+CODE_CACHE_SIZE = 256
+_code_cache = OrderedDict()     # source hash -> code object
+
+
+class _Unstructured(Exception):
+    """The quads do not form one of the structured shapes."""
+
+
+def _is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+class PythonGenerator:
+    def __init__(self, ic, symtab=None, vectorize=True):
+        self.ic = ic
+        self.symtab = symtab
+        self.vectorize = vectorize
+        self.lines = []
+        self.vector_loops = []          # run() of loop n is vec<n> in the generated code
+        self.types = {}                 # name -> 'int' or 'float'
+
+    # --- Analysis ---
+    def _prepare(self):
+        self.quads = [q for q in self.ic.code if q.get('op') not in ('scope_enter', 'scope_exit')]
+        self.types = infer(self.ic)
+        self.vector_loops = find_loops(self.quads) if self.vectorize else []
+        self.names = {}                 # IC name -> Python identifier
+        self.label_at = {}
+        self.refs = {}                  # label -> indices of quads that jump to it
+        uses = {}
+        for i, q in enumerate(self.quads):
+            op = q['op']
+            if op == 'label':
+                self.label_at[q.get('res') or q.get('arg1')] = i
+            elif op in ('goto', 'if_false', 'if_true'):
+                label = q.get('res') or q.get('arg1')
+                self.refs.setdefault(label, []).append(i)
+            if op in ('label', 'goto'):
+                continue
+            for key in ('arg1', 'arg2', 'res'):
+                x = q.get(key)
+                if op in ('if_false', 'if_true') and key == 'res':
+                    continue
+                if x not in ('', None) and not _is_const(x):
+                    self._name(x)
+                    if key != 'res':
+                        uses[x] = uses.get(x, 0) + 1
+
+        # temps folded into the quad that immediately follows their definition
+        self.foldable = set()
+        for i, q in enumerate(self.quads[:-1]):
+            res = q.get('res')
+            if (q['op'] in BIN_EXPR or q['op'] in REL_OPS or q['op'] in CONVERSIONS
+                    or q['op'] in ('=', '=[]')):
+                if IntermediateCode.is_temp(res) and uses.get(res) == 1:
+                    nxt = self.quads[i + 1]
+                    if nxt['op'] != 'label' and res in (nxt.get('arg1'), nxt.get('arg2')):
+                        self.foldable.add(i)
+
+    def _name(self, x):
+        if x not in self.names:
+            if isinstance(x, str) and '@' in x:
+                name, scope = x.split('@')      # a shadowing declaration
+                self.names[x] = f"s{scope}_{name}"
+            else:
+                self.names[x] = f"v_{x}"
+        return self.names[x]
+
+    # --- Expressions ---
+    def _operand(self, x):
+        if _is_const(x):
+            return repr(x)
+        if x in self.pending:
+            return self.pending.pop(x)
+        return self.names[x]
+
+    def _expr(self, q):
+        op = q['op']
+        a1, a2 = q.get('arg1'), q.get('arg2')
+        folded = not _is_const(a1) and a1 in self.pending
+        a = self._operand(a1)
+        if op == '=':
+            return a
+        if op in CONVERSIONS:
+            return f"{op}({a})"
+        b = self._operand(a2)
+        if op == '=[]':
+            return f"load({a}, {b})"
+        if op in REL_OPS:
+            return f"(1 if {a} {op} {b} else 0)"
+        if type(a1) is float or type(a2) is float or 'float' in (self.types.get(a1),
+                                                                 self.types.get(a2)):
+            return f"({FLOAT_BIN_EXPR[op].format(a=a, b=b)})"
+        if op in CONST_DIV_EXPR and type(a2) is int and a2 > 0 and not folded:
+            return f"({CONST_DIV_EXPR[op].format(a=a, b=b)})"
+        return f"({BIN_EXPR[op].format(a=a, b=b)})"
+
+    def _cond(self, x):
+        """Python truth test for an if_false/if_true operand."""
+        if not _is_const(x) and x in self.pending_rel:
+            self.pending.pop(x, None)
+            return self.pending_rel.pop(x)
+        return f"{self._operand(x)} != 0"
+
+    def _emit(self, depth, text):
+        self.lines.append("    " * depth + text)
+
+    def _straight(self, i, depth):
+        q = self.quads[i]
+        op = q['op']
+        if op == 'print':
+            self._emit(depth, f"emit({self._operand(q.get('arg1'))})")
+            return
+        if op == '[]=':
+            # the index comes first: its quads ran before the value's
+            index = self._operand(q.get('arg2'))
+            self._emit(depth, f"store({self.names[q['res']]}, {index}, {self._operand(q.get('arg1'))})")
+            return
+        if op == 'array':
+            self._emit(depth, f"{self.names[q['res']]} = "
+                              f"new_array({self._operand(q.get('arg1'))}, {q.get('arg2')!r})")
+            return
+        res = q.get('res')
+        if i in self.foldable:
+            if op in REL_OPS:
+                a, b = self._operand(q.get('arg1')), self._operand(q.get('arg2'))
+                self.pending_rel[res] = f"{a} {op} {b}"
+                self.pending[res] = f"(1 if {a} {op} {b} else 0)"
+            else:
+                self.pending[res] = self._expr(q)
+            return
+        expr = self._expr(q)
+        if expr.startswith('(') and expr.endswith(')') and op != '=':
+            expr = expr[1:-1]
+        self._emit(depth, f"{self.names[res]} = {expr}")
+
+    # --- Structuring ---
+    def _within(self, label, lo, hi):
+        return all(lo <= r < hi for r in self.refs.get(label, ()))
+
+    def _match_while(self, i, hi):
+        start = self.quads[i].get('res') or self.quads[i].get('arg1')
+        gotos = [r for r in self.refs.get(start, ()) if i < r < hi
+                 and self.quads[r]['op'] == 'goto']
+        if not gotos:
+            return None
+        j = max(gotos)
+        if j + 1 >= hi or self.quads[j + 1]['op'] != 'label':
+            return None
+        end = self.quads[j + 1].get('res') or self.quads[j + 1].get('arg1')
+        k = i + 1
+        while k < j and self.quads[k]['op'] not in ('label', 'goto', 'if_false', 'if_true'):
+            k += 1
+        q = self.quads[k]
+        if q['op'] != 'if_false' or q.get('res') != end:
+            return None
+        if not (self._within(start, i, j + 1) and self._within(end, i, j + 1)):
+            return None
+        return k, j, start, end
+
+    def _match_do_while(self, i, hi):
+        top = self.quads[i].get('res') or self.quads[i].get('arg1')
+        refs = self.refs.get(top, ())
+        if not refs or not all(i < r < hi for r in refs):
+            return None
+        j = max(refs)
+        return j if self.quads[j]['op'] == 'if_true' else None
+
+    def _block(self, lo, hi, depth, loops):
+        start_len = len(self.lines)
+        i = lo
+        while i < hi:
+            q = self.quads[i]
+            op = q['op']
+            if i in self.vector_at:
+                n, loop = self.vector_at.pop(i)
+                names = ", ".join(self.names[x] for x in loop.names)
+                self._emit(depth, f"out = vec{n}(({names},))")
+                self._emit(depth, "if out is not None:")
+                self._emit(depth + 1, f"{names}, = out")
+                self._emit(depth, "else:")
+                self._block(i, loop.end + 1, depth + 1, loops)
+                i = loop.end + 1
+                continue
+            if op == 'label':
+                w = self._match_while(i, hi)
+                if w:
+                    k, j, start, end = w
+                    self._emit(depth, "while True:")
+                    for c in range(i + 1, k):
+                        self._straight(c, depth + 1)
+                    self._emit(depth + 1, f"if not ({self._cond(self.quads[k].get('arg1'))}): break")
+                    self._block(k + 1, j, depth + 1, loops + [(start, end)])
+                    i = j + 2
+                    continue
+                j = self._match_do_while(i, hi)
+                if j is not None:
+                    top = q.get('res') or q.get('arg1')
+                    self._emit(depth, "while True:")
+                    self._block(i + 1, j, depth + 1, loops + [(top, None)])
+                    self._emit(depth + 1, f"if not ({self._cond(self.quads[j].get('arg1'))}): break")
+                    i = j + 1
+                    continue
+                if self.refs.get(q.get('res') or q.get('arg1')):
+                    raise _Unstructured()
+                i += 1
+            elif op == 'if_false':
+                false = q.get('res')
+                if loops and false == loops[-1][1]:
+                    self._emit(depth, f"if not ({self._cond(q.get('arg1'))}): break")
+                    i += 1
+                    continue
+                m = self.label_at.get(false)
+                if m is None or not (i < m < hi) or len(self.refs[false]) != 1:
+                    raise _Unstructured()
+                cond = self._cond(q.get('arg1'))
+                prev = self.quads[m - 1]
+                end = prev.get('res') if prev['op'] == 'goto' and m - 1 > i else None
+                p = self.label_at.get(end)
+                if (p is not None and m < p < hi and len(self.refs[end]) == 1
+                        and all(end not in pair for pair in loops)):
+                    self._emit(depth, f"if {cond}:")
+                    self._block(i + 1, m - 1, depth + 1, loops)
+                    self._emit(depth, "else:")
+                    self._block(m + 1, p, depth + 1, loops)
+                    i = p + 1
+                else:
+                    self._emit(depth, f"if {cond}:")
+                    self._block(i + 1, m, depth + 1, loops)
+                    i = m + 1
+            elif op == 'if_true':
+                label = q.get('res')
+                if loops and label == loops[-1][0]:
+                    self._emit(depth, f"if {self._cond(q.get('arg1'))}: continue")
+                elif loops and label == loops[-1][1]:
+                    self._emit(depth, f"if {self._cond(q.get('arg1'))}: break")
+                else:
+                    raise _Unstructured()
+                i += 1
+            elif op == 'goto':
+                label = q.get('res') or q.get('arg1')
+                if loops and label == loops[-1][0]:
+                    self._emit(depth, "continue")
+                elif loops and label == loops[-1][1]:
+                    self._emit(depth, "break")
+                else:
+                    raise _Unstructured()
+                i += 1
+            else:
+                self._straight(i, depth)
+                i += 1
+        if len(self.lines) == start_len:
+            self._emit(depth, "pass")
+
+    # --- Fallback: one dispatch loop over basic blocks ---
+    def _dispatch(self, depth):
+        self.pending, self.pending_rel = {}, {}
+        self.foldable = set()
+        block_of = {}
+        leaders = [0]
+        for i, q in enumerate(self.quads):
+            if q['op'] == 'label':
+                leaders.append(i)
+        leaders = sorted(set(leaders))
+        for b, idx in enumerate(leaders):
+            block_of[idx] = b
+        label_block = {label: block_of[i] for label, i in self.label_at.items()}
+
+        self._emit(depth, "pc = 0")
+        self._emit(depth, "while True:")
+        for b, lo in enumerate(leaders):
+            hi = leaders[b + 1] if b + 1 < len(leaders) else len(self.quads)
+            self._emit(depth + 1, f"{'if' if b == 0 else 'elif'} pc == {b}:")
+            body = depth + 2
+            ended = False
+            for i in range(lo, hi):
+                q = self.quads[i]
+                op = q['op']
+                if op == 'label':
+                    continue
+                if op == 'goto':
+                    self._emit(body, f"pc = {label_block[q.get('res') or q.get('arg1')]}")
+                    self._emit(body, "continue")
+                    ended = True
+                    break
+                if op in ('if_false', 'if_true'):
+                    test = '==' if op == 'if_false' else '!='
+                    self._emit(body, f"if {self._operand(q.get('arg1'))} {test} 0:")
+                    self._emit(body + 1, f"pc = {label_block[q.get('res')]}")
+                    self._emit(body + 1, "continue")
+                else:
+                    self._straight(i, body)
+            if not ended:
+                self._emit(body, f"pc = {b + 1}")
+        self._emit(depth + 1, "else:")
+        self._emit(depth + 2, "break")
+
+    def generate(self):
+        """Return Python source defining program(emit) -> {name: value}."""
+        self._prepare()
+        for label in self.refs:
+            if label not in self.label_at:
+                raise ExecutionError(f"Undefined label '{label}'")
+
+        head = ["def program(emit):"]
+        head += [f"    {py} = 0" for py in self.names.values()]
+        tail = ["    return {" + ", ".join(f"{ic!r}: {py}" for ic, py in self.names.items()) + "}"]
+
+        self.lines = []
+        self.pending, self.pending_rel = {}, {}
+        self.vector_at = {loop.start: (n, loop) for n, loop in enumerate(self.vector_loops)}
+        try:
+            self._block(0, len(self.quads), 1, [])
+            self.source = "\n".join(head + self.lines + tail)
+            compile_program(self.source)
+        except (_Unstructured, SyntaxError, RecursionError):
+            # unusual control flow, or nesting deeper than CPython allows
+            self.lines = []
+            self._dispatch(1)
+            self.source = "\n".join(head + self.lines + tail)
+        return self.source
+
+
+def compile_program(source):
+    """Code object for generated source, cached by its hash."""
+    key = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    code = _code_cache.get(key)
+    if code is not None:
+        _code_cache.move_to_end(key)
+        return code
+    code = compile(source, f'<program {key[:12]}>', 'exec')
+    _code_cache[key] = code
+    if len(_code_cache) > CODE_CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return code
+
+
+def run_program(ic, symtab=None, vectorize=True):
+    """Transpile, compile (or reuse) and run a program; returns a RunResult."""
+    gen = PythonGenerator(ic, symtab, vectorize)
+    source = gen.generate()
+    ns = {'idiv': idiv, 'imod': imod, 'fdiv': fdiv, 'fmod': fmod, 'itof': itof, 'ftoi': ftoi,
+          'new_array': new_array, 'load': load, 'store': store}
+    for n, loop in enumerate(gen.vector_loops):
+        ns[f'vec{n}'] = loop.run
+    exec(compile_program(source), ns)
+    out = []
+    variables = ns['program'](out.append)
+    return RunResult(out, variables)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python python_generator.py program.mc", file=sys.stderr)
+        return 2
+    from session import CompilerSession
+
+    with open(argv[0], encoding='utf-8') as f:
+        result = CompilerSession().compile(f.read())
+    if result.errors:
+        for err in result.errors:
+            print(err, file=sys.stderr)
+        return 1
+    for value in run_program(result.ic, result.symtab).output:
+        print(value)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
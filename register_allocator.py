@@ -0,0 +1,162 @@
+"""
+Liveness analysis and linear-scan register allocation over the IC.
+
+liveness() runs the usual backward dataflow over the basic blocks of the
+CFG.  From each block's live-in/live-out sets and the positions of uses
+and definitions, every name gets one live interval [first, last] in
+program order; a value that is live around a loop's back edge therefore
+covers the whole loop.  allocate() then assigns registers with Poletto &
+Sarkar's linear scan: intervals are visited by start point, registers of
+intervals that ended before it are freed for reuse, and when all
+max_regs registers are taken the interval that ends furthest away is
+spilled to memory.
+"""
+
+from cfg import build_cfg
+
+ARITH_OPS = ('+', '-', '*', '/', '%', '<', '<=', '>', '>=', '==', '!=')
+
+
+def _is_name(x):
+    return isinstance(x, str) and x != ''
+
+
+def uses_defs(q):
+    """Names a quad reads and the name it writes (or None)."""
+    op = q.get('op')
+    if op in ARITH_OPS:
+        return [x for x in (q.get('arg1'), q.get('arg2')) if _is_name(x)], q.get('res')
+    if op in ('=', 'itof', 'ftoi'):
+        return [x for x in (q.get('arg1'),) if _is_name(x)], q.get('res')
+    if op in ('print', 'if_false', 'if_true', 'array'):
+        return [x for x in (q.get('arg1'),) if _is_name(x)], None
+    # arrays stay in memory: only the index and the value take part
+    if op == '=[]':
+        return [x for x in (q.get('arg2'),) if _is_name(x)], q.get('res')
+    if op == '[]=':
+        return [x for x in (q.get('arg1'), q.get('arg2')) if _is_name(x)], None
+    return [], None
+
+
+def liveness(cfg):
+    """Return (live_in, live_out): one set of names per basic block."""
+    blocks = cfg.blocks
+
+    # per-block upward-exposed uses and definitions
+    use_b, def_b = [], []
+    for b in blocks:
+        used, defined = set(), set()
+        for q in b.quads:
+            u, d = uses_defs(q)
+            used.update(x for x in u if x not in defined)
+            if d is not None:
+                defined.add(d)
+        use_b.append(used)
+        def_b.append(defined)
+
+    # backward dataflow over blocks; postorder converges fastest
+    in_b = [set() for _ in blocks]
+    out_b = [set() for _ in blocks]
+    order = list(reversed(cfg.rpo()))
+    reachable = set(order)
+    order += [b.id for b in blocks if b.id not in reachable]
+    changed = True
+    while changed:
+        changed = False
+        for b in order:
+            out = set()
+            for s in blocks[b].succs:
+                out |= in_b[s]
+            new_in = use_b[b] | (out - def_b[b])
+            out_b[b] = out
+            if new_in != in_b[b]:
+                in_b[b] = new_in
+                changed = True
+    return in_b, out_b
+
+
+def live_intervals(cfg, live_in, live_out):
+    """
+    (name -> [start, end] in quad indices, most names live at one point).
+    Within a block a name is live from the block's start if it is live-in,
+    up to the block's end if it is live-out, and otherwise only between its
+    uses and definitions, so those positions and the block's live sets fix
+    the interval without a set per quad.
+    """
+    intervals = {}
+
+    def touch(name, i):
+        iv = intervals.get(name)
+        if iv is None:
+            intervals[name] = [i, i]
+        else:
+            if i < iv[0]:
+                iv[0] = i
+            if i > iv[1]:
+                iv[1] = i
+
+    max_live = 0
+    pos = 0
+    for b in cfg.blocks:
+        start = pos
+        pos += len(b.quads)
+        for name in live_in[b.id]:
+            touch(name, start)
+        for name in live_out[b.id]:
+            touch(name, pos - 1)
+        # one backward walk for the uses, definitions and the live count
+        live = set(live_out[b.id])
+        for i in range(pos - 1, start - 1, -1):
+            if len(live) > max_live:
+                max_live = len(live)
+            u, d = uses_defs(b.quads[i - start])
+            if d is not None:
+                touch(d, i)
+                live.discard(d)
+            for name in u:
+                touch(name, i)
+            live.update(u)
+    return intervals, max_live
+
+
+class Allocation:
+    def __init__(self, regmap, spilled, max_live, max_regs):
+        self.regmap = regmap            # name -> register
+        self.spilled = spilled          # names kept in memory
+        self.max_live = max_live        # most values live at one point
+        self.max_regs = max_regs
+
+
+def allocate(code, max_regs=8, reg_names=None):
+    """Linear-scan allocation for a quad list."""
+    reg_names = reg_names or [f"R{i + 1}" for i in range(max_regs)]
+    cfg = build_cfg(list(code))     # decode an IntermediateCode view only once
+    intervals, max_live = live_intervals(cfg, *liveness(cfg))
+
+    # ties broken by name: set order varies with the process's hash seed
+    order = sorted(intervals, key=lambda name: (intervals[name][0], str(name)))
+    free = list(reversed(reg_names))
+    active = []                         # names holding a register, sorted by end
+    regmap = {}
+    spilled = set()
+
+    for name in order:
+        start, end = intervals[name]
+        # expire intervals that ended before this one starts
+        while active and intervals[active[0]][1] < start:
+            free.append(regmap[active.pop(0)])
+        if free:
+            regmap[name] = free.pop()
+        else:
+            victim = active[-1]
+            if intervals[victim][1] > end:
+                regmap[name] = regmap.pop(victim)
+                spilled.add(victim)
+                active.pop()
+            else:
+                spilled.add(name)
+                continue
+        active.append(name)
+        active.sort(key=lambda a: intervals[a][1])
+
+    return Allocation(regmap, spilled, max_live, max_regs)
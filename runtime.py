@@ -0,0 +1,109 @@
+"""
+Arithmetic semantics shared by every execution engine.
+
+Values are Python ints and floats.  Division and remainder follow C:
+integer division truncates toward zero and the remainder takes the sign
+of the dividend, so every engine prints the same numbers.  c_div and
+c_mod look at their operands' types; engines that know the types from
+ic_types.infer() call idiv/imod or fdiv/fmod directly, and itof/ftoi
+carry out the conversions ic_types.convert() makes explicit.
+
+Arrays are array.array buffers of 64-bit ints ('q') or doubles ('d'),
+so an element holds what a C long or double would: a store converts the
+value to the element type, truncating a float toward zero for an int
+array, and fails if it does not fit.  vectorize.py runs whole loops over
+the same buffers through NumPy without copying them.
+"""
+import math
+from array import array
+
+
+class ExecutionError(Exception):
+    """A compiled program failed at run time (division by zero, runaway loop...)."""
+
+
+def c_div(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return idiv(a, b)
+    return fdiv(a, b)
+
+
+def c_mod(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return imod(a, b)
+    return fmod(a, b)
+
+
+def idiv(a, b):
+    """a / b for two ints, truncated toward zero."""
+    if b == 0:
+        raise ExecutionError("Division by zero")
+    q = a // b
+    return q + 1 if q < 0 and q * b != a else q
+
+
+def imod(a, b):
+    """a % b for two ints, with the sign of a."""
+    if b == 0:
+        raise ExecutionError("Modulo by zero")
+    r = a % b
+    return r - b if r and (a < 0) != (b < 0) else r
+
+
+def fdiv(a, b):
+    if b == 0:
+        raise ExecutionError("Division by zero")
+    return a / b
+
+
+def fmod(a, b):
+    if b == 0:
+        raise ExecutionError("Modulo by zero")
+    return math.fmod(a, b)
+
+
+def itof(a):
+    """An int converted to a float, rounded to the nearest one."""
+    try:
+        return float(a)
+    except OverflowError:
+        raise ExecutionError(f"Value {a!r} is too large for a float")
+
+
+def ftoi(a):
+    """A float converted to an int, truncated toward zero."""
+    try:
+        return int(a)
+    except (OverflowError, ValueError):
+        raise ExecutionError(f"Value {a!r} does not fit in an int")
+
+
+def new_array(size, fill):
+    """An array of size elements, each fill (0 or 0.0, which also sets the element type)."""
+    if type(size) is not int or size < 0:
+        raise ExecutionError(f"Bad array size {size!r}")
+    return array('d' if type(fill) is float else 'q', [fill]) * size
+
+
+def load(arr, i):
+    if type(i) is not int or not 0 <= i < len(arr):
+        raise ExecutionError(f"Array index {i!r} out of range")
+    return arr[i]
+
+
+def store(arr, i, value):
+    if type(i) is not int or not 0 <= i < len(arr):
+        raise ExecutionError(f"Array index {i!r} out of range")
+    try:
+        arr[i] = int(value) if arr.typecode == 'q' else value
+    except (OverflowError, ValueError):
+        raise ExecutionError(f"Value {value!r} does not fit in an array element")
+
+
+class RunResult:
+    """Outcome of running a program's intermediate code."""
+
+    def __init__(self, output, variables, steps=None):
+        self.output = output            # printed values, in order
+        self.variables = variables      # name -> final value
+        self.steps = steps              # quads executed, when the engine counts them
@@ -0,0 +1,140 @@
+"""
+Declaration and type checks over the syntax tree.
+
+The checker walks the tree in source order with a SymbolTable: it enters
+a scope for every block, names the scope on the node, declares variables
+and reports uses of undeclared ones and arrays used as scalars or the
+other way round, each at the line and column of the name.  Every
+expression gets the C type of its value, 'int' or 'float' (a comparison
+is an int), which is how a float index or array size is caught; mixing
+the two in arithmetic is fine, ic_types.convert() makes C's implicit
+conversions explicit in the IC.  The tree may be one the parser
+recovered after syntax errors, with the broken statements left out, so
+these errors come in the same pass.  Since the parser itself keeps no
+symbol state, a statement parses to the same tree on its own as in the
+whole program, which is what lets incremental.py reuse the trees of
+unchanged statements.
+"""
+from syntax_tree import BinOp, Num, Var, Visitor
+
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+
+
+class Checker(Visitor):
+    def __init__(self, symtab):
+        self.symtab = symtab
+        self.errors = []
+
+    def body(self, stmts):
+        scope = self.symtab.enter_scope()
+        for stmt in stmts:
+            self.visit(stmt)
+        self.symtab.exit_scope()
+        return scope
+
+    def error(self, message, line, col):
+        self.errors.append(f"{message} (line {line}, column {col})")
+
+    def use(self, name, line, col, array=False):
+        """The type of name's value (an array's element type); 'int' if undeclared."""
+        sym = self.symtab.record_use(name, line)
+        if sym is None:
+            self.error(f"Undeclared variable '{name}'", line, col)
+            return 'int'
+        if sym.is_array and not array:
+            self.error(f"Array '{name}' used without an index", line, col)
+        elif array and not sym.is_array:
+            self.error(f"'{name}' is not an array", line, col)
+        return sym.type
+
+    def index(self, node):
+        if self.visit(node.index) == 'float':
+            self.error(f"Index of '{node.name}' must be an int", node.line, node.col)
+
+    # --- Statements ---
+    def visit_Program(self, node):
+        for stmt in node.body:
+            self.visit(stmt)
+
+    def visit_Block(self, node):
+        node.scope = self.body(node.body)
+
+    def visit_Decl(self, node):
+        size = node.size
+        is_array = size is not None
+        if type(size) is str:
+            if self.use(size, node.line, node.col) == 'float':
+                self.error(f"Size of array '{node.name}' must be a positive integer",
+                           node.line, node.col)
+        elif is_array and (type(size) is not int or size <= 0):
+            self.error(f"Size of array '{node.name}' must be a positive integer",
+                       node.line, node.col)
+        err = self.symtab.add_symbol(node.name, node.type,
+                                     size=size if type(size) is not str else None,
+                                     size_var=size if type(size) is str else None,
+                                     line_no_def=node.line)
+        if err:
+            self.error(err, node.line, node.col)
+
+    def visit_Assign(self, node):
+        self.visit(node.value)
+        self.use(node.name, node.line, node.col)
+
+    def visit_IndexAssign(self, node):
+        self.index(node)
+        self.visit(node.value)
+        self.use(node.name, node.line, node.col, array=True)
+
+    def visit_Print(self, node):
+        self.visit(node.value)
+
+    def visit_If(self, node):
+        self.visit(node.cond)
+        node.then_scope = self.body(node.then_body)
+        if node.else_body is not None:
+            node.else_scope = self.body(node.else_body)
+
+    def visit_While(self, node):
+        self.visit(node.cond)
+        node.scope = self.body(node.body)
+
+    # --- Expressions: each returns the type of its value ---
+    def visit_Num(self, node):
+        return 'float' if type(node.value) is float else 'int'
+
+    def visit_Var(self, node):
+        return self.use(node.name, node.line, node.col)
+
+    def visit_Index(self, node):
+        self.index(node)
+        return self.use(node.name, node.line, node.col, array=True)
+
+    def visit_BinOp(self, node):
+        # post-order, left to right, with an explicit stack for long chains
+        types = []
+        todo = [(node, False)]
+        while todo:
+            n, ready = todo.pop()
+            cls = type(n)
+            if cls is Var:
+                types.append(self.use(n.name, n.line, n.col))
+            elif cls is Num:
+                types.append('float' if type(n.value) is float else 'int')
+            elif cls is not BinOp:
+                types.append(self.visit(n))
+            elif ready:
+                right = types.pop()
+                left = types.pop()
+                types.append('int' if n.op in REL_OPS or left == right == 'int' else 'float')
+            else:
+                todo.append((n, True))
+                todo.append((n.right, False))
+                todo.append((n.left, False))
+        return types[0]
+
+
+def check(tree, symtab):
+    """Fill symtab from tree and return the list of declaration and type errors."""
+    checker = Checker(symtab)
+    checker.visit(tree)
+    return checker.errors
@@ -0,0 +1,175 @@
+from contextlib import nullcontext
+
+from lexer import MiniLexer, Token, TokenStream
+from parser import MiniParser
+from lowering import lower
+from ic_types import convert
+from semantics import check
+import syntax_tree
+from symbol_table import SymbolTable
+from intermediate_code import IntermediateCode
+from code_generator import CodeGenerator
+from optimizer import Optimizer
+from peephole import Peephole
+from profiling import Profile
+
+# Bump whenever a change alters what compile() produces for the same source;
+# it is part of every compile-cache key.
+COMPILER_VERSION = '12'
+
+
+class CompileResult:
+    """Everything one compile produces, in the order the GUI shows it."""
+
+    def __init__(self, tokens, lex_errors, parse_errors, symtab, ic, asm, opt_report=None,
+                 peephole=None, ast=None):
+        self.tokens = tokens
+        self.lex_errors = lex_errors
+        self.parse_errors = parse_errors
+        self.symtab = symtab
+        self.ic = ic
+        self.asm = asm
+        self.opt_report = opt_report or []   # (pass, quads before, quads after)
+        self.peephole = peephole or {}       # peephole rule -> times it fired
+        self.ast = ast                       # syntax_tree.Program, None after a syntax error
+
+    @property
+    def errors(self):
+        return self.lex_errors + self.parse_errors
+
+    def to_record(self):
+        """Plain, JSON-serialisable copy of the result."""
+        return {
+            'tokens': [list(t) for t in self.tokens],
+            'lex_errors': self.lex_errors,
+            'parse_errors': self.parse_errors,
+            'symbols': self.symtab.get_all(),
+            'scopes': self.symtab.get_scopes(),
+            'ic': self.ic.as_dicts(),
+            'asm': self.asm,
+            'opt_report': self.opt_report,
+            'peephole': self.peephole,
+            'ast': syntax_tree.to_record(self.ast) if self.ast is not None else None,
+        }
+
+    @classmethod
+    def from_record(cls, rec):
+        st = SymbolTable.from_rows(rec['symbols'], rec['scopes'])
+        ic = IntermediateCode()
+        ic.code = rec['ic']
+        toks = [Token(*t) for t in rec['tokens']]
+        report = [tuple(r) for r in rec['opt_report']]
+        ast = syntax_tree.from_record(rec['ast']) if rec['ast'] is not None else None
+        return cls(toks, rec['lex_errors'], rec['parse_errors'], st, ic, rec['asm'], report,
+                   rec['peephole'], ast)
+
+
+class CompilerSession:
+    """
+    Holds one lexer and one set of LALR tables for the life of the process.
+
+    compile() lexes once, parses to a syntax tree, checks it, lowers it to
+    IC and adds the int/float conversions; the tree is kept on the result.
+    profile() runs the same pipeline with a profiling.Profile attached.
+    """
+
+    def __init__(self, cache=None, opt_level=0, disabled_passes=()):
+        self.cache = cache
+        self.optimizer = Optimizer(opt_level, disabled=disabled_passes)
+        # the assembly peephole pass runs from -O1 up, like the IC passes
+        self.peephole = (Peephole() if opt_level >= 1 and 'peephole' not in disabled_passes
+                         else None)
+        # cache entries are only shared between sessions with the same passes
+        passes = self.optimizer.passes + (['peephole'] if self.peephole else [])
+        self.variant = ','.join(passes)
+        self.lexer = MiniLexer()
+        self.parser = MiniParser()
+        self.parser.build()
+        self._profile = None        # the Profile of a running profile() call
+
+    def reset(self):
+        """Fresh per-compile state; the built tables are left untouched."""
+        self.lexer.errors = []
+        self.parser.errors = []
+
+    def compile(self, code):
+        if self.cache is not None:
+            cached = self.cache.get(code, self.variant)
+            if cached is not None:
+                return cached
+
+        result = self.back_end(*self.front_end(code))
+        if self.cache is not None:
+            self.cache.put(code, result, self.variant)
+        return result
+
+    def profile(self, code, cprofile=False, memory=False):
+        """Compile code, never from the cache, timing each phase; returns (result, Profile)."""
+        profile = self._profile = Profile(cprofile, memory)
+        profile.start()
+        try:
+            result = self.back_end(*self.front_end(code))
+        finally:
+            profile.stop()
+            self._profile = None
+        return result, profile
+
+    def _phase(self, name):
+        return self._profile.phase(name) if self._profile is not None else nullcontext()
+
+    def _count(self, **counters):
+        if self._profile is not None:
+            self._profile.count(**counters)
+
+    def front_end(self, code):
+        """Lex and parse: (tokens, lex errors, syntax tree or None, syntax errors)."""
+        self.reset()
+        if self._profile is None:
+            stream = TokenStream(self.lexer.stream(code), keep=True)
+            tree, parse_errors = self.parser.parse(None, lexer=stream, source=code)
+            stream.drain()
+            toks = stream.tokens
+        else:
+            with self._phase('lex'):
+                toks = list(self.lexer.stream(code))
+            with self._phase('parse'):
+                tree, parse_errors = self.parser.parse(None, lexer=TokenStream(toks), source=code)
+        return toks, list(self.lexer.errors), tree, list(parse_errors)
+
+    def back_end(self, toks, lex_errors, tree, parse_errors):
+        """Everything after parsing, from the declaration checks to the assembly."""
+        # --- Symbol Table & Intermediate Code ---
+        st = SymbolTable()
+        if tree is not None:
+            with self._phase('symbols'):
+                parse_errors = parse_errors + check(tree, st)
+            with self._phase('lower'):
+                ic = lower(tree, symtab=st)
+            with self._phase('types'):
+                conversions = convert(ic, st)
+        else:
+            ic = IntermediateCode()
+            conversions = 0
+        self._count(tokens=len(toks), statements=len(tree.body) if tree is not None else 0,
+                    symbols=len(st.symbols), scopes=st.scope_counter, quads_lowered=len(ic),
+                    conversions=conversions)
+
+        # --- Optimization ---
+        report = list(self.optimizer.run(ic, self._phase))
+
+        # --- Assembly Generation ---
+        gen = CodeGenerator(ic, st)
+        with self._phase('codegen'):
+            asm = gen.generate()
+        counts = {}
+        if self.peephole is not None:
+            with self._phase('peephole'):
+                asm = self.peephole.run(asm)
+            report.append(('peephole', self.peephole.before, self.peephole.after))
+            counts = dict(self.peephole.counts)
+        self._count(quads=len(ic), temps=ic.temp_count, labels=ic.label_count,
+                    registers=gen.stats['registers_used'], max_live=gen.stats['max_live'],
+                    spilled=len(gen.stats['spilled']), asm_lines=asm.count('\n') + 1,
+                    errors=len(lex_errors) + len(parse_errors))
+
+        return CompileResult(toks, lex_errors, parse_errors, st, ic, asm, report, counts, tree)
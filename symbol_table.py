@@ -1,60 +1,162 @@
+"""
+Symbols and scopes.
+
+Every name has a stack of bindings, innermost last: lookup() reads the
+top of one list, and leaving a scope pops exactly the names it declared.
+Symbols and scopes are __slots__ records numbered in the order they are
+created; each scope gets its own name ('global', then 'local<id>'), so
+sibling blocks never share one.  The first symbol of a name stores its
+value under that name in the IC; a later one, shadowing it or in a
+sibling block, gets a storage name of its own ('x@3' for x declared in
+scope 3).  get_all() gives the symbols as plain dicts for the GUI and
+for compile records.
+"""
+
+
+class Symbol:
+    __slots__ = ('id', 'name', 'type', 'scope', 'scope_id', 'size', 'size_var',
+                 'line_no_def', 'line_no_use', 'ic_name')
+
+    def __init__(self, id, name, type, scope, scope_id, size=None, size_var=None,
+                 line_no_def=None, line_no_use=None, ic_name=None):
+        self.id = id
+        self.name = name
+        self.ic_name = ic_name or name  # where the IC keeps the value
+        self.type = type
+        self.scope = scope              # name of the declaring scope
+        self.scope_id = scope_id
+        self.size = size
+        self.size_var = size_var
+        self.line_no_def = line_no_def
+        self.line_no_use = line_no_use if line_no_use is not None else []
+
+    @property
+    def is_array(self):
+        return self.size is not None or self.size_var is not None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Symbol({self.id}, {self.name!r}, {self.type!r}, scope={self.scope!r})"
+
+
+class Scope:
+    __slots__ = ('id', 'name', 'parent', 'symbols')
+
+    def __init__(self, id, name, parent):
+        self.id = id
+        self.name = name
+        self.parent = parent            # id of the enclosing scope, None for global
+        self.symbols = {}               # name -> Symbol declared here
+
+
 class SymbolTable:
     def __init__(self):
-        self.table = {}  # (name, scope) -> info
-        self.scope_stack = ['global']  # start with global scope
-        self.scope_counter = 0
+        self.symbols = []               # Symbol by id
+        self.scopes = [Scope(0, 'global', None)]   # Scope by id
+        self.scope_stack = [self.scopes[0]]
+        self._bindings = {}             # name -> [Symbol, ...], innermost last
+        self._declared = {}             # name -> every Symbol of that name
+        self._by_scope_name = {'global': self.scopes[0]}
+
+    @property
+    def scope_counter(self):
+        """Scopes entered so far, not counting global."""
+        return len(self.scopes) - 1
 
-        
     def lookup(self, name):
-        for s in reversed(self.scope_stack):
-            key = (name, s)
-            if key in self.table:
-                return self.table[key]
-        return None
+        stack = self._bindings.get(name)
+        return stack[-1] if stack else None
 
     def record_use(self, name, line_no):
+        """The symbol name refers to here, with the use noted on it; None if undeclared."""
         sym = self.lookup(name)
-        if sym:
-            sym['line_no_use'].append(line_no)
+        if sym is not None:
+            sym.line_no_use.append(line_no)
+        return sym
 
     def current_scope(self):
-        return self.scope_stack[-1]
+        return self.scope_stack[-1].name
 
     def enter_scope(self):
-        """
-        Enter a new scope:
-        - if nested inside global, it's a local scope
-        """
-        self.scope_counter += 1
-        # label nested blocks as 'local'
-        name = "local" if self.current_scope() == "global" else f"local{self.scope_counter}"
-        self.scope_stack.append(name)
-        return name
+        """Enter a new scope and return its name."""
+        sid = len(self.scopes)
+        scope = Scope(sid, f"local{sid}", self.scope_stack[-1].id)
+        self.scopes.append(scope)
+        self._by_scope_name[scope.name] = scope
+        self.scope_stack.append(scope)
+        return scope.name
 
     def exit_scope(self):
-        if len(self.scope_stack) > 1:
-            return self.scope_stack.pop()
-        return None
+        if len(self.scope_stack) == 1:
+            return None
+        scope = self.scope_stack.pop()
+        bindings = self._bindings
+        for name in scope.symbols:
+            bindings[name].pop()
+        return scope.name
 
     def add_symbol(self, name, typ, size=None, size_var=None, line_no_def=None):
         """
-        Add a symbol to the table.
+        Add a symbol to the current scope; returns an error message if the
+        scope already declares name, else None.
         """
-        key = (name, self.current_scope())
-        if key in self.table:
-            return f"Redeclaration error: '{name}' already declared in {self.current_scope()}"
-    
-        self.table[key] = {
-            'name': name,
-            'type': typ,
-            'scope': self.current_scope(),
-            'size': size,
-            'size_var': size_var,
-            'line_no_def': line_no_def,
-            'line_no_use': []   # list of lines where used
-        }
+        scope = self.scope_stack[-1]
+        if name in scope.symbols:
+            return f"Redeclaration error: '{name}' already declared in {scope.name}"
+        ic_name = f"{name}@{scope.id}" if name in self._declared else name
+        sym = Symbol(len(self.symbols), name, typ, scope.name, scope.id, size, size_var,
+                     line_no_def, ic_name=ic_name)
+        self.symbols.append(sym)
+        scope.symbols[name] = sym
+        self._bindings.setdefault(name, []).append(sym)
+        self._declared.setdefault(name, []).append(sym)
         return None
 
+    # --- Queries ---
+    def scope(self, name):
+        """The Scope called name, or None."""
+        return self._by_scope_name.get(name)
+
+    def symbols_in(self, scope):
+        """Symbols declared directly in a scope, given by name or id, in declaration order."""
+        s = self.scopes[scope] if isinstance(scope, int) else self._by_scope_name.get(scope)
+        return list(s.symbols.values()) if s is not None else []
+
+    def declarations(self, name):
+        """Every symbol called name, in whichever scope, in declaration order."""
+        return list(self._declared.get(name, ()))
+
+    def uses(self):
+        """Use/def index: symbol id -> (line declared, lines used)."""
+        return {s.id: (s.line_no_def, list(s.line_no_use)) for s in self.symbols}
 
     def get_all(self):
-        return list(self.table.values())
+        return [s.as_dict() for s in self.symbols]
+
+    def get_scopes(self):
+        return [[s.id, s.name, s.parent] for s in self.scopes]
+
+    @classmethod
+    def from_rows(cls, rows, scopes=()):
+        """
+        A table holding the symbols of get_all() rows and the scopes of
+        get_scopes(), as it stands after a whole program: only global is open.
+        """
+        st = cls()
+        for sid, name, parent in scopes[1:]:
+            scope = Scope(sid, name, parent)
+            st.scopes.append(scope)
+            st._by_scope_name[name] = scope
+        for row in rows:
+            scope = st.scopes[row['scope_id']]
+            sym = Symbol(row['id'], row['name'], row['type'], scope.name, scope.id,
+                         row['size'], row['size_var'], row['line_no_def'],
+                         list(row['line_no_use']), row['ic_name'])
+            st.symbols.append(sym)
+            scope.symbols[sym.name] = sym
+            if scope.id == 0:
+                st._bindings[sym.name] = [sym]
+            st._declared.setdefault(sym.name, []).append(sym)
+        return st
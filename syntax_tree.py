@@ -0,0 +1,265 @@
+"""
+Abstract syntax tree built by the parser.
+
+Every node class lists its fields in __slots__, in constructor order, and
+splits them into _children (a node, a list of statement nodes, or None)
+and _attrs (names, operators, constants, scope names, line numbers and
+the columns semantics.py reports errors at).
+The parser only builds the tree; semantics.py checks declarations and
+names the scopes, and lowering.py turns it into intermediate code.
+
+to_record() flattens a tree into a list of small lists in post-order,
+which JSON can store however deeply the source nests (a long chain like
+a + a + ... + a is as deep as it is long); from_record() rebuilds it.
+Both walk with an explicit stack rather than recursion, as does the
+lowering of expressions.
+"""
+
+
+class Node:
+    __slots__ = ()
+    _children = ()
+    _attrs = ()
+
+    def fields(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return to_record(self) == to_record(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        args = ', '.join(f"{name}={value!r}" for name, value in self.fields())
+        return f"{type(self).__name__}({args})"
+
+
+# --- Statements ---
+class Program(Node):
+    __slots__ = _children = ('body',)
+
+    def __init__(self, body):
+        self.body = body
+
+
+class Block(Node):
+    __slots__ = ('body', 'scope')
+    _children = ('body',)
+    _attrs = ('scope',)
+
+    def __init__(self, body, scope):
+        self.body = body
+        self.scope = scope          # symbol-table scope, set by semantics.Checker
+
+
+class Decl(Node):
+    __slots__ = _attrs = ('type', 'name', 'line', 'size', 'col')
+
+    def __init__(self, type, name, line=0, size=None, col=0):
+        self.type = type
+        self.name = name
+        self.line = line
+        self.size = size            # arrays: a constant or the name of a variable
+        self.col = col
+
+
+class Assign(Node):
+    __slots__ = ('name', 'value', 'line', 'col')
+    _children = ('value',)
+    _attrs = ('name', 'line', 'col')
+
+    def __init__(self, name, value, line=0, col=0):
+        self.name = name
+        self.value = value
+        self.line = line
+        self.col = col
+
+
+class IndexAssign(Node):
+    """name[index] = value"""
+    __slots__ = ('name', 'index', 'value', 'line', 'col')
+    _children = ('index', 'value')
+    _attrs = ('name', 'line', 'col')
+
+    def __init__(self, name, index, value, line=0, col=0):
+        self.name = name
+        self.index = index
+        self.value = value
+        self.line = line
+        self.col = col
+
+
+class Print(Node):
+    __slots__ = ('value', 'line')
+    _children = ('value',)
+    _attrs = ('line',)
+
+    def __init__(self, value, line=0):
+        self.value = value
+        self.line = line
+
+
+class If(Node):
+    __slots__ = ('cond', 'then_body', 'then_scope', 'else_body', 'else_scope', 'line')
+    _children = ('cond', 'then_body', 'else_body')
+    _attrs = ('then_scope', 'else_scope', 'line')
+
+    def __init__(self, cond, then_body, then_scope, else_body=None, else_scope=None, line=0):
+        self.cond = cond
+        self.then_body = then_body
+        self.then_scope = then_scope
+        self.else_body = else_body  # None when there is no else branch
+        self.else_scope = else_scope
+        self.line = line
+
+
+class While(Node):
+    __slots__ = ('cond', 'body', 'scope', 'line')
+    _children = ('cond', 'body')
+    _attrs = ('scope', 'line')
+
+    def __init__(self, cond, body, scope, line=0):
+        self.cond = cond
+        self.body = body
+        self.scope = scope
+        self.line = line
+
+
+# --- Expressions ---
+class BinOp(Node):
+    """Arithmetic and comparisons; op is the source operator, as in the IC."""
+    __slots__ = ('op', 'left', 'right')
+    _children = ('left', 'right')
+    _attrs = ('op',)
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Num(Node):
+    __slots__ = _attrs = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Var(Node):
+    __slots__ = _attrs = ('name', 'line', 'col')
+
+    def __init__(self, name, line=0, col=0):
+        self.name = name
+        self.line = line
+        self.col = col
+
+
+class Index(Node):
+    """An array element read, name[index]."""
+    __slots__ = ('name', 'index', 'line', 'col')
+    _children = ('index',)
+    _attrs = ('name', 'line', 'col')
+
+    def __init__(self, name, index, line=0, col=0):
+        self.name = name
+        self.index = index
+        self.line = line
+        self.col = col
+
+
+NODES = {cls.__name__: cls for cls in (Program, Block, Decl, Assign, IndexAssign, Print, If,
+                                      While, BinOp, Num, Var, Index)}
+
+
+class Visitor:
+    """visit(node) calls self.visit_<ClassName>(node) and returns its result."""
+
+    def visit(self, node):
+        return getattr(self, 'visit_' + type(node).__name__)(node)
+
+
+def copy_tree(tree, line_shift=0, col_shift=0, col_line=0):
+    """
+    Copy of a tree, with every line number moved by line_shift and the
+    columns of the nodes on line col_line (before the move) by col_shift.
+    """
+    def shallow(node):
+        cls = type(node)
+        twin = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(twin, name, getattr(node, name))
+        if 'line' in cls._attrs:
+            if col_shift and twin.line == col_line and 'col' in cls._attrs:
+                twin.col += col_shift
+            twin.line += line_shift
+        return twin
+
+    root = shallow(tree)
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for name in node._children:
+            child = getattr(node, name)
+            if child is None:
+                continue
+            if type(child) is list:
+                child = [shallow(c) for c in child]
+                stack.extend(child)
+            else:
+                child = shallow(child)
+                stack.append(child)
+            setattr(node, name, child)
+    return root
+
+
+# --- Records ---
+# A record is a post-order list of entries:
+#   [class name, *attrs]   pops one value per child field and pushes the node
+#   ['*', n]               pops n nodes and pushes them as a list
+#   ['-']                  pushes None (a missing else branch)
+
+def to_record(tree):
+    """Flat, JSON-serialisable form of a tree."""
+    out = []
+    stack = [tree]
+    while stack:
+        x = stack.pop()
+        if type(x) is tuple:        # a node's own entry, after its children
+            out.append(list(x))
+        elif x is None:
+            out.append(['-'])
+        elif type(x) is list:
+            stack.append(('*', len(x)))
+            stack.extend(reversed(x))
+        else:
+            stack.append((type(x).__name__, *(getattr(x, a) for a in x._attrs)))
+            stack.extend(getattr(x, c) for c in reversed(x._children))
+    return out
+
+
+def from_record(rec):
+    stack = []
+    for entry in rec:
+        tag = entry[0]
+        if tag == '*':
+            n = entry[1]
+            items = stack[len(stack) - n:]
+            del stack[len(stack) - n:]
+            stack.append(items)
+        elif tag == '-':
+            stack.append(None)
+        else:
+            cls = NODES[tag]
+            node = cls.__new__(cls)
+            k = len(cls._children)
+            for name, value in zip(cls._children, stack[len(stack) - k:]):
+                setattr(node, name, value)
+            del stack[len(stack) - k:]
+            for name, value in zip(cls._attrs, entry[1:]):
+                setattr(node, name, value)
+            stack.append(node)
+    if len(stack) != 1:
+        raise ValueError("malformed syntax tree record")
+    return stack[0]
@@ -0,0 +1,450 @@
+"""
+Whole-array execution of element-wise loops.
+
+find_loops() picks out the while loops that lowering.py (or loop rotation)
+leaves in one of the shapes
+
+    label Lh; <test>; if_false c Le; <body>; goto Lh; label Le
+    label Lh; <test>; if_false c Le; label Lb; <body>; <test'>; if_true c' Lb; label Le
+
+where the test compares a loop variable i with a bound the loop does not
+change, the body is straight-line code ending in the update i = i + s,
+and every array element the body touches is at index i, as in
+
+    while (i < n) { a[i] = b[i] * c[i] + k; i = i + 1; }
+
+No iteration then reads what another one wrote, so the body can run one
+quad at a time over all the iterations at once, each quad as one NumPy
+operation on slices of the array buffers.
+
+VectorLoop.run() takes the values of the names the loop uses and returns
+their values after the loop, or None when this run has to go element by
+element: an index would be out of range, a division by zero, an integer
+overflow or a float that does not fit an int array could happen, or the
+values are not what the shape needs.  It checks all of that before it
+stores anything, so the engine can then run the loop as usual and any
+error comes from the same iteration as without vectorization.  NumPy is
+optional: without it find_loops() finds nothing.
+"""
+import math
+import operator
+from array import array
+from itertools import chain
+
+from intermediate_code import CONVERSIONS, IntermediateCode
+from runtime import ExecutionError, c_div, c_mod, ftoi, itof
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REL_OPS = ('<', '<=', '>', '>=', '==', '!=')
+SCALAR_OPS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': c_div, '%': c_mod,
+    '<': lambda a, b: int(a < b), '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b), '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b), '!=': lambda a, b: int(a != b),
+}
+CONVERT = {'itof': itof, 'ftoi': ftoi}
+FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+SKIPPED = ('scope_enter', 'scope_exit')
+TEST_OPS = tuple(SCALAR_OPS) + CONVERSIONS + ('=',)
+BODY_OPS = TEST_OPS + ('=[]', '[]=') + SKIPPED
+INT64 = 1 << 63
+EXACT_FLOAT_INT = 1 << 53       # ints up to this compare with floats the same in NumPy
+
+
+class _Fallback(Exception):
+    """This run of the loop has to go element by element."""
+
+
+def _is_const(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _is_name(x):
+    return isinstance(x, str) and x != ''
+
+
+def _label(q):
+    return q.get('res') or q.get('arg1')
+
+
+def _reads(q):
+    """Scalar names q reads; the array of an element access is not one of them."""
+    op = q['op']
+    if op in SCALAR_OPS:
+        args = (q['arg1'], q['arg2'])
+    elif op in ('=', '[]=') or op in CONVERT:
+        args = (q['arg1'],)
+    else:
+        args = ()
+    return [x for x in args if _is_name(x)]
+
+
+class VectorLoop:
+    __slots__ = ('start', 'end', 'exit', 'var', 'step', 'rel', 'bound', 'test', 'final_test',
+                 'body', 'arrays', 'names')
+
+    def __init__(self, start, end, exit, var, step, rel, bound, test, final_test, body):
+        self.start = start              # index of the header label
+        self.end = end                  # index of the exit label
+        self.exit = exit                # exit label
+        self.var = var
+        self.step = step
+        self.rel = rel                  # var rel bound decides another iteration
+        self.bound = bound
+        self.test = test                # quads of the test before the first iteration
+        self.final_test = final_test    # ... and after the last one
+        self.body = body                # without the update of var
+        self.arrays = sorted({q['arg1'] if q['op'] == '=[]' else q['res']
+                              for q in body if q['op'] in ('=[]', '[]=')})
+        names = {}
+        for q in chain(test, body, final_test):
+            for x in (q['arg1'], q['arg2'], q['res']):
+                if _is_name(x):
+                    names.setdefault(x, None)
+        names.setdefault(var, None)
+        self.names = list(names)        # what run() takes and gives back, in this order
+
+    # --- Running ---
+    def run(self, values):
+        """Values of self.names after the whole loop, or None to run it element by element."""
+        try:
+            # overflow to inf and the like behave as in Python floats, silently
+            with np.errstate(all='ignore'):
+                return self._run(dict(zip(self.names, values)))
+        except (_Fallback, ExecutionError):
+            return None
+
+    def _run(self, env):
+        for q in self.test:
+            _scalar(q, env)
+        i0 = env[self.var]
+        bound = _value(self.bound, env)
+        if type(i0) is not int or not _is_const(bound):
+            raise _Fallback()
+        count = self._trip_count(i0, bound)
+        if (count > 0) != (env[self.test[-1]['res']] != 0):
+            raise _Fallback()
+        if count == 0:
+            return tuple(env[name] for name in self.names)
+
+        last = i0 + (count - 1) * self.step
+        lo, hi = min(i0, last), max(i0, last)
+        views = {}
+        for name in self.arrays:
+            arr = env[name]
+            if not isinstance(arr, array) or lo < 0 or hi >= len(arr):
+                raise _Fallback()
+            buf = np.frombuffer(arr, dtype=np.int64 if arr.typecode == 'q' else np.float64)
+            views[name] = buf[i0::self.step][:count]
+
+        index = i0 + self.step * np.arange(count, dtype=np.int64)
+        values = {}                     # names the body sets -> scalar or vector
+        stored = {}                     # array -> its new elements, not yet written
+        for q in self.body:
+            op, a1, a2, res = q['op'], q['arg1'], q['arg2'], q['res']
+            if op == '[]=':
+                stored[res] = _convert(self._read(a1, index, values, env), views[res], count)
+            elif op == '=[]':
+                values[res] = stored.get(a1, views[a1])
+            elif op == '=':
+                values[res] = self._read(a1, index, values, env)
+            elif op in CONVERT:
+                values[res] = _vector_convert(op, self._read(a1, index, values, env))
+            else:
+                values[res] = _vector_op(op, self._read(a1, index, values, env),
+                                         self._read(a2, index, values, env))
+
+        # what the names hold after the last iteration; then the test that ends the loop
+        for name, v in values.items():
+            env[name] = v[-1].item() if isinstance(v, np.ndarray) else v
+        env[self.var] = last + self.step
+        for q in self.final_test:
+            _scalar(q, env)
+        if env[self.final_test[-1]['res']] != 0:
+            raise _Fallback()
+        for name, new in stored.items():
+            views[name][:] = new
+        return tuple(env[name] for name in self.names)
+
+    def _read(self, x, index, values, env):
+        if not _is_name(x):
+            return x
+        if x == self.var:
+            return index
+        return values[x] if x in values else env[x]
+
+    def _trip_count(self, i0, bound):
+        """Iterations of var = i0, i0 + step, ... while var rel bound holds."""
+        try:
+            if self.rel in ('<', '<='):
+                hi = math.ceil(bound) - 1 if self.rel == '<' else math.floor(bound)
+                return (hi - i0) // self.step + 1 if i0 <= hi else 0
+            lo = math.floor(bound) + 1 if self.rel == '>' else math.ceil(bound)
+            return (i0 - lo) // -self.step + 1 if i0 >= lo else 0
+        except (ValueError, OverflowError):     # a NaN or infinite bound
+            raise _Fallback()
+
+
+def _value(x, env):
+    return env[x] if _is_name(x) else x
+
+
+def _scalar(q, env):
+    op = q['op']
+    if op == '=':
+        env[q['res']] = _value(q['arg1'], env)
+    elif op in CONVERT:
+        env[q['res']] = CONVERT[op](_value(q['arg1'], env))
+    else:
+        env[q['res']] = SCALAR_OPS[op](_value(q['arg1'], env), _value(q['arg2'], env))
+
+
+# --- Vector arithmetic with the engines' semantics ---
+def _is_int(v):
+    return v.dtype == np.int64 if isinstance(v, np.ndarray) else type(v) is int
+
+
+def _magnitude(v):
+    """Largest absolute value of an int scalar or vector, as a Python int."""
+    if isinstance(v, np.ndarray):
+        return max(-int(v.min()), int(v.max()))
+    return abs(v)
+
+
+def _as_numpy(v):
+    if isinstance(v, np.ndarray):
+        return v
+    if type(v) is int and abs(v) >= INT64:
+        raise _Fallback()
+    return np.int64(v) if type(v) is int else np.float64(v)
+
+
+def _vector_op(op, a, b):
+    if not isinstance(a, np.ndarray) and not isinstance(b, np.ndarray):
+        return SCALAR_OPS[op](a, b)
+    ints = _is_int(a) and _is_int(b)
+    if ints and op in ('+', '-', '*'):
+        ma, mb = _magnitude(a), _magnitude(b)
+        if (ma * mb if op == '*' else ma + mb) >= INT64:
+            raise _Fallback()           # Python ints would not wrap around
+    if op in ('/', '%'):
+        if np.any(np.asarray(b) == 0):
+            raise _Fallback()
+        if ints and _magnitude(a) >= INT64:
+            raise _Fallback()
+        if op == '%' and not ints and not np.all(np.isfinite(a)):
+            raise _Fallback()           # math.fmod raises for an infinite dividend
+    if op in REL_OPS and not ints:
+        for v in (a, b):
+            if _is_int(v) and _magnitude(v) > EXACT_FLOAT_INT:
+                raise _Fallback()
+    a, b = _as_numpy(a), _as_numpy(b)
+
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op == '/':
+        if ints:                        # truncating, like C
+            q = np.abs(a) // np.abs(b)
+            return np.where((a < 0) != (b < 0), -q, q)
+        return a / b
+    if op == '%':
+        return np.fmod(a, b)
+    return _COMPARE[op](a, b).astype(np.int64)
+
+
+def _vector_convert(op, v):
+    if not isinstance(v, np.ndarray):
+        return CONVERT[op](v)
+    if op == 'itof':
+        return v.astype(np.float64)     # rounds to the nearest, as float() does
+    if not np.all(np.isfinite(v)) or np.abs(v).max() >= INT64:
+        raise _Fallback()               # Python ints do not overflow
+    return v.astype(np.int64)           # truncates toward zero, as int() does
+
+
+_COMPARE = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+            '==': operator.eq, '!=': operator.ne}
+
+
+def _convert(v, view, count):
+    """The elements an array store writes: v as the array's element type, count of them."""
+    if view.dtype == np.float64:
+        if isinstance(v, np.ndarray):
+            return v.astype(np.float64)
+        try:
+            return np.full(count, float(v))
+        except OverflowError:
+            raise _Fallback()
+    if isinstance(v, np.ndarray):
+        if v.dtype == np.int64:
+            return v
+        if not np.all(np.isfinite(v)) or np.abs(v).max() >= INT64:
+            raise _Fallback()
+        return v.astype(np.int64)       # truncates toward zero, as int() does
+    if type(v) is float:
+        if not math.isfinite(v) or abs(v) >= INT64:
+            raise _Fallback()
+        v = int(v)
+    if not -INT64 <= v < INT64:
+        raise _Fallback()
+    return np.full(count, v, dtype=np.int64)
+
+
+# --- Finding the loops ---
+def find_loops(quads):
+    """VectorLoops in a quad list, by the index of their header label."""
+    if np is None:
+        return []
+    label_at = {}
+    refs = {}
+    for k, q in enumerate(quads):
+        op = q['op']
+        if op == 'label':
+            label_at[_label(q)] = k
+        elif op in ('goto', 'if_false', 'if_true'):
+            refs[_label(q)] = refs.get(_label(q), 0) + 1
+    found = []
+    for k, q in enumerate(quads):
+        if q['op'] == 'label':
+            loop = _match(quads, k, refs)
+            if loop is not None:
+                found.append(loop)
+    return found
+
+
+def _match(quads, k, refs):
+    n = len(quads)
+    header = _label(quads[k])
+    j = k + 1
+    test = []
+    while j < n and quads[j]['op'] in TEST_OPS:
+        test.append(quads[j])
+        j += 1
+    if j >= n or quads[j]['op'] != 'if_false' or not test:
+        return None
+    rel = test[-1]
+    if rel['op'] not in REL_OPS or rel['res'] != quads[j]['arg1']:
+        return None
+    exit = quads[j]['res']
+    j += 1
+
+    body_label = None
+    if j < n and quads[j]['op'] == 'label':
+        body_label = _label(quads[j])
+        j += 1
+    body = []
+    while j < n and quads[j]['op'] in BODY_OPS:
+        if quads[j]['op'] not in SKIPPED:
+            body.append(quads[j])
+        j += 1
+    if j + 1 >= n or quads[j + 1]['op'] != 'label' or _label(quads[j + 1]) != exit:
+        return None
+    if refs.get(exit) != 1:
+        return None
+    if body_label is None:
+        if quads[j]['op'] != 'goto' or _label(quads[j]) != header:
+            return None
+        final_test = test
+    else:
+        if (quads[j]['op'] != 'if_true' or quads[j]['res'] != body_label
+                or refs.get(body_label) != 1 or len(body) < len(test)):
+            return None
+        final_test = body[len(body) - len(test):]
+        body = body[:len(body) - len(test)]
+        if quads[j]['arg1'] != final_test[-1]['res'] or not _same_test(test, final_test):
+            return None
+    return _analyse(k, j + 1, exit, test, final_test, body)
+
+
+def _same_test(test, copy):
+    """True if copy is test with its temps renamed, as loop rotation makes it."""
+    rename = {}
+    for q, c in zip(test, copy):
+        if q['op'] != c['op']:
+            return False
+        for key in ('arg1', 'arg2'):
+            x, y = q[key], c[key]
+            if rename.get(x, x) != y or type(x) is not type(y):
+                return False
+        if not (IntermediateCode.is_temp(q['res']) and IntermediateCode.is_temp(c['res'])):
+            return False
+        rename[q['res']] = c['res']
+    return True
+
+
+def _induction(body):
+    """(var, step, quads before the update) if body ends with var = var + step."""
+    if not body:
+        return None
+    q = body[-1]
+    var = q['res']
+    if not _is_name(var) or IntermediateCode.is_temp(var):
+        return None
+    update, rest = q, body[:-1]
+    if q['op'] == '=':
+        defs = [d for d in rest if d['res'] == q['arg1']]
+        if not IntermediateCode.is_temp(q['arg1']) or len(defs) != 1:
+            return None
+        update = defs[0]
+    op, a1, a2 = update['op'], update['arg1'], update['arg2']
+    if op == '+' and a1 == var and type(a2) is int:
+        step = a2
+    elif op == '+' and a2 == var and type(a1) is int:
+        step = a1
+    elif op == '-' and a1 == var and type(a2) is int:
+        step = -a2
+    else:
+        return None
+    return (var, step, rest) if step != 0 else None
+
+
+def _analyse(start, end, exit, test, final_test, body):
+    found = _induction(body)
+    if found is None:
+        return None
+    var, step, body = found
+
+    # the test: var rel bound, after quads that work out the bound
+    rel = test[-1]
+    if rel['arg1'] == var and rel['arg2'] != var:
+        rel_op, bound = rel['op'], rel['arg2']
+    elif rel['arg2'] == var and rel['arg1'] != var:
+        rel_op, bound = FLIPPED.get(rel['op']), rel['arg1']
+    else:
+        return None
+    if rel_op not in ('<', '<=', '>', '>=') or (step > 0) != (rel_op in ('<', '<=')):
+        return None
+    test_defs = {q['res'] for q in test}
+    body_defs = {q['res'] for q in body if q['op'] != '[]='}
+    if var in test_defs or any(var in _reads(q) for q in test[:-1]):
+        return None
+    if any(x in body_defs for q in test for x in _reads(q)) or test_defs & body_defs:
+        return None
+
+    # the body: every element at index var, nothing carried from one iteration to the next
+    defined = set()
+    arrays = set()
+    for q in body:
+        op = q['op']
+        if op in ('=[]', '[]='):
+            if q['arg2'] != var:
+                return None
+            arrays.add(q['arg1'] if op == '=[]' else q['res'])
+        for x in _reads(q):
+            if x != var and x not in defined and (x in body_defs or x in test_defs):
+                return None
+        if op != '[]=':
+            if q['res'] == var:
+                return None
+            defined.add(q['res'])
+    if arrays & (body_defs | test_defs | {var}):
+        return None
+    return VectorLoop(start, end, exit, var, step, rel_op, bound, test, final_test, body)
@@ -0,0 +1,363 @@
+"""
+Assembler and virtual machine for the code CodeGenerator emits.
+
+assemble() turns the assembly text into a Program: pre-decoded
+(opcode, a, b, c) instructions kept as four parallel columns.  Labels are resolved to instruction
+indices and every operand to a slot in one register file; immediates get
+read-only slots of their own that are filled once before the run, so the
+dispatch loop never parses or branches on operand kinds.  Common
+instruction pairs are fused into three-operand superinstructions to halve
+the number of dispatches in typical loops.
+
+The code generator emits typed arithmetic (see ic_types.py): IADD/FADD,
+ISUB/FSUB and IMUL/FMUL assemble to the same ADD, SUB and MUL opcodes,
+since Python's + already runs the int or float version for the operands
+it gets, while IDIV/FDIV and IMOD/FMOD are opcodes of their own that
+skip the type checks of the untyped DIV and MOD.  ITOF d, s and FTOI d, s
+convert between the two.
+
+    python vm.py program.asm        (or a .vmb file from binary_format.py)
+"""
+import sys
+
+from runtime import (ExecutionError, c_div, c_mod, fdiv, fmod, ftoi, idiv, imod, itof, load,
+                     new_array, store)
+
+# --- Opcodes (ordered roughly by how often loops execute them) ---
+MOV, ADD, SUB, MUL, DIV, MOD, CMP, JE, JNE, JMP, OUT = range(11)
+SLT, SLE, SGT, SGE, SEQ, SNE = range(11, 17)
+LOAD, STORE = 30, 31        # MOV between a register and a [memory] slot
+# ALLOC [a], n, #0   LDX d, [a], i   STX [a], i, x   (the slot of [a] holds the array)
+ALLOC, LDX, STX = 32, 33, 34
+IDIV, FDIV, IMOD, FMOD = 35, 36, 37, 38
+ITOF, FTOI = 43, 44
+
+OPCODES = {
+    'MOV': MOV, 'ADD': ADD, 'SUB': SUB, 'MUL': MUL, 'DIV': DIV, 'MOD': MOD,
+    'CMP': CMP, 'JE': JE, 'JNE': JNE, 'JMP': JMP, 'OUT': OUT,
+    'SLT': SLT, 'SLE': SLE, 'SGT': SGT, 'SGE': SGE, 'SEQ': SEQ, 'SNE': SNE,
+    'LOAD': LOAD, 'STORE': STORE, 'ALLOC': ALLOC, 'LDX': LDX, 'STX': STX,
+    'IADD': ADD, 'FADD': ADD, 'ISUB': SUB, 'FSUB': SUB, 'IMUL': MUL, 'FMUL': MUL,
+    'IDIV': IDIV, 'FDIV': FDIV, 'IMOD': IMOD, 'FMOD': FMOD, 'ITOF': ITOF, 'FTOI': FTOI,
+}
+JUMPS = (JE, JNE, JMP)
+BINOPS = (ADD, SUB, MUL, DIV, MOD, SLT, SLE, SGT, SGE, SEQ, SNE, IDIV, FDIV, IMOD, FMOD)
+THREE_OPERAND = (ALLOC, LDX, STX)
+
+# Superinstructions the assembler fuses from pairs the code generator emits
+# all the time:  MOV d, x / <binop> d, y  ->  <binop>3 d, x, y  and
+# CMP a, b / JE L  ->  CMPJE a, b, L  (likewise for JNE).
+ADD3, SUB3, MUL3, DIV3, MOD3, SLT3, SLE3, SGT3, SGE3, SEQ3, SNE3 = range(17, 28)
+CMPJE, CMPJNE = 28, 29
+IDIV3, FDIV3, IMOD3, FMOD3 = 39, 40, 41, 42
+FUSED = dict(zip(BINOPS, (ADD3, SUB3, MUL3, DIV3, MOD3, SLT3, SLE3, SGT3, SGE3, SEQ3, SNE3,
+                          IDIV3, FDIV3, IMOD3, FMOD3)))
+
+# Relative cost of each opcode, used for the cycle count.
+CYCLES = {
+    MOV: 1, ADD: 1, SUB: 1, MUL: 3, DIV: 20, MOD: 20, CMP: 1,
+    JE: 2, JNE: 2, JMP: 2, OUT: 10,
+    SLT: 1, SLE: 1, SGT: 1, SGE: 1, SEQ: 1, SNE: 1,
+    LOAD: 3, STORE: 3, ALLOC: 10, LDX: 4, STX: 4,
+    IDIV: 20, FDIV: 20, IMOD: 20, FMOD: 20, ITOF: 2, FTOI: 2,
+}
+for _op, _fused in FUSED.items():
+    CYCLES[_fused] = CYCLES[MOV] + CYCLES[_op]
+CYCLES[CMPJE] = CYCLES[CMP] + CYCLES[JE]
+CYCLES[CMPJNE] = CYCLES[CMP] + CYCLES[JNE]
+
+# How many source instructions each decoded instruction stands for.
+WIDTH = {op: 2 if op in FUSED.values() or op in (CMPJE, CMPJNE) else 1 for op in CYCLES}
+
+
+class AssemblyError(Exception):
+    pass
+
+
+class Program:
+    """
+    Pre-decoded instructions plus the initial register file.  The columns
+    are any int sequences: lists from assemble(), memoryviews over the
+    mapped file from binary_format.load_program().
+    """
+
+    def __init__(self, columns, slots, regnames, labels):
+        self.ops, self.a, self.b, self.c = columns
+        self.slots = slots          # initial slot values (registers 0, immediates set)
+        self.regnames = regnames    # register or [memory] name -> slot
+        self.labels = labels        # label -> instruction index
+
+    def __len__(self):
+        return len(self.ops)
+
+    @property
+    def code(self):
+        """[(opcode, a, b, c)]"""
+        return list(zip(self.ops, self.a, self.b, self.c))
+
+
+def _parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)      # also 1e+20, which repr() gives for large floats
+
+
+def assemble(text):
+    """Parse assembly text into a Program."""
+    slots = []
+    regnames = {}
+    consts = {}
+    labels = {}
+    pending = []        # (opcode, operands, line_no) before label resolution
+
+    def operand(tok, line_no):
+        # '#5' and a bare '5' are both immediates; '[x]' is a memory slot
+        if tok.startswith('#') or tok[:1].isdigit():
+            try:
+                value = _parse_number(tok.lstrip('#'))
+            except ValueError:
+                raise AssemblyError(f"Bad immediate '{tok}' (line {line_no})")
+            key = (type(value), value)
+            if key not in consts:
+                consts[key] = len(slots)
+                slots.append(value)
+            return consts[key]
+        if tok not in regnames:
+            regnames[tok] = len(slots)
+            slots.append(0)
+        return regnames[tok]
+
+    for line_no, raw in enumerate(text.splitlines(), start=1):
+        line = raw.split(';', 1)[0].strip()
+        if not line:
+            continue
+        if line.endswith(':'):
+            labels[line[:-1].strip()] = len(pending)
+            continue
+        mnemonic, _, rest = line.partition(' ')
+        opc = OPCODES.get(mnemonic.upper())
+        if opc is None:
+            raise AssemblyError(f"Unknown instruction '{mnemonic}' (line {line_no})")
+        args = [a.strip() for a in rest.split(',')] if rest.strip() else []
+        pending.append((opc, args, line_no))
+
+    # Decode operands, then fuse pairs; a jump target may not be the
+    # second half of a fused pair.
+    targets = set(labels.values())
+    decoded = []
+    for opc, args, line_no in pending:
+        want = 1 if opc in JUMPS or opc == OUT else 3 if opc in THREE_OPERAND else 2
+        if len(args) != want:
+            raise AssemblyError(f"Expected {want} operand(s) (line {line_no})")
+        if opc in JUMPS:
+            if args[0] not in labels:
+                raise AssemblyError(f"Undefined label '{args[0]}' (line {line_no})")
+            decoded.append((opc, labels[args[0]], 0, 0))
+        elif opc == OUT:
+            decoded.append((opc, operand(args[0], line_no), 0, 0))
+        elif opc in THREE_OPERAND:
+            decoded.append((opc, *(operand(a, line_no) for a in args)))
+        else:
+            decoded.append((opc, operand(args[0], line_no), operand(args[1], line_no), 0))
+
+    code = []
+    new_index = [0] * (len(decoded) + 1)
+    i = 0
+    while i < len(decoded):
+        new_index[i] = len(code)
+        ins = decoded[i]
+        nxt = decoded[i + 1] if i + 1 < len(decoded) and i + 1 not in targets else None
+        if nxt and ins[0] == MOV and nxt[0] in FUSED and nxt[1] == ins[1]:
+            # after MOV d, x an operand naming d means x
+            c = ins[2] if nxt[2] == ins[1] else nxt[2]
+            code.append((FUSED[nxt[0]], ins[1], ins[2], c))
+            i += 2
+        elif nxt and ins[0] == CMP and nxt[0] in (JE, JNE):
+            code.append((CMPJE if nxt[0] == JE else CMPJNE, ins[1], ins[2], nxt[1]))
+            i += 2
+        else:
+            code.append(ins)
+            i += 1
+    new_index[len(decoded)] = len(code)
+
+    # re-point jumps at the fused instruction indices
+    for k, ins in enumerate(code):
+        if ins[0] in JUMPS:
+            code[k] = (ins[0], new_index[ins[1]], 0, 0)
+        elif ins[0] in (CMPJE, CMPJNE):
+            code[k] = (ins[0], ins[1], ins[2], new_index[ins[3]])
+    labels = {name: new_index[idx] for name, idx in labels.items()}
+
+    columns = [list(col) for col in zip(*code)] if code else [[], [], [], []]
+    return Program(columns, slots, regnames, labels)
+
+
+class VMResult:
+    def __init__(self, output, steps, cycles, registers, counts):
+        self.output = output
+        self.steps = steps
+        self.cycles = cycles
+        self.registers = registers
+        self.counts = counts        # executions per decoded instruction
+
+
+class VM:
+    def __init__(self, program, max_jumps=None):
+        self.program = program
+        self.max_jumps = max_jumps  # guard against runaway loops
+
+    def run(self):
+        prog = self.program
+        ops, A, B, C = prog.ops, prog.a, prog.b, prog.c
+        n = len(ops)
+        r = list(prog.slots)
+        hits = [0] * n
+        out = []
+        emit = out.append
+        jumps_left = self.max_jumps if self.max_jumps is not None else -1
+        flag = False
+        pc = 0
+
+        while pc < n:
+            hits[pc] += 1
+            op, a, b, c = ops[pc], A[pc], B[pc], C[pc]
+            pc += 1
+            if op == MOV or op == LOAD or op == STORE:
+                r[a] = r[b]
+            elif op == ADD3:
+                r[a] = r[b] + r[c]
+            elif op == CMPJE:
+                if r[a] == r[b]:
+                    pc = c
+                    jumps_left -= 1
+                    if jumps_left == 0:
+                        raise ExecutionError("Jump limit exceeded")
+            elif op == JMP:
+                pc = a
+                jumps_left -= 1
+                if jumps_left == 0:
+                    raise ExecutionError("Jump limit exceeded")
+            elif op == SUB3:
+                r[a] = r[b] - r[c]
+            elif op == MUL3:
+                r[a] = r[b] * r[c]
+            elif op == SLT3:
+                r[a] = 1 if r[b] < r[c] else 0
+            elif op == SLE3:
+                r[a] = 1 if r[b] <= r[c] else 0
+            elif op == SGT3:
+                r[a] = 1 if r[b] > r[c] else 0
+            elif op == SGE3:
+                r[a] = 1 if r[b] >= r[c] else 0
+            elif op == SEQ3:
+                r[a] = 1 if r[b] == r[c] else 0
+            elif op == SNE3:
+                r[a] = 1 if r[b] != r[c] else 0
+            elif op == CMPJNE:
+                if r[a] != r[b]:
+                    pc = c
+                    jumps_left -= 1
+                    if jumps_left == 0:
+                        raise ExecutionError("Jump limit exceeded")
+            elif op == IDIV3:
+                x, y = r[b], r[c]
+                r[a] = x // y if y > 0 and x >= 0 else idiv(x, y)
+            elif op == FDIV3:
+                r[a] = fdiv(r[b], r[c])
+            elif op == IMOD3:
+                x, y = r[b], r[c]
+                r[a] = x % y if y > 0 and x >= 0 else imod(x, y)
+            elif op == FMOD3:
+                r[a] = fmod(r[b], r[c])
+            elif op == DIV3:
+                r[a] = c_div(r[b], r[c])
+            elif op == MOD3:
+                r[a] = c_mod(r[b], r[c])
+            elif op == OUT:
+                emit(r[a])
+            elif op == LDX:
+                r[a] = load(r[b], r[c])
+            elif op == STX:
+                store(r[a], r[b], r[c])
+            elif op == ITOF:
+                r[a] = itof(r[b])
+            elif op == FTOI:
+                r[a] = ftoi(r[b])
+            # unfused forms
+            elif op == ADD:
+                r[a] = r[a] + r[b]
+            elif op == SUB:
+                r[a] = r[a] - r[b]
+            elif op == MUL:
+                r[a] = r[a] * r[b]
+            elif op == DIV:
+                r[a] = c_div(r[a], r[b])
+            elif op == MOD:
+                r[a] = c_mod(r[a], r[b])
+            elif op == IDIV:
+                r[a] = idiv(r[a], r[b])
+            elif op == FDIV:
+                r[a] = fdiv(r[a], r[b])
+            elif op == IMOD:
+                r[a] = imod(r[a], r[b])
+            elif op == FMOD:
+                r[a] = fmod(r[a], r[b])
+            elif op == CMP:
+                flag = r[a] == r[b]
+            elif op == JE:
+                if flag:
+                    pc = a
+                    jumps_left -= 1
+                    if jumps_left == 0:
+                        raise ExecutionError("Jump limit exceeded")
+            elif op == JNE:
+                if not flag:
+                    pc = a
+                    jumps_left -= 1
+                    if jumps_left == 0:
+                        raise ExecutionError("Jump limit exceeded")
+            elif op == SLT:
+                r[a] = 1 if r[a] < r[b] else 0
+            elif op == SLE:
+                r[a] = 1 if r[a] <= r[b] else 0
+            elif op == SGT:
+                r[a] = 1 if r[a] > r[b] else 0
+            elif op == SGE:
+                r[a] = 1 if r[a] >= r[b] else 0
+            elif op == SEQ:
+                r[a] = 1 if r[a] == r[b] else 0
+            elif op == SNE:
+                r[a] = 1 if r[a] != r[b] else 0
+            elif op == ALLOC:
+                r[a] = new_array(r[b], r[c])
+
+        steps = sum(h * WIDTH[op] for h, op in zip(hits, ops))
+        cycles = sum(h * CYCLES[op] for h, op in zip(hits, ops))
+        registers = {name: r[slot] for name, slot in prog.regnames.items()}
+        return VMResult(out, steps, cycles, registers, hits)
+
+
+def run_text(text, max_jumps=None):
+    return VM(assemble(text), max_jumps=max_jumps).run()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python vm.py program.asm|program.vmb", file=sys.stderr)
+        return 2
+    from binary_format import is_binary, load_program
+    if is_binary(argv[0]):
+        res = VM(load_program(argv[0])).run()
+    else:
+        with open(argv[0], encoding='utf-8') as f:
+            res = run_text(f.read())
+    for value in res.output:
+        print(value)
+    print(f"; {res.steps} instructions, {res.cycles} cycles", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())